@@ -0,0 +1,262 @@
+import hmac
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from flask import g, jsonify, request
+
+# Rate limiting and load shedding by priority class.
+#
+# Every request is put in a class:
+#   critical  requests carrying the coordinator token (COORDINATOR_TOKEN, sent
+#             as "X-Coordinator-Token"), on any route: never limited or shed.
+#             The operations endpoints are critical for anyone, but without
+#             the token they are still rate limited.
+#   public    missing person lookups and reports, search and contact: the
+#             traffic that spikes when a disaster is in the news
+#   normal    everything else
+# Classes other than the token's come from method and path (PRIORITY_RULES),
+# never from anything a client can claim for itself.
+#
+# Rate limits are token buckets per client and route: a bucket holds up to
+# `burst` requests and refills at `rate` per second; a request finding it
+# empty gets 429 with Retry-After. Every request without the coordinator
+# token is limited. A paged list read is charged once, for its first page:
+# the pages after it (GETs with ?cursor=) take no token, so a client reading
+# a long list page by page is not refused halfway.
+#
+# Load shedding looks at two signals: requests in flight in this process
+# (against max_in_flight) and the recent average wait for a pooled database
+# connection (against max_pool_wait). At or over either threshold public
+# requests are refused with 503 and Retry-After; at twice a threshold normal
+# ones are too. Critical requests always run. Long-lived streams (the change
+# feed's text/event-stream) stop counting as in flight once they start: an
+# open dashboard waiting for events is not load.
+
+CRITICAL = 'critical'
+NORMAL = 'normal'
+PUBLIC = 'public'
+CLASSES = (CRITICAL, NORMAL, PUBLIC)
+
+COORDINATOR_HEADER = 'X-Coordinator-Token'
+# Response types whose requests give their in-flight slot back when the response starts
+LONG_LIVED = ('text/event-stream',)
+
+# Methods whose ?cursor= requests continue a paged read
+READ_METHODS = ('GET', 'HEAD')
+# WSGI environ key marking a request run inside one that was already
+# admitted (the operations /api/sync replays); it is not checked again
+ADMITTED_BY_PARENT = 'drm.admitted_by_parent'
+
+# (methods or None for any, path prefix, class); the first match wins,
+# unmatched requests are normal
+PRIORITY_RULES = [
+    (None, '/metrics', CRITICAL),
+    (None, '/api/pool_stats', CRITICAL),
+    (None, '/api/cache_stats', CRITICAL),
+    (None, '/api/admission_stats', CRITICAL),
+    (None, '/api/missing_persons', PUBLIC),
+    (None, '/api/search', PUBLIC),
+    (None, '/api/contact', PUBLIC),
+]
+
+
+# Token buckets in this process: key -> (tokens, time of last refill, time it
+# is full again), least recently used first
+class MemoryBuckets:
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Take one token. Returns (allowed, seconds until one is available).
+    def take(self, key, rate, burst):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            tokens = burst if bucket is None else min(burst, bucket[0] + (now - bucket[1]) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            if bucket is None and len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            self._buckets.move_to_end(key)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    # Drop buckets that have refilled (they are the same as no bucket), then
+    # the least recently used ones until there is room for one more. Clients
+    # seen recently keep their buckets, so a flood of new keys cannot reset them.
+    def _prune(self, now):
+        full = [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]
+        for key in full:
+            del self._buckets[key]
+        while len(self._buckets) >= self.max_keys:
+            self._buckets.popitem(last=False)
+
+
+# Token buckets in Redis, shared by every worker. The refill and take run in
+# one Lua script, so concurrent workers cannot both take the last token.
+class RedisBuckets:
+    SCRIPT = """
+        local now = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local burst = tonumber(ARGV[3])
+        local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+        local tokens = tonumber(bucket[1]) or burst
+        local updated = tonumber(bucket[2]) or now
+        tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+        local allowed = 0
+        if tokens >= 1 then
+            tokens = tokens - 1
+            allowed = 1
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+        redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+        return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, client, prefix='drm:rate:'):
+        self._client = client
+        self._prefix = prefix
+        self._take = client.register_script(self.SCRIPT)
+
+    def take(self, key, rate, burst):
+        allowed, tokens = self._take(keys=[self._prefix + key], args=[time.time(), rate, burst])
+        tokens = float(tokens)
+        return bool(allowed), 0.0 if allowed else (1 - tokens) / rate
+
+
+# backend: 'memory' or 'redis' (the redis package is only needed for the latter)
+def create_buckets(backend='memory', redis_url=None):
+    if backend == 'redis':
+        import redis
+        return RedisBuckets(redis.Redis.from_url(redis_url or 'redis://localhost:6379/0'))
+    return MemoryBuckets()
+
+
+class AdmissionControl:
+    # limits: {class: (rate per second, burst) or None for no limit}; the
+    # critical entry applies to critical routes called without the token
+    # pool: a db_pool.ConnectionPool whose recent_wait() is a load signal
+    def __init__(self, buckets, limits, pool=None, max_in_flight=64, max_pool_wait=0.5,
+                 retry_after=5, coordinator_token=None, rules=PRIORITY_RULES, enabled=True):
+        self.buckets = buckets
+        self.limits = limits
+        self.pool = pool
+        self.max_in_flight = max_in_flight
+        self.max_pool_wait = max_pool_wait
+        self.retry_after = retry_after
+        self.coordinator_token = coordinator_token
+        self.rules = rules
+        self.enabled = enabled
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._counts = Counter()  # (class, outcome): admitted, rate_limited, shed
+
+    def is_coordinator(self, headers):
+        token = headers.get(COORDINATOR_HEADER)
+        return bool(self.coordinator_token and token and hmac.compare_digest(token, self.coordinator_token))
+
+    def classify(self, method, path, headers):
+        if self.is_coordinator(headers):
+            return CRITICAL
+        for methods, prefix, priority in self.rules:
+            if (methods is None or method in methods) and (path == prefix or path.startswith(prefix + '/')):
+                return priority
+        return NORMAL
+
+    # Load as a multiple of the thresholds: 1.0 is where public requests are shed
+    def load(self):
+        load = self.in_flight / self.max_in_flight if self.max_in_flight else 0.0
+        if self.pool is not None and self.max_pool_wait:
+            load = max(load, self.pool.recent_wait() / self.max_pool_wait)
+        return load
+
+    # A later page of a paged list read (see the rate limits above)
+    @staticmethod
+    def is_continuation(method, args):
+        return method in READ_METHODS and bool(args.get('cursor'))
+
+    # Decide on one request. Returns (class, None) when it may run, or
+    # (class, (status, message, retry after seconds)) when it is refused.
+    # client: address or other id of the caller; route: URL rule or path;
+    # continuation: a later page of a list read, shed but not rate limited.
+    def check(self, method, path, route, client, headers, continuation=False):
+        priority = self.classify(method, path, headers)
+        # CORS preflights are answered without touching the database; refusing
+        # one would fail the browser request it announces
+        if not self.enabled or method == 'OPTIONS' or self.is_coordinator(headers):
+            return priority, None
+
+        load = self.load()
+        if priority != CRITICAL and (load >= 2 or (priority == PUBLIC and load >= 1)):
+            self._count(priority, 'shed')
+            return priority, (503, "The server is busy; please try again shortly", self.retry_after)
+
+        limit = self.limits.get(priority)
+        if limit is not None and not continuation:
+            rate, burst = limit
+            allowed, wait = self.buckets.take(f"{client}|{method} {route}", rate, burst)
+            if not allowed:
+                self._count(priority, 'rate_limited')
+                return priority, (429, "Too many requests; please slow down", max(1, math.ceil(wait)))
+        return priority, None
+
+    def _count(self, priority, outcome):
+        with self._lock:
+            self._counts[(priority, outcome)] += 1
+
+    # An admitted request starts / finishes
+    def enter(self, priority):
+        with self._lock:
+            self.in_flight += 1
+            self._counts[(priority, 'admitted')] += 1
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def install(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        if request.environ.get(ADMITTED_BY_PARENT):
+            return None
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        priority, refused = self.check(request.method, request.path, route, request.remote_addr, request.headers,
+                                       self.is_continuation(request.method, request.args))
+        if refused is not None:
+            status, message, retry_after = refused
+            response = jsonify({"success": False, "message": message})
+            response.status_code = status
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+        self.enter(priority)
+        g.admitted = True
+        return None
+
+    def _after_request(self, response):
+        if response.mimetype in LONG_LIVED and g.pop('admitted', False):
+            self.leave()
+        return response
+
+    def _teardown_request(self, exc):
+        if g.pop('admitted', False):
+            self.leave()
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            in_flight = self.in_flight
+        return {
+            "enabled": self.enabled,
+            "in_flight": in_flight,
+            "load": round(self.load(), 4),
+            "classes": {priority: {outcome: counts.get((priority, outcome), 0)
+                                   for outcome in ('admitted', 'rate_limited', 'shed')}
+                        for priority in CLASSES},
+        }
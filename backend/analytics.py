@@ -0,0 +1,137 @@
+import threading
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Days of supply history used for the burn rate when the client does not pass ?window_days=
+DEFAULT_WINDOW_DAYS = 30
+# Rows fetched per round trip while loading the tables
+LOAD_CHUNK_SIZE = 50000
+
+INVENTORY_COLUMNS = ['item_id', 'item_name', 'camp_id', 'quantity']
+DONATION_COLUMNS = ['item_id', 'quantity', 'date_donated']
+SUPPLY_COLUMNS = ['item_id', 'quantity', 'date_received']
+
+
+def _load(cursor, query, columns):
+    cursor.execute(query)
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(LOAD_CHUNK_SIZE)
+        if not rows:
+            break
+        chunks.append(pd.DataFrame.from_records(rows, columns=columns))
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(chunks, ignore_index=True)
+
+
+# Read the three tables into DataFrames, only the columns the analysis needs
+def load_frames(conn):
+    cursor = conn.cursor(buffered=False)
+    try:
+        inventory = _load(cursor, "SELECT item_id, item_name, camp_id, quantity FROM Inventory",
+                          INVENTORY_COLUMNS)
+        donations = _load(cursor, "SELECT item_id, quantity, date_donated FROM Donation", DONATION_COLUMNS)
+        supplies = _load(cursor, "SELECT item_id, quantity, date_received FROM Supply", SUPPLY_COLUMNS)
+    finally:
+        cursor.close()
+    return inventory, donations, supplies
+
+
+def _days(values):
+    return pd.to_datetime(values).values.astype('datetime64[D]')
+
+
+# Sum `quantity` per position in item_ids (the inventory rows), in one
+# bincount over the whole frame
+def _totals(item_ids, flow_item_ids, quantities):
+    position = pd.Index(item_ids).get_indexer(flow_item_ids)
+    known = position >= 0
+    return np.bincount(position[known], weights=quantities[known], minlength=len(item_ids))
+
+
+# Stock flow per camp and item.
+#
+# Each Inventory row is a stock of one item held by a camp; donations add to
+# it and supplies draw from it. Rows for the same item name in the same camp
+# are combined. The burn rate is the quantity supplied per day over the last
+# `window_days`; days_until_depletion is the current stock divided by it
+# (None when nothing was supplied in the window).
+def stock_flow(inventory, donations, supplies, as_of=None, window_days=DEFAULT_WINDOW_DAYS):
+    as_of = np.datetime64(as_of or date.today(), 'D')
+    window_start = as_of - np.timedelta64(window_days, 'D')
+
+    item_ids = inventory['item_id'].to_numpy()
+    supply_quantity = supplies['quantity'].fillna(0).to_numpy(dtype=np.float64)
+    recent = _days(supplies['date_received']) > window_start
+
+    frame = pd.DataFrame({
+        'camp_id': inventory['camp_id'],
+        'item_name': inventory['item_name'],
+        'stock': inventory['quantity'].to_numpy(dtype=np.float64),
+        'donated_in': _totals(item_ids, donations['item_id'].to_numpy(),
+                              donations['quantity'].fillna(0).to_numpy(dtype=np.float64)),
+        'supplied_out': _totals(item_ids, supplies['item_id'].to_numpy(), supply_quantity),
+        'supplied_recent': _totals(item_ids, supplies['item_id'].to_numpy()[recent], supply_quantity[recent]),
+    })
+
+    result = frame.groupby(['camp_id', 'item_name'], dropna=False, sort=False).sum().reset_index()
+    result['burn_rate'] = result['supplied_recent'] / window_days
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_left = np.where(result['burn_rate'] > 0, result['stock'] / result['burn_rate'], np.nan)
+    result['days_until_depletion'] = np.round(days_left, 1)
+    result = result.drop(columns='supplied_recent')
+    return result.sort_values(['days_until_depletion', 'camp_id', 'item_name'], na_position='last')
+
+
+# JSON-ready rows: integers for the counts, None for missing values
+def to_records(result):
+    records = []
+    for row in result.astype(object).where(result.notna(), None).itertuples(index=False):
+        record = row._asdict()
+        for column in ('camp_id', 'stock', 'donated_in', 'supplied_out'):
+            if record[column] is not None:
+                record[column] = int(record[column])
+        record['burn_rate'] = round(record['burn_rate'], 3)
+        records.append(record)
+    return records
+
+
+# Stock flow shared by every request. The tables are loaded at most every
+# `refresh` seconds, so results can lag writes by that long; each window is
+# computed once per load and day. Camp filters and limits are applied by the
+# caller to the shared result, which must not be modified.
+class StockFlowCache:
+    # connect: zero-argument callable returning a DB connection (e.g. the pool)
+    # max_windows: distinct ?window_days= results kept per load
+    def __init__(self, connect, refresh=60, max_windows=8):
+        self._connect = connect
+        self.refresh = refresh
+        self.max_windows = max_windows
+        self._frames = None
+        self._loaded_at = 0.0
+        self._results = {}
+        self._lock = threading.Lock()
+
+    # One request loads or computes while the others wait for its result
+    def get(self, window_days=DEFAULT_WINDOW_DAYS):
+        key = (date.today(), window_days)
+        with self._lock:
+            if self._frames is None or time.monotonic() - self._loaded_at > self.refresh:
+                conn = self._connect()
+                try:
+                    self._frames = load_frames(conn)
+                finally:
+                    conn.close()
+                self._loaded_at = time.monotonic()
+                self._results = {}
+            result = self._results.get(key)
+            if result is None:
+                result = stock_flow(*self._frames, as_of=key[0], window_days=window_days)
+                if len(self._results) >= self.max_windows:
+                    del self._results[next(iter(self._results))]
+                self._results[key] = result
+            return result
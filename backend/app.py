@@ -1,10 +1,43 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, g, has_request_context, stream_with_context
 import mysql.connector
-import json
+import csv
+import io
+from collections import Counter
+from functools import partial, wraps
 from datetime import datetime, date
 import os
 from dotenv import load_dotenv
 from flask_cors import CORS
+from config import Config
+from db_pool import ConnectionPool, PoolTimeout
+from replicas import READ_METHODS, Replica, ReplicaRouter, parse_hosts
+from id_allocator import IdAllocator
+from cache import ResponseCache, create_backend
+from compression import Compression
+from admission import AdmissionControl, CRITICAL, NORMAL, PUBLIC, create_buckets
+from instrumentation import Instrumentation
+import serializer
+from serializer import LIST_SHAPES, encode, encode_columns, encode_rows, rows_to_dicts
+import camp_stats
+from analytics import DEFAULT_WINDOW_DAYS, StockFlowCache, to_records
+from dependencies import check_delete
+import versioning
+from versioning import VersionError, expected_version
+from matching import VictimIndex
+from geo import CampLocator, GeoError, geocode, lookup, parse_coordinate
+from search import build_search_query, parse_types
+import scheduler
+import changes
+from changes import ChangeError, ChangeFeed
+from idempotency import IdempotencyStore
+import offline_sync
+from offline_sync import SyncError
+from bulk import BulkError, read_bulk_rows, check_references, to_date
+from tables import (TableError, RELIEF_CAMPS, VICTIMS, MISSING_PERSONS, INVENTORY, VOLUNTEERS,
+                    VOLUNTEER_ASSIGNMENTS)
+from pagination import (PaginationError, build_keyset_query, build_filtered_query,
+                        split_page, like_prefix, parse_date, parse_int, parse_limit,
+                        parse_cursor, MAX_PAGE_LIMIT)
 
 # Load environment variables
 load_dotenv()
@@ -12,52 +45,634 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Database connection function
-def get_db_connection():
+# JSON encoder for every response (orjson unless JSON_ENCODER=json)
+serializer.use_encoder(Config.JSON_ENCODER)
+
+# gzip/brotli response compression and ETags for GETs. Installed before the
+# other after_request hooks so it runs last, on the final response.
+compression = Compression(
+    min_size=Config.COMPRESSION_MIN_SIZE,
+    level=Config.GZIP_LEVEL,
+    brotli_quality=Config.BROTLI_QUALITY,
+    enabled=Config.COMPRESSION_ENABLED
+)
+compression.install(app)
+
+# Per-request timing of SQL statements, rows fetched and JSON serialization,
+# exported at /metrics; ?profile=1 returns a stack sample dump when enabled
+instrumentation = Instrumentation(
+    n_plus_one_threshold=Config.N_PLUS_ONE_THRESHOLD,
+    profiling=Config.PROFILING_ENABLED,
+    profile_interval=Config.PROFILE_INTERVAL
+)
+instrumentation.install(app)
+
+# Open a new physical MySQL connection (used by the pool); host and port
+# default to the primary (DB_HOST)
+def create_mysql_connection(host=None, port=None):
+    settings = {'port': port} if port else {}
     return mysql.connector.connect(
-        host=os.environ.get('DB_HOST'),
+        host=host or os.environ.get('DB_HOST'),
         user=os.environ.get('DB_USER'),
         password=os.environ.get('DB_PASSWORD'),
-        database=os.environ.get('DB_NAME')
+        database=os.environ.get('DB_NAME'),
+        **settings
+    )
+
+# Shared connection pool, so requests reuse open connections instead of
+# doing a TCP + auth handshake each time
+db_pool = ConnectionPool(
+    create_mysql_connection,
+    pool_size=Config.DB_POOL_SIZE,
+    max_overflow=Config.DB_POOL_MAX_OVERFLOW,
+    timeout=Config.DB_POOL_TIMEOUT,
+    recycle=Config.DB_POOL_RECYCLE,
+    pre_ping=Config.DB_POOL_PRE_PING
+)
+
+# Read replicas for GET traffic (none unless DB_REPLICA_HOSTS is set)
+def create_replica_pool(host, port):
+    return ConnectionPool(
+        partial(create_mysql_connection, host, port),
+        pool_size=Config.DB_POOL_SIZE,
+        max_overflow=Config.DB_POOL_MAX_OVERFLOW,
+        timeout=Config.DB_POOL_TIMEOUT,
+        recycle=Config.DB_POOL_RECYCLE,
+        pre_ping=Config.DB_POOL_PRE_PING
     )
 
-# Helper function to convert datetime/date objects to string for JSON serialization
-def json_serial(obj):
-    if isinstance(obj, (datetime, date)):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
+replica_router = ReplicaRouter(
+    [Replica(host, port, create_replica_pool(host, port)) for host, port in parse_hosts(Config.DB_REPLICA_HOSTS)],
+    max_lag=Config.REPLICA_MAX_LAG,
+    check_interval=Config.REPLICA_CHECK_INTERVAL,
+    sticky_window=Config.READ_YOUR_WRITES_WINDOW,
+    logger=app.logger
+)
+replica_router.install(app)
+
+# Replica this request reads from, or None for the primary. Chosen once per
+# request, so all its queries see the same server.
+def read_replica():
+    if not replica_router.replicas or not has_request_context() or request.method not in READ_METHODS:
+        return None
+    if g.get('db_primary'):
+        return None
+    if 'db_replica' not in g:
+        g.db_replica = None if replica_router.sticky(request.cookies, request.headers) else replica_router.pick()
+    return g.db_replica
+
+# Database connection function. conn.close() hands the connection back to the pool.
+# GET requests get a replica connection when one is healthy, everything else the primary.
+def get_db_connection():
+    replica = read_replica()
+    if replica is not None:
+        try:
+            return instrumentation.wrap(replica.pool.connect())
+        except PoolTimeout:
+            raise
+        except Exception as e:
+            replica_router.mark_down(replica, e)
+            g.db_replica = None
+    return instrumentation.wrap(db_pool.connect())
+
+# Connection to the primary, for reads that must see the latest writes
+def get_primary_connection():
+    return instrumentation.wrap(db_pool.connect())
+
+# Run a GET view against the primary, for reads that a lagging replica would
+# get wrong: cached views (a cached response outlives the request and is only
+# evicted by the next write, so it must not be filled from a replica that has
+# not seen that write yet) and the change log (read up to the change feed's
+# watermark, which comes from the primary).
+def primary_reads(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_primary = True
+        return view(*args, **kwargs)
+    return wrapper
+
+# Primary key sequences: name -> (table, primary key, first id)
+ID_SEQUENCES = {
+    'ReliefCamp': ('ReliefCamp', 'camp_id', 1),
+    'VictimSurvivor': ('VictimSurvivor', 'victim_id', 1),
+    'MissingPersonReport': ('MissingPersonReport', 'report_id', 1),
+    'Inventory': ('Inventory', 'item_id', 201),
+    'Volunteer': ('Volunteer', 'volunteer_id', 401),
+    'VolunteerAssignment': ('VolunteerAssignment', 'assignment_id', 101),
+}
+
+# Race-free id allocation from the IdSequence table (replaces MAX(id) + 1)
+id_allocator = IdAllocator(get_primary_connection, ID_SEQUENCES, block_size=Config.ID_BLOCK_SIZE)
 
-# Custom JSON encoder for MySQL results
+# Read-through cache for GET responses on reference data (camps, inventory,
+# volunteers). Mutating handlers evict the entries they affect by tag.
+response_cache = ResponseCache(
+    create_backend(Config.CACHE_BACKEND, max_entries=Config.CACHE_MAX_ENTRIES,
+                   ttl=Config.CACHE_TTL, redis_url=Config.REDIS_URL),
+    enabled=Config.CACHE_ENABLED
+)
+
+# Phonetic index of registered victims for matching missing person reports.
+# Handlers that write victims mark them for reloading.
+victim_index = VictimIndex(get_primary_connection, refresh_interval=Config.MATCH_INDEX_REFRESH,
+                           max_candidates=Config.MATCH_MAX_CANDIDATES)
+
+# KD-tree of camp coordinates for /api/relief_camps/nearest. Camp writes mark
+# it for rebuilding; free capacity is reloaded every GEO_OCCUPANCY_REFRESH seconds.
+camp_locator = CampLocator(get_primary_connection, occupancy_refresh=Config.GEO_OCCUPANCY_REFRESH)
+
+# Inventory stock flow, loaded from Inventory, Donation and Supply at most every ANALYTICS_REFRESH seconds
+stock_flow_cache = StockFlowCache(get_primary_connection, refresh=Config.ANALYTICS_REFRESH)
+
+# Change feed behind /api/stream and /api/changes. Write handlers record their
+# changes in ChangeLog before committing and call notify() after.
+change_feed = ChangeFeed(get_primary_connection, poll_interval=Config.CHANGE_POLL_INTERVAL,
+                         gap_timeout=Config.CHANGE_GAP_TIMEOUT, buffer_size=Config.CHANGE_BUFFER_SIZE,
+                         retention_days=Config.CHANGE_RETENTION_DAYS, logger=app.logger)
+
+# Rate limits and load shedding by priority class. Installed before the
+# idempotency keys, so a refused request does not claim its key.
+rate_limits = {
+    CRITICAL: (Config.RATE_LIMIT_RATE, Config.RATE_LIMIT_BURST),
+    NORMAL: (Config.RATE_LIMIT_RATE, Config.RATE_LIMIT_BURST),
+    PUBLIC: (Config.RATE_LIMIT_PUBLIC_RATE, Config.RATE_LIMIT_PUBLIC_BURST),
+} if Config.RATE_LIMIT_ENABLED else {}
+admission = AdmissionControl(
+    create_buckets(Config.RATE_LIMIT_BACKEND, Config.REDIS_URL),
+    limits=rate_limits,
+    pool=db_pool,
+    max_in_flight=Config.SHED_MAX_IN_FLIGHT,
+    max_pool_wait=Config.SHED_MAX_POOL_WAIT,
+    retry_after=Config.SHED_RETRY_AFTER,
+    coordinator_token=Config.COORDINATOR_TOKEN or None
+)
+admission.install(app)
+
+# Idempotency-Key support for every POST/PUT/DELETE route: a retried write
+# gets the first attempt's response instead of running again. /api/sync
+# checks the keys of its operations itself.
+idempotency_store = IdempotencyStore(get_primary_connection, ttl=Config.IDEMPOTENCY_TTL,
+                                     lease=Config.IDEMPOTENCY_LEASE)
+idempotency_store.install(app, exempt=['sync_operations'])
+
+@app.errorhandler(PoolTimeout)
+def handle_pool_timeout(e):
+    return jsonify({"success": False, "message": str(e)}), 503
+
+# Rows of a MySQL result as dicts for jsonify (dates, datetimes and decimals
+# are encoded by the serializer)
 def convert_to_json(data, cursor):
-    result = []
-    columns = [column[0] for column in cursor.description]
-    for row in data:
-        result.append(dict(zip(columns, row)))
-    return result
+    return rows_to_dicts(data, [column[0] for column in cursor.description])
+
+# Run a keyset-paginated list query for the current request's ?limit=,
+# ?cursor= and filter arguments and build the JSON response. Rows come from a
+# dictionary cursor; ?shape=rows returns the column names once and each row
+# as an array instead, and ?shape=columns one array per column, both encoded
+# straight from the cursor's tuples.
+def paginated_list(base_query, pk, filters):
+    shape = request.args.get('shape', 'objects')
+    if shape not in LIST_SHAPES:
+        return jsonify({"success": False, "message": f"shape must be one of: {', '.join(LIST_SHAPES)}"}), 400
+    try:
+        query, params, limit = build_keyset_query(base_query, pk, filters, request.args)
+    except PaginationError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=(shape == 'objects'))
+
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        columns = [column[0] for column in cursor.description]
+        pk_column = pk.split('.')[-1]
+        if shape != 'objects':
+            rows, next_cursor = split_page(rows, limit, columns.index(pk_column))
+            encode_shape = encode_columns if shape == 'columns' else encode_rows
+            return Response(encode_shape(columns, rows, next_cursor), mimetype='application/json')
+        rows, next_cursor = split_page(rows, limit, pk_column)
+        return jsonify({"success": True, "data": rows, "next_cursor": next_cursor})
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+# Stream a whole (optionally filtered) table as NDJSON or CSV.
+# Rows are read from an unbuffered cursor EXPORT_CHUNK_SIZE at a time and written
+# out as they arrive, so memory use does not grow with the size of the table.
+def stream_export(base_query, pk, filters, name):
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({"success": False, "message": "format must be 'ndjson' or 'csv'"}), 400
+
+    try:
+        query, params = build_filtered_query(base_query, pk, filters, request.args)
+    except PaginationError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor(buffered=False, dictionary=(export_format == 'ndjson'))
+
+    try:
+        cursor.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+    except Exception as e:
+        cursor.close()
+        conn.close()
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    def generate():
+        try:
+            if export_format == 'csv':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(columns)
+                yield buffer.getvalue()
+
+            while True:
+                rows = cursor.fetchmany(Config.EXPORT_CHUNK_SIZE)
+                if not rows:
+                    break
+
+                if export_format == 'csv':
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerows(rows)
+                    yield buffer.getvalue()
+                else:
+                    yield b''.join(encode(row) + b'\n' for row in rows)
+        finally:
+            # If the client went away mid-stream the cursor still has unread
+            # rows; the pool discards such a connection instead of reusing it
+            try:
+                cursor.close()
+            except Exception:
+                pass
+            conn.close()
+
+    if export_format == 'csv':
+        mimetype = 'text/csv'
+    else:
+        mimetype = 'application/x-ndjson'
+    headers = {"Content-Disposition": f"attachment; filename={name}.{export_format}"}
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers=headers)
+
+# {camp_id: total} of one column over rows inserted by bulk_insert
+def sum_by_camp(inserted, camp_index, amount_index):
+    totals = Counter()
+    for _, values, _ in inserted:
+        totals[values[camp_index]] += values[amount_index]
+    return totals
+
+# Response for a PUT whose row was missing (404) or changed since the
+# client read it (409, with the current version)
+def version_mismatch(outcome, name, current):
+    if outcome == versioning.NOT_FOUND:
+        return jsonify({"success": False, "message": f"{name} not found"}), 404
+    return jsonify({"success": False, "version": current,
+                    "message": f"{name} was changed by someone else; reload it and try again"}), 409
+
+# Insert a batch of rows (JSON array or CSV upload) into a table from tables.py
+# in one transaction. All rows are validated first; ids for the valid ones are
+# allocated in one step and inserted with a single executemany. Invalid rows
+# are reported per row.
+#   prepare(valid): called before taking a connection (e.g. to allocate more ids)
+#   after_insert(cursor, inserted): extra statements in the same transaction,
+#                                   inserted is a list of (new id, values, row)
+#   invalidates: response cache tags to evict once rows were inserted
+#   after_commit(new_ids): called with the ids of the inserted rows after commit
+# The new rows are recorded in the change feed under the table's resource.
+def bulk_insert(table, prepare=None, after_insert=None, invalidates=(), after_commit=None):
+    try:
+        rows = read_bulk_rows(request, Config.BULK_MAX_ROWS)
+    except BulkError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    valid, errors = table.validate(rows)
+
+    # Allocate the ids before taking a connection; the allocator may need one of its own
+    try:
+        new_ids = id_allocator.allocate(table.name, len(valid)) if valid else []
+        if prepare:
+            prepare(valid)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        for column, (parent, key) in table.references.items():
+            valid = check_references(cursor, valid, table.names.index(column), parent, key, errors)
+
+        inserted = [(new_id, values, row) for new_id, (_, values, row) in zip(new_ids, valid)]
+        if inserted:
+            table.insert_many(cursor, [table.insert_params(new_id, values) for new_id, values, _ in inserted])
+            if after_insert:
+                after_insert(cursor, inserted)
+            if table.resource:
+                changes.record(cursor, table.resource, 'create', [new_id for new_id, _, _ in inserted])
+        conn.commit()
+        if inserted:
+            response_cache.invalidate(*invalidates)
+            change_feed.notify()
+            if after_commit:
+                after_commit([new_id for new_id, _, _ in inserted])
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+    results = [{"row": index, "success": False, "message": message} for index, message in errors.items()]
+    results.extend({"row": index, "success": True, table.pk: new_id}
+                   for new_id, (index, _, _) in zip(new_ids, valid))
+    results.sort(key=lambda result: result["row"])
+
+    response = {
+        "success": not errors,
+        "inserted": len(valid),
+        "failed": len(errors),
+        "results": results
+    }
+    if not valid:
+        return jsonify(response), 400
+    return jsonify(response), 207 if errors else 200
 
 # API Routes
 @app.route('/')
 def index():
     return jsonify({"message": "Disaster Relief Management API", "status": "online"})
 
+# Connection pool metrics
+@app.route('/api/pool_stats', methods=['GET'])
+def get_pool_stats():
+    data = db_pool.stats()
+    if replica_router.replicas:
+        data['replicas'] = replica_router.stats()
+    return jsonify({"success": True, "data": data})
+
+# Response cache metrics
+@app.route('/api/cache_stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify({"success": True, "data": response_cache.stats()})
+
+# Rate limiting and load shedding counters per priority class
+@app.route('/api/admission_stats', methods=['GET'])
+def get_admission_stats():
+    return jsonify({"success": True, "data": admission.stats()})
+
+# Prometheus metrics: per-endpoint requests, latency, queries, rows and
+# serialization time, plus the pool, cache and admission counters as gauges
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    gauges = {f"db_pool_{name}": {(): value} for name, value in db_pool.stats().items()}
+    gauges.update({f"response_cache_{name}": {(): value} for name, value in response_cache.stats().items()
+                   if isinstance(value, (int, float))})
+    admission_stats = admission.stats()
+    gauges['admission_in_flight'] = {(): admission_stats['in_flight']}
+    gauges['admission_load'] = {(): admission_stats['load']}
+    gauges['admission_requests'] = {(('class', priority), ('outcome', outcome)): count
+                                    for priority, outcomes in admission_stats['classes'].items()
+                                    for outcome, count in outcomes.items()}
+    return Response(instrumentation.render(gauges), mimetype='text/plain; version=0.0.4')
+
+# Delta sync: changes after ?since=<seq>, oldest first, ?limit= at a time.
+# ?resources=inventory,relief_camps limits them to some resources. Poll again
+# with since=next_since; 410 means the log no longer reaches back that far
+# and the lists have to be reloaded.
+@app.route('/api/changes', methods=['GET'])
+@primary_reads
+def get_changes():
+    try:
+        since = changes.parse_seq(request.args.get('since'))
+        resources = changes.parse_resources(request.args.get('resources'))
+        limit = parse_limit(request.args)
+    except (ChangeError, PaginationError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    until = change_feed.watermark
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        oldest = changes.oldest(cursor)
+        if oldest is not None and since < oldest - 1:
+            return jsonify({"success": False, "message": f"Changes since {since} are no longer kept; reload the lists"}), 410
+        events = changes.read(cursor, since, until, limit + 1, resources)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+    more = len(events) > limit
+    events = events[:limit]
+    next_since = events[-1]["seq"] if more else max(since, until)
+    return jsonify({"success": True, "data": events, "next_since": next_since, "more": more})
+
+# Server-sent events for live dashboards: one event per change, named after
+# its resource, with the change's seq as the event id. ?resources= filters.
+# A reconnecting EventSource resumes after Last-Event-ID (or ?since=);
+# otherwise the stream starts with the next change. Idle streams get a
+# keepalive comment every CHANGE_STREAM_HEARTBEAT seconds.
+@app.route('/api/stream', methods=['GET'])
+@primary_reads
+def stream_changes():
+    try:
+        resources = changes.parse_resources(request.args.get('resources'))
+        resume = request.headers.get('Last-Event-ID') or request.args.get('since')
+        since = changes.parse_seq(resume) if resume else change_feed.watermark
+    except ChangeError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    wanted = set(resources or changes.RESOURCES)
+
+    def generate():
+        last = since
+        while True:
+            events, watermark = change_feed.wait(last, Config.CHANGE_STREAM_HEARTBEAT)
+            if events is None:
+                # Too far behind for the in-memory buffer: catch up from the log
+                conn = get_db_connection()
+                cursor = conn.cursor()
+                try:
+                    events = changes.read(cursor, last, watermark, MAX_PAGE_LIMIT, resources)
+                finally:
+                    cursor.close()
+                    conn.close()
+                if len(events) == MAX_PAGE_LIMIT:
+                    watermark = events[-1]["seq"]
+            yield ''.join(changes.to_sse(event) for event in events if event["resource"] in wanted) or ": keepalive\n\n"
+            last = max(last, watermark)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
+# Replay writes queued by an offline client, in order:
+#   {"operations": [{"key": "...", "method": "POST", "path": "/api/victims", "body": {...}}, ...]}
+# Every operation is idempotent by its key, so a batch can be resent after a
+# lost response. Returns one {"key", "status", "body", "retry"} result per
+# operation; operations with "retry": true should be sent again later.
+@app.route('/api/sync', methods=['POST'])
+def sync_operations():
+    try:
+        operations = offline_sync.parse_operations(request.get_json(silent=True), Config.BULK_MAX_ROWS)
+    except SyncError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    results = offline_sync.replay(app, idempotency_store, operations, Config.BULK_MAX_ROWS)
+    return jsonify({"success": all(result["status"] < 400 for result in results), "results": results})
+
+# Ranked search over victims, missing person reports and volunteers by name,
+# phone number and address fragments (FULLTEXT indexes from migration 0004).
+#   ?q=: words that must all occur; ?type=victims,missing_persons,volunteers
+#   ?limit=, ?cursor=: paging; results are ordered by relevance, so the cursor
+#   is the offset of the next page
+@app.route('/api/search', methods=['GET'])
+def search():
+    try:
+        types = parse_types(request.args.get('type'))
+        limit = parse_limit(request.args)
+        offset = parse_cursor(request.args) or 0
+        query, params = build_search_query(request.args.get('q'), types, limit, offset)
+    except PaginationError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = str(offset + limit)
+        result = convert_to_json(rows, cursor)
+        return jsonify({"success": True, "data": result, "next_cursor": next_cursor})
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
 # Relief Camp Routes
+RELIEF_CAMP_FILTERS = {
+    'name_prefix': ("camp_name LIKE %s", like_prefix),
+    'location': ("location = %s", str),
+}
+
+RELIEF_CAMP_QUERY = "SELECT * FROM ReliefCamp"
+
 @app.route('/api/relief_camps', methods=['GET'])
+@response_cache.cached('relief_camps')
+@primary_reads
 def get_relief_camps():
-    conn = get_db_connection()
+    return paginated_list(RELIEF_CAMP_QUERY, "camp_id", RELIEF_CAMP_FILTERS)
+
+# Occupancy and activity per camp, read from the CampStats counters
+CAMP_STATS_QUERY = """
+    SELECT c.camp_id, c.camp_name, c.location, c.capacity, s.victims, s.active_volunteers,
+           s.open_missing_reports, s.inventory_units
+    FROM ReliefCamp c
+    JOIN CampStats s ON s.camp_id = c.camp_id
+"""
+
+# Day this process last recounted active volunteers
+volunteers_counted_on = None
+
+# Active volunteers depend on the date; recount them once a day. This is a
+# write, so it goes to the primary even when the stats are read from a replica.
+def refresh_volunteer_counts():
+    global volunteers_counted_on
+    today = date.today()
+    if volunteers_counted_on == today:
+        return
+    conn = get_primary_connection()
     cursor = conn.cursor()
-    
     try:
-        cursor.execute("SELECT * FROM ReliefCamp")
-        camps = cursor.fetchall()
-        result = convert_to_json(camps, cursor)
-        return jsonify({"success": True, "data": result})
+        if camp_stats.refresh_active_volunteers(cursor, today):
+            conn.commit()
+        volunteers_counted_on = today
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.route('/api/relief_camps/stats', methods=['GET'])
+def get_relief_camp_stats():
+    try:
+        query, params, limit = build_keyset_query(CAMP_STATS_QUERY, "c.camp_id", RELIEF_CAMP_FILTERS, request.args)
+    except PaginationError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    try:
+        refresh_volunteer_counts()
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        cursor.execute(query, params)
+        result, next_cursor = split_page(cursor.fetchall(), limit, 'camp_id')
+        for camp in result:
+            camp['occupancy'] = round(camp['victims'] / camp['capacity'], 4) if camp['capacity'] else None
+        return jsonify({"success": True, "data": result, "next_cursor": next_cursor})
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
     finally:
         cursor.close()
         conn.close()
 
+# The k camps nearest to ?lat=&lon= (or a Gazetteer ?location=) with at
+# least ?min_free= places left (default 1), nearest first
+@app.route('/api/relief_camps/nearest', methods=['GET'])
+def get_nearest_relief_camps():
+    try:
+        k = parse_int(request.args.get('k') or '5')
+        min_free = parse_int(request.args.get('min_free') or '1')
+        if k < 1:
+            raise PaginationError("k must be a positive integer")
+        k = min(k, MAX_PAGE_LIMIT)
+        if request.args.get('lat') or request.args.get('lon'):
+            latitude = parse_coordinate(request.args.get('lat'), 'lat', 90)
+            longitude = parse_coordinate(request.args.get('lon'), 'lon', 180)
+        elif not request.args.get('location'):
+            raise GeoError("lat and lon, or location, are required")
+        else:
+            latitude = longitude = None
+    except (PaginationError, GeoError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    try:
+        if latitude is None:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            try:
+                coordinates = lookup(cursor, request.args['location'])
+            finally:
+                cursor.close()
+                conn.close()
+            if coordinates is None:
+                return jsonify({"success": False, "message": "Unknown location"}), 404
+            latitude, longitude = coordinates
+        camps = camp_locator.nearest(latitude, longitude, k=k, min_free=min_free)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    return jsonify({"success": True, "latitude": latitude, "longitude": longitude, "data": camps})
+
+@app.route('/api/relief_camps/export', methods=['GET'])
+def export_relief_camps():
+    return stream_export(RELIEF_CAMP_QUERY, "camp_id", RELIEF_CAMP_FILTERS, "relief_camps")
+
 @app.route('/api/relief_camps/<int:camp_id>', methods=['GET'])
+@response_cache.cached('relief_camps:{camp_id}')
+@primary_reads
 def get_relief_camp(camp_id):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -79,30 +694,43 @@ def get_relief_camp(camp_id):
         cursor.close()
         conn.close()
 
+# (latitude, longitude) from a camp payload: both or neither
+def camp_coordinates(data):
+    latitude, longitude = data.get('latitude'), data.get('longitude')
+    if latitude in (None, '') and longitude in (None, ''):
+        return None, None
+    return parse_coordinate(latitude, 'latitude', 90), parse_coordinate(longitude, 'longitude', 180)
+
 @app.route('/api/relief_camps', methods=['POST'])
 def add_relief_camp():
     data = request.json
     
-    # Validate required fields
-    required_fields = ['camp_name', 'location', 'capacity', 'contact_person']
-    for field in required_fields:
-        if field not in data:
-            return jsonify({"success": False, "message": f"Missing required field: {field}"}), 400
+    # Validate required fields. Coordinates are optional; without them they
+    # are looked up by location.
+    try:
+        camp = RELIEF_CAMPS.row(data)
+        camp_coordinates(data)
+    except (TableError, GeoError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    # Allocate the new id before taking a connection; the allocator may need one of its own
+    try:
+        new_id = id_allocator.next_id(RELIEF_CAMPS.name)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
     
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Get max camp_id and increment by 1 for new record
-        cursor.execute("SELECT MAX(camp_id) FROM ReliefCamp")
-        max_id = cursor.fetchone()[0]
-        new_id = 1 if max_id is None else max_id + 1
-        
-        cursor.execute(
-            "INSERT INTO ReliefCamp (camp_id, camp_name, location, capacity, contact_person) VALUES (%s, %s, %s, %s, %s)",
-            (new_id, data['camp_name'], data['location'], data['capacity'], data['contact_person'])
-        )
+        RELIEF_CAMPS.insert(conn, new_id, camp)
+        geocode(cursor, [new_id])
+        camp_stats.create(cursor, [new_id])
+        changes.record(cursor, 'relief_camps', 'create', [new_id])
         conn.commit()
+        response_cache.invalidate('relief_camps')
+        camp_locator.invalidate()
+        change_feed.notify()
         
         return jsonify({"success": True, "message": "Relief camp added successfully", "camp_id": new_id})
     except Exception as e:
@@ -112,49 +740,55 @@ def add_relief_camp():
         cursor.close()
         conn.close()
 
+@app.route('/api/relief_camps/bulk', methods=['POST'])
+def add_relief_camps_bulk():
+    def after_insert(cursor, inserted):
+        camp_ids = [camp_id for camp_id, _, _ in inserted]
+        geocode(cursor, camp_ids)
+        camp_stats.create(cursor, camp_ids)
+
+    return bulk_insert(
+        RELIEF_CAMPS,
+        after_insert=after_insert,
+        invalidates=['relief_camps'],
+        after_commit=lambda new_ids: camp_locator.invalidate()
+    )
+
 @app.route('/api/relief_camps/<int:camp_id>', methods=['PUT'])
 def update_relief_camp(camp_id):
     data = request.json
+    try:
+        expected = expected_version(request.headers, data)
+        fields = RELIEF_CAMPS.changes(data)
+        latitude, longitude = camp_coordinates(data)
+    except (VersionError, TableError, GeoError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    # New coordinates, or a new location without them (looked up again below)
+    fields.pop('latitude', None)
+    fields.pop('longitude', None)
+    if latitude is not None or 'location' in fields:
+        fields.update(latitude=latitude, longitude=longitude)
+    
+    if not fields:
+        return jsonify({"success": False, "message": "No fields to update"}), 400
     
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Check if camp exists
-        cursor.execute("SELECT * FROM ReliefCamp WHERE camp_id = %s", (camp_id,))
-        if not cursor.fetchone():
-            return jsonify({"success": False, "message": "Camp not found"}), 404
-        
-        # Update the camp
-        update_fields = []
-        update_values = []
-        
-        if 'camp_name' in data:
-            update_fields.append("camp_name = %s")
-            update_values.append(data['camp_name'])
-            
-        if 'location' in data:
-            update_fields.append("location = %s")
-            update_values.append(data['location'])
-            
-        if 'capacity' in data:
-            update_fields.append("capacity = %s")
-            update_values.append(data['capacity'])
-            
-        if 'contact_person' in data:
-            update_fields.append("contact_person = %s")
-            update_values.append(data['contact_person'])
-        
-        if not update_fields:
-            return jsonify({"success": False, "message": "No fields to update"}), 400
-            
-        query = f"UPDATE ReliefCamp SET {', '.join(update_fields)} WHERE camp_id = %s"
-        update_values.append(camp_id)
-        
-        cursor.execute(query, tuple(update_values))
+        # One conditional UPDATE: 404 / 409 when it matched no row
+        outcome, version = RELIEF_CAMPS.update(conn, camp_id, fields, expected)
+        if outcome != versioning.UPDATED:
+            return version_mismatch(outcome, "Camp", version)
+        geocode(cursor, [camp_id])
+        changes.record(cursor, 'relief_camps', 'update', [camp_id])
         conn.commit()
+        response_cache.invalidate('relief_camps', f'relief_camps:{camp_id}', 'relief_camps:names')
+        camp_locator.invalidate()
+        change_feed.notify()
         
-        return jsonify({"success": True, "message": "Relief camp updated successfully"})
+        return jsonify({"success": True, "message": "Relief camp updated successfully", "version": version})
     except Exception as e:
         conn.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
@@ -168,31 +802,21 @@ def delete_relief_camp(camp_id):
     cursor = conn.cursor()
     
     try:
-        # Check if camp exists
-        cursor.execute("SELECT * FROM ReliefCamp WHERE camp_id = %s", (camp_id,))
-        if not cursor.fetchone():
+        # Check the camp exists and has no related records, in one query
+        exists, blocked_by = check_delete(cursor, 'ReliefCamp', 'camp_id', camp_id)
+        if not exists:
             return jsonify({"success": False, "message": "Camp not found"}), 404
+        if blocked_by:
+            return jsonify({"success": False, "message": blocked_by}), 400
         
-        # Check for related records in other tables
-        cursor.execute("SELECT COUNT(*) FROM VictimSurvivor WHERE camp_id = %s", (camp_id,))
-        if cursor.fetchone()[0] > 0:
-            return jsonify({"success": False, "message": "Cannot delete camp with associated victims"}), 400
-            
-        cursor.execute("SELECT COUNT(*) FROM Inventory WHERE camp_id = %s", (camp_id,))
-        if cursor.fetchone()[0] > 0:
-            return jsonify({"success": False, "message": "Cannot delete camp with associated inventory items"}), 400
-            
-        cursor.execute("SELECT COUNT(*) FROM VolunteerAssignment WHERE camp_id = %s", (camp_id,))
-        if cursor.fetchone()[0] > 0:
-            return jsonify({"success": False, "message": "Cannot delete camp with assigned volunteers"}), 400
-            
-        cursor.execute("SELECT COUNT(*) FROM MissingPersonReport WHERE camp_id = %s", (camp_id,))
-        if cursor.fetchone()[0] > 0:
-            return jsonify({"success": False, "message": "Cannot delete camp with associated missing person reports"}), 400
-        
-        # Delete the camp
-        cursor.execute("DELETE FROM ReliefCamp WHERE camp_id = %s", (camp_id,))
+        # Delete the camp and its counters
+        camp_stats.delete(cursor, camp_id)
+        RELIEF_CAMPS.delete(conn, camp_id)
+        changes.record(cursor, 'relief_camps', 'delete', [camp_id])
         conn.commit()
+        response_cache.invalidate('relief_camps', f'relief_camps:{camp_id}')
+        camp_locator.invalidate()
+        change_feed.notify()
         
         return jsonify({"success": True, "message": "Relief camp deleted successfully"})
     except Exception as e:
@@ -203,25 +827,26 @@ def delete_relief_camp(camp_id):
         conn.close()
 
 # Victim Management Routes
+VICTIM_FILTERS = {
+    'camp_id': ("v.camp_id = %s", parse_int),
+    'name_prefix': (("v.first_name LIKE %s", "v.last_name LIKE %s"), like_prefix),
+    'born_from': ("v.date_of_birth >= %s", parse_date),
+    'born_to': ("v.date_of_birth <= %s", parse_date),
+}
+
+VICTIM_QUERY = """
+    SELECT v.*, c.camp_name 
+    FROM VictimSurvivor v 
+    LEFT JOIN ReliefCamp c ON v.camp_id = c.camp_id
+"""
+
 @app.route('/api/victims', methods=['GET'])
 def get_victims():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute("""
-            SELECT v.*, c.camp_name 
-            FROM VictimSurvivor v 
-            LEFT JOIN ReliefCamp c ON v.camp_id = c.camp_id
-        """)
-        victims = cursor.fetchall()
-        result = convert_to_json(victims, cursor)
-        return jsonify({"success": True, "data": result})
-    except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+    return paginated_list(VICTIM_QUERY, "v.victim_id", VICTIM_FILTERS)
+
+@app.route('/api/victims/export', methods=['GET'])
+def export_victims():
+    return stream_export(VICTIM_QUERY, "v.victim_id", VICTIM_FILTERS, "victims")
 
 @app.route('/api/victims/<int:victim_id>', methods=['GET'])
 def get_victim(victim_id):
@@ -255,48 +880,27 @@ def add_victim():
     data = request.json if request.is_json else request.form.to_dict()
     
     # Validate required fields
-    required_fields = ['first_name', 'last_name']
-    for field in required_fields:
-        if field not in data:
-            return jsonify({"success": False, "message": f"Missing required field: {field}"}), 400
+    try:
+        victim = VICTIMS.row(data)
+    except TableError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    # Allocate the new id before taking a connection; the allocator may need one of its own
+    try:
+        new_id = id_allocator.next_id(VICTIMS.name)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
     
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Get max victim_id and increment by 1 for new record
-        cursor.execute("SELECT MAX(victim_id) FROM VictimSurvivor")
-        max_id = cursor.fetchone()[0]
-        new_id = 1 if max_id is None else max_id + 1
-        
-        # Build query based on available data
-        fields = ['victim_id', 'first_name', 'last_name']
-        values = [new_id, data['first_name'], data['last_name']]
-        
-        # Optional fields
-        if 'date_of_birth' in data and data['date_of_birth']:
-            fields.append('date_of_birth')
-            values.append(data['date_of_birth'])
-            
-        if 'contact_no' in data and data['contact_no']:
-            fields.append('contact_no')
-            values.append(data['contact_no'])
-            
-        if 'address' in data and data['address']:
-            fields.append('address')
-            values.append(data['address'])
-            
-        if 'camp_id' in data and data['camp_id']:
-            fields.append('camp_id')
-            values.append(data['camp_id'])
-        
-        # Create placeholders for SQL query
-        placeholders = ', '.join(['%s'] * len(fields))
-        field_names = ', '.join(fields)
-        
-        query = f"INSERT INTO VictimSurvivor ({field_names}) VALUES ({placeholders})"
-        cursor.execute(query, tuple(values))
+        VICTIMS.insert(conn, new_id, victim)
+        camp_stats.adjust(cursor, 'victims', {victim['camp_id']: 1})
+        changes.record(cursor, 'victims', 'create', [new_id])
         conn.commit()
+        victim_index.invalidate(new_id)
+        change_feed.notify()
         
         return jsonify({"success": True, "message": "Victim added successfully", "victim_id": new_id})
     except Exception as e:
@@ -306,57 +910,51 @@ def add_victim():
         cursor.close()
         conn.close()
 
+@app.route('/api/victims/bulk', methods=['POST'])
+def add_victims_bulk():
+    camp_index = VICTIMS.names.index('camp_id')
+    return bulk_insert(
+        VICTIMS,
+        after_insert=lambda cursor, inserted: camp_stats.adjust(
+            cursor, 'victims', Counter(values[camp_index] for _, values, _ in inserted)),
+        after_commit=lambda new_ids: victim_index.invalidate(*new_ids)
+    )
+
 @app.route('/api/victims/<int:victim_id>', methods=['PUT'])
 def update_victim(victim_id):
     data = request.json if request.is_json else request.form.to_dict()
+    try:
+        expected = expected_version(request.headers, data)
+        fields = VICTIMS.changes(data)
+    except (VersionError, TableError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    if not fields:
+        return jsonify({"success": False, "message": "No fields to update"}), 400
     
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Check if victim exists
-        cursor.execute("SELECT * FROM VictimSurvivor WHERE victim_id = %s", (victim_id,))
-        if not cursor.fetchone():
-            return jsonify({"success": False, "message": "Victim not found"}), 404
-        
-        # Update the victim details
-        update_fields = []
-        update_values = []
-        
-        if 'first_name' in data and data['first_name']:
-            update_fields.append("first_name = %s")
-            update_values.append(data['first_name'])
-            
-        if 'last_name' in data and data['last_name']:
-            update_fields.append("last_name = %s")
-            update_values.append(data['last_name'])
-            
-        if 'date_of_birth' in data:
-            update_fields.append("date_of_birth = %s")
-            update_values.append(data['date_of_birth'] if data['date_of_birth'] else None)
-            
-        if 'contact_no' in data:
-            update_fields.append("contact_no = %s")
-            update_values.append(data['contact_no'] if data['contact_no'] else None)
-            
-        if 'address' in data:
-            update_fields.append("address = %s")
-            update_values.append(data['address'] if data['address'] else None)
-            
-        if 'camp_id' in data:
-            update_fields.append("camp_id = %s")
-            update_values.append(data['camp_id'] if data['camp_id'] else None)
-        
-        if not update_fields:
-            return jsonify({"success": False, "message": "No fields to update"}), 400
-            
-        query = f"UPDATE VictimSurvivor SET {', '.join(update_fields)} WHERE victim_id = %s"
-        update_values.append(victim_id)
-        
-        cursor.execute(query, tuple(update_values))
+        # Moving the victim changes camp counters: lock the row and read its
+        # camp first. Other edits are a single conditional UPDATE.
+        moved = 'camp_id' in fields
+        if moved:
+            outcome, victim = VICTIMS.lock(conn, victim_id, expected)
+            if outcome != versioning.UPDATED:
+                return version_mismatch(outcome, "Victim", victim)
+        
+        outcome, version = VICTIMS.update(conn, victim_id, fields, expected)
+        if outcome != versioning.UPDATED:
+            return version_mismatch(outcome, "Victim", version)
+        if moved:
+            camp_stats.move(cursor, 'victims', victim['camp_id'], 1, fields['camp_id'], 1)
+        changes.record(cursor, 'victims', 'update', [victim_id])
         conn.commit()
+        victim_index.invalidate(victim_id)
+        change_feed.notify()
         
-        return jsonify({"success": True, "message": "Victim updated successfully"})
+        return jsonify({"success": True, "message": "Victim updated successfully", "version": version})
     except Exception as e:
         conn.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
@@ -370,19 +968,22 @@ def delete_victim(victim_id):
     cursor = conn.cursor()
     
     try:
-        # Check if victim exists
-        cursor.execute("SELECT * FROM VictimSurvivor WHERE victim_id = %s", (victim_id,))
-        if not cursor.fetchone():
-            return jsonify({"success": False, "message": "Victim not found"}), 404
-        
-        # Check for related records in other tables
-        cursor.execute("SELECT COUNT(*) FROM MissingPersonReport WHERE victim_id = %s", (victim_id,))
-        if cursor.fetchone()[0] > 0:
-            return jsonify({"success": False, "message": "Cannot delete victim with associated missing person reports"}), 400
+        # Lock the victim first: the row may be gone already, and no record
+        # can start referring to it between the dependency check and the delete
+        outcome, victim = VICTIMS.lock(conn, victim_id)
+        if outcome != versioning.UPDATED:
+            return version_mismatch(outcome, "Victim", victim)
+        _, blocked_by = check_delete(cursor, 'VictimSurvivor', 'victim_id', victim_id)
+        if blocked_by:
+            return jsonify({"success": False, "message": blocked_by}), 400
         
         # Delete the victim
-        cursor.execute("DELETE FROM VictimSurvivor WHERE victim_id = %s", (victim_id,))
+        VICTIMS.delete(conn, victim_id)
+        camp_stats.adjust(cursor, 'victims', {victim['camp_id']: -1})
+        changes.record(cursor, 'victims', 'delete', [victim_id])
         conn.commit()
+        victim_index.invalidate(victim_id)
+        change_feed.notify()
         
         return jsonify({"success": True, "message": "Victim deleted successfully"})
     except Exception as e:
@@ -393,25 +994,26 @@ def delete_victim(victim_id):
         conn.close()
 
 # Missing Person Report Routes
+MISSING_PERSON_FILTERS = {
+    'camp_id': ("m.camp_id = %s", parse_int),
+    'name_prefix': ("m.missing_person_name LIKE %s", like_prefix),
+    'date_from': ("m.date_reported >= %s", parse_date),
+    'date_to': ("m.date_reported <= %s", parse_date),
+}
+
+MISSING_PERSON_QUERY = """
+    SELECT m.*, c.camp_name 
+    FROM MissingPersonReport m 
+    LEFT JOIN ReliefCamp c ON m.camp_id = c.camp_id
+"""
+
 @app.route('/api/missing_persons', methods=['GET'])
 def get_missing_persons():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute("""
-            SELECT m.*, c.camp_name 
-            FROM MissingPersonReport m 
-            LEFT JOIN ReliefCamp c ON m.camp_id = c.camp_id
-        """)
-        reports = cursor.fetchall()
-        result = convert_to_json(reports, cursor)
-        return jsonify({"success": True, "data": result})
-    except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+    return paginated_list(MISSING_PERSON_QUERY, "m.report_id", MISSING_PERSON_FILTERS)
+
+@app.route('/api/missing_persons/export', methods=['GET'])
+def export_missing_persons():
+    return stream_export(MISSING_PERSON_QUERY, "m.report_id", MISSING_PERSON_FILTERS, "missing_persons")
 
 @app.route('/api/missing_persons/<int:report_id>', methods=['GET'])
 def get_missing_person(report_id):
@@ -440,48 +1042,92 @@ def get_missing_person(report_id):
         cursor.close()
         conn.close()
 
+# Registered victims who may be the reported person, best match first.
+#   ?age=: approximate age of the missing person (reports do not record one)
+#   ?limit=: number of candidates (default 10), ?min_score=: 0..1
+@app.route('/api/missing_persons/<int:report_id>/matches', methods=['GET'])
+def get_missing_person_matches(report_id):
+    try:
+        age = parse_int(request.args['age']) if request.args.get('age') else None
+        limit = parse_limit(request.args, default=10)
+        min_score = float(request.args.get('min_score', 0))
+    except (PaginationError, ValueError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(
+            "SELECT missing_person_name, last_seen_location, date_reported FROM MissingPersonReport WHERE report_id = %s",
+            (report_id,)
+        )
+        report = cursor.fetchone()
+        if not report:
+            return jsonify({"success": False, "message": "Missing person report not found"}), 404
+        name, location, date_reported = report
+        if isinstance(date_reported, str):
+            date_reported = date.fromisoformat(date_reported)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+    # The index may need a connection of its own, so match after releasing ours
+    try:
+        matches = victim_index.match(name, age=age, location=location, reported_on=date_reported,
+                                     limit=limit, min_score=min_score)
+        victims = {}
+        if matches:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            try:
+                placeholders = ', '.join(['%s'] * len(matches))
+                cursor.execute(VICTIM_QUERY + f" WHERE v.victim_id IN ({placeholders})",
+                               tuple(victim_id for victim_id, _, _ in matches))
+                columns = [column[0] for column in cursor.description]
+                victims = {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
+            finally:
+                cursor.close()
+                conn.close()
+    except PoolTimeout:
+        raise
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    result = []
+    for victim_id, score, components in matches:
+        if victim_id in victims:
+            result.append(dict(victims[victim_id], score=score, score_components=components))
+    return jsonify({"success": True, "data": result})
+
 @app.route('/api/missing_persons', methods=['POST'])
 def add_missing_person():
     data = request.json if request.is_json else request.form.to_dict()
     
-    # Validate required fields
-    required_fields = ['reporter_name', 'missing_person_name', 'last_seen_location', 'contact']
-    for field in required_fields:
-        if field not in data:
-            return jsonify({"success": False, "message": f"Missing required field: {field}"}), 400
+    # Validate required fields (date_reported defaults to today)
+    try:
+        report = MISSING_PERSONS.row(data)
+    except TableError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    # Allocate the new id before taking a connection; the allocator may need one of its own
+    try:
+        new_id = id_allocator.next_id(MISSING_PERSONS.name)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
     
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Get max report_id and increment by 1 for new record
-        cursor.execute("SELECT MAX(report_id) FROM MissingPersonReport")
-        max_id = cursor.fetchone()[0]
-        new_id = 1 if max_id is None else max_id + 1
-        
-        # Get current date if not provided
-        date_reported = data.get('date_reported', date.today().isoformat())
-        
-        # Build query based on available data
-        fields = ['report_id', 'reporter_name', 'missing_person_name', 'last_seen_location', 'date_reported', 'contact']
-        values = [new_id, data['reporter_name'], data['missing_person_name'], data['last_seen_location'], date_reported, data['contact']]
-        
-        # Optional fields
-        if 'camp_id' in data and data['camp_id']:
-            fields.append('camp_id')
-            values.append(data['camp_id'])
-            
-        if 'victim_id' in data and data['victim_id']:
-            fields.append('victim_id')
-            values.append(data['victim_id'])
-        
-        # Create placeholders for SQL query
-        placeholders = ', '.join(['%s'] * len(fields))
-        field_names = ', '.join(fields)
-        
-        query = f"INSERT INTO MissingPersonReport ({field_names}) VALUES ({placeholders})"
-        cursor.execute(query, tuple(values))
+        MISSING_PERSONS.insert(conn, new_id, report)
+        if report['victim_id'] is None:
+            camp_stats.adjust(cursor, 'open_missing_reports', {report['camp_id']: 1})
+        changes.record(cursor, 'missing_persons', 'create', [new_id])
         conn.commit()
+        change_feed.notify()
         
         return jsonify({"success": True, "message": "Missing person report added successfully", "report_id": new_id})
     except Exception as e:
@@ -491,61 +1137,55 @@ def add_missing_person():
         cursor.close()
         conn.close()
 
+@app.route('/api/missing_persons/bulk', methods=['POST'])
+def add_missing_persons_bulk():
+    camp_index = MISSING_PERSONS.names.index('camp_id')
+    linked_index = MISSING_PERSONS.names.index('victim_id')
+    return bulk_insert(
+        MISSING_PERSONS,
+        after_insert=lambda cursor, inserted: camp_stats.adjust(
+            cursor, 'open_missing_reports',
+            Counter(values[camp_index] for _, values, _ in inserted if values[linked_index] is None))
+    )
+
 @app.route('/api/missing_persons/<int:report_id>', methods=['PUT'])
 def update_missing_person(report_id):
     data = request.json if request.is_json else request.form.to_dict()
+    try:
+        expected = expected_version(request.headers, data)
+        fields = MISSING_PERSONS.changes(data)
+    except (VersionError, TableError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    if not fields:
+        return jsonify({"success": False, "message": "No fields to update"}), 400
     
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Check if report exists
-        cursor.execute("SELECT * FROM MissingPersonReport WHERE report_id = %s", (report_id,))
-        if not cursor.fetchone():
-            return jsonify({"success": False, "message": "Missing person report not found"}), 404
-        
-        # Update the report details
-        update_fields = []
-        update_values = []
-        
-        if 'reporter_name' in data and data['reporter_name']:
-            update_fields.append("reporter_name = %s")
-            update_values.append(data['reporter_name'])
-            
-        if 'missing_person_name' in data and data['missing_person_name']:
-            update_fields.append("missing_person_name = %s")
-            update_values.append(data['missing_person_name'])
-            
-        if 'last_seen_location' in data and data['last_seen_location']:
-            update_fields.append("last_seen_location = %s")
-            update_values.append(data['last_seen_location'])
-            
-        if 'date_reported' in data and data['date_reported']:
-            update_fields.append("date_reported = %s")
-            update_values.append(data['date_reported'])
-            
-        if 'contact' in data and data['contact']:
-            update_fields.append("contact = %s")
-            update_values.append(data['contact'])
-            
-        if 'camp_id' in data:
-            update_fields.append("camp_id = %s")
-            update_values.append(data['camp_id'] if data['camp_id'] else None)
-            
-        if 'victim_id' in data:
-            update_fields.append("victim_id = %s")
-            update_values.append(data['victim_id'] if data['victim_id'] else None)
-        
-        if not update_fields:
-            return jsonify({"success": False, "message": "No fields to update"}), 400
-            
-        query = f"UPDATE MissingPersonReport SET {', '.join(update_fields)} WHERE report_id = %s"
-        update_values.append(report_id)
-        
-        cursor.execute(query, tuple(update_values))
+        # Changing the camp or the linked victim moves the open report
+        # counters: lock the row and read both first
+        counted = 'camp_id' in fields or 'victim_id' in fields
+        if counted:
+            outcome, report = MISSING_PERSONS.lock(conn, report_id, expected)
+            if outcome != versioning.UPDATED:
+                return version_mismatch(outcome, "Missing person report", report)
+        
+        outcome, version = MISSING_PERSONS.update(conn, report_id, fields, expected)
+        if outcome != versioning.UPDATED:
+            return version_mismatch(outcome, "Missing person report", version)
+        if counted:
+            new_camp = fields.get('camp_id', report['camp_id'])
+            new_victim = fields.get('victim_id', report['victim_id'])
+            camp_stats.move(cursor, 'open_missing_reports', report['camp_id'], int(not report['victim_id']),
+                            new_camp, int(not new_victim))
+        changes.record(cursor, 'missing_persons', 'update', [report_id])
         conn.commit()
+        change_feed.notify()
         
-        return jsonify({"success": True, "message": "Missing person report updated successfully"})
+        return jsonify({"success": True, "message": "Missing person report updated successfully",
+                        "version": version})
     except Exception as e:
         conn.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
@@ -559,14 +1199,22 @@ def delete_missing_person(report_id):
     cursor = conn.cursor()
     
     try:
-        # Check if report exists
-        cursor.execute("SELECT * FROM MissingPersonReport WHERE report_id = %s", (report_id,))
-        if not cursor.fetchone():
-            return jsonify({"success": False, "message": "Missing person report not found"}), 404
+        # Lock the report first: it may be gone already, and no record can
+        # start referring to it between the dependency check and the delete
+        outcome, report = MISSING_PERSONS.lock(conn, report_id)
+        if outcome != versioning.UPDATED:
+            return version_mismatch(outcome, "Missing person report", report)
+        _, blocked_by = check_delete(cursor, 'MissingPersonReport', 'report_id', report_id)
+        if blocked_by:
+            return jsonify({"success": False, "message": blocked_by}), 400
         
         # Delete the report
-        cursor.execute("DELETE FROM MissingPersonReport WHERE report_id = %s", (report_id,))
+        MISSING_PERSONS.delete(conn, report_id)
+        if not report['victim_id']:
+            camp_stats.adjust(cursor, 'open_missing_reports', {report['camp_id']: -1})
+        changes.record(cursor, 'missing_persons', 'delete', [report_id])
         conn.commit()
+        change_feed.notify()
         
         return jsonify({"success": True, "message": "Missing person report deleted successfully"})
     except Exception as e:
@@ -600,27 +1248,62 @@ def contact_form():
     })
 
 # Inventory Routes
+INVENTORY_FILTERS = {
+    'camp_id': ("i.camp_id = %s", parse_int),
+    'name_prefix': ("i.item_name LIKE %s", like_prefix),
+    'date_from': ("i.date_received >= %s", parse_date),
+    'date_to': ("i.date_received <= %s", parse_date),
+}
+
+INVENTORY_QUERY = """
+    SELECT i.*, c.camp_name 
+    FROM Inventory i 
+    LEFT JOIN ReliefCamp c ON i.camp_id = c.camp_id
+"""
+
 @app.route('/api/inventory', methods=['GET'])
+@response_cache.cached('inventory', 'relief_camps:names')
+@primary_reads
 def get_inventory():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    return paginated_list(INVENTORY_QUERY, "i.item_id", INVENTORY_FILTERS)
+
+# Stock flow, burn rate and days until depletion per camp and item, most
+# urgent first. ?window_days= sets the burn rate window, ?camp_id= filters.
+# Computed from tables reloaded every ANALYTICS_REFRESH seconds, not per request.
+@app.route('/api/inventory/analytics', methods=['GET'])
+@response_cache.cached('inventory', 'inventory:analytics')
+@primary_reads
+def get_inventory_analytics():
     try:
-        cursor.execute("""
-            SELECT i.*, c.camp_name 
-            FROM Inventory i 
-            LEFT JOIN ReliefCamp c ON i.camp_id = c.camp_id
-        """)
-        items = cursor.fetchall()
-        result = convert_to_json(items, cursor)
-        return jsonify({"success": True, "data": result})
+        window_days = parse_int(request.args.get('window_days') or str(DEFAULT_WINDOW_DAYS))
+        if window_days < 1:
+            raise PaginationError("window_days must be a positive integer")
+        camp_id = parse_int(request.args['camp_id']) if request.args.get('camp_id') else None
+        limit = parse_limit(request.args)
+    except PaginationError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    try:
+        result = stock_flow_cache.get(window_days)
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+
+    if camp_id is not None:
+        result = result[result['camp_id'] == camp_id]
+    return jsonify({
+        "success": True,
+        "as_of": date.today().isoformat(),
+        "window_days": window_days,
+        "data": to_records(result.head(limit))
+    })
+
+@app.route('/api/inventory/export', methods=['GET'])
+def export_inventory():
+    return stream_export(INVENTORY_QUERY, "i.item_id", INVENTORY_FILTERS, "inventory")
 
 @app.route('/api/inventory/<int:item_id>', methods=['GET'])
+@response_cache.cached('inventory:{item_id}', 'relief_camps:names')
+@primary_reads
 def get_inventory_item(item_id):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -651,40 +1334,28 @@ def get_inventory_item(item_id):
 def add_inventory_item():
     data = request.json if request.is_json else request.form.to_dict()
     
-    # Validate required fields
-    required_fields = ['item_name', 'quantity']
-    for field in required_fields:
-        if field not in data:
-            return jsonify({"success": False, "message": f"Missing required field: {field}"}), 400
+    # Validate required fields (date_received defaults to today)
+    try:
+        item = INVENTORY.row(data)
+    except TableError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    # Allocate the new id before taking a connection; the allocator may need one of its own
+    try:
+        new_id = id_allocator.next_id(INVENTORY.name)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
     
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Get max item_id and increment by 1 for new record
-        cursor.execute("SELECT MAX(item_id) FROM Inventory")
-        max_id = cursor.fetchone()[0]
-        new_id = 201 if max_id is None else max_id + 1
-        
-        # Get current date if not provided
-        date_received = data.get('date_received', date.today().isoformat())
-        
-        # Build query based on available data
-        fields = ['item_id', 'item_name', 'quantity', 'date_received']
-        values = [new_id, data['item_name'], data['quantity'], date_received]
-        
-        # Optional fields
-        if 'camp_id' in data and data['camp_id']:
-            fields.append('camp_id')
-            values.append(data['camp_id'])
-        
-        # Create placeholders for SQL query
-        placeholders = ', '.join(['%s'] * len(fields))
-        field_names = ', '.join(fields)
-        
-        query = f"INSERT INTO Inventory ({field_names}) VALUES ({placeholders})"
-        cursor.execute(query, tuple(values))
+        INVENTORY.insert(conn, new_id, item)
+        camp_stats.adjust(cursor, 'inventory_units', {item['camp_id']: item['quantity']})
+        changes.record(cursor, 'inventory', 'create', [new_id])
         conn.commit()
+        response_cache.invalidate('inventory')
+        change_feed.notify()
         
         return jsonify({"success": True, "message": "Inventory item added successfully", "item_id": new_id})
     except Exception as e:
@@ -694,49 +1365,56 @@ def add_inventory_item():
         cursor.close()
         conn.close()
 
+@app.route('/api/inventory/bulk', methods=['POST'])
+def add_inventory_items_bulk():
+    return bulk_insert(
+        INVENTORY,
+        after_insert=lambda cursor, inserted: camp_stats.adjust(
+            cursor, 'inventory_units',
+            sum_by_camp(inserted, camp_index=INVENTORY.names.index('camp_id'),
+                        amount_index=INVENTORY.names.index('quantity'))),
+        invalidates=['inventory']
+    )
+
 @app.route('/api/inventory/<int:item_id>', methods=['PUT'])
 def update_inventory_item(item_id):
     data = request.json if request.is_json else request.form.to_dict()
+    try:
+        expected = expected_version(request.headers, data)
+        fields = INVENTORY.changes(data)
+    except (VersionError, TableError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    if not fields:
+        return jsonify({"success": False, "message": "No fields to update"}), 400
     
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Check if item exists
-        cursor.execute("SELECT * FROM Inventory WHERE item_id = %s", (item_id,))
-        if not cursor.fetchone():
-            return jsonify({"success": False, "message": "Inventory item not found"}), 404
-        
-        # Update the item details
-        update_fields = []
-        update_values = []
-        
-        if 'item_name' in data and data['item_name']:
-            update_fields.append("item_name = %s")
-            update_values.append(data['item_name'])
-            
-        if 'quantity' in data and data['quantity']:
-            update_fields.append("quantity = %s")
-            update_values.append(data['quantity'])
-            
-        if 'date_received' in data and data['date_received']:
-            update_fields.append("date_received = %s")
-            update_values.append(data['date_received'])
-            
-        if 'camp_id' in data:
-            update_fields.append("camp_id = %s")
-            update_values.append(data['camp_id'] if data['camp_id'] else None)
-        
-        if not update_fields:
-            return jsonify({"success": False, "message": "No fields to update"}), 400
-            
-        query = f"UPDATE Inventory SET {', '.join(update_fields)} WHERE item_id = %s"
-        update_values.append(item_id)
-        
-        cursor.execute(query, tuple(update_values))
+        # Setting the quantity or camp moves the camp's inventory units: lock
+        # the row and read both first. Stock changes by an amount should use
+        # /adjust, which needs no read at all.
+        counted = 'camp_id' in fields or 'quantity' in fields
+        if counted:
+            outcome, item = INVENTORY.lock(conn, item_id, expected)
+            if outcome != versioning.UPDATED:
+                return version_mismatch(outcome, "Inventory item", item)
+        
+        outcome, version = INVENTORY.update(conn, item_id, fields, expected)
+        if outcome != versioning.UPDATED:
+            return version_mismatch(outcome, "Inventory item", version)
+        if counted:
+            new_camp = fields.get('camp_id', item['camp_id'])
+            new_quantity = fields.get('quantity', item['quantity'])
+            camp_stats.move(cursor, 'inventory_units', item['camp_id'], item['quantity'] or 0,
+                            new_camp, new_quantity or 0)
+        changes.record(cursor, 'inventory', 'update', [item_id])
         conn.commit()
+        response_cache.invalidate('inventory', f'inventory:{item_id}')
+        change_feed.notify()
         
-        return jsonify({"success": True, "message": "Inventory item updated successfully"})
+        return jsonify({"success": True, "message": "Inventory item updated successfully", "version": version})
     except Exception as e:
         conn.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
@@ -744,35 +1422,42 @@ def update_inventory_item(item_id):
         cursor.close()
         conn.close()
 
-@app.route('/api/inventory/<int:item_id>', methods=['DELETE'])
-def delete_inventory_item(item_id):
+# Change stock by a relative amount: {"delta": n}. The quantity is updated in
+# place (quantity = quantity + n) by one UPDATE that refuses to go below zero,
+# so concurrent adjustments never overwrite each other and need no version.
+@app.route('/api/inventory/<int:item_id>/adjust', methods=['POST'])
+def adjust_inventory_item(item_id):
+    data = request.json if request.is_json else request.form.to_dict()
+    try:
+        delta = int(data.get('delta'))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "delta must be an integer"}), 400
+    if delta == 0:
+        return jsonify({"success": False, "message": "delta must not be zero"}), 400
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Check if item exists
-        cursor.execute("SELECT * FROM Inventory WHERE item_id = %s", (item_id,))
-        if not cursor.fetchone():
-            return jsonify({"success": False, "message": "Inventory item not found"}), 404
-        
-        # Check for related records in other tables
-        cursor.execute("SELECT COUNT(*) FROM Donor WHERE item_id = %s", (item_id,))
-        if cursor.fetchone()[0] > 0:
-            return jsonify({"success": False, "message": "Cannot delete item with associated donors"}), 400
-            
-        cursor.execute("SELECT COUNT(*) FROM Donation WHERE item_id = %s", (item_id,))
-        if cursor.fetchone()[0] > 0:
-            return jsonify({"success": False, "message": "Cannot delete item with associated donations"}), 400
-            
-        cursor.execute("SELECT COUNT(*) FROM Supply WHERE item_id = %s", (item_id,))
-        if cursor.fetchone()[0] > 0:
-            return jsonify({"success": False, "message": "Cannot delete item with associated supplies"}), 400
-        
-        # Delete the item
-        cursor.execute("DELETE FROM Inventory WHERE item_id = %s", (item_id,))
+        cursor.execute("""
+            UPDATE Inventory SET quantity = LAST_INSERT_ID(quantity + %s), version = version + 1
+            WHERE item_id = %s AND quantity + %s >= 0
+        """, (delta, item_id, delta))
+        if cursor.rowcount == 0:
+            cursor.execute("SELECT quantity FROM Inventory WHERE item_id = %s", (item_id,))
+            item = cursor.fetchone()
+            if not item:
+                return jsonify({"success": False, "message": "Inventory item not found"}), 404
+            return jsonify({"success": False, "quantity": item[0],
+                            "message": f"Not enough stock: {item[0]} left"}), 409
+        quantity = cursor.lastrowid
+        camp_stats.adjust_owner(cursor, 'inventory_units', 'Inventory', 'item_id', item_id, delta)
+        changes.record(cursor, 'inventory', 'update', [item_id])
         conn.commit()
+        response_cache.invalidate('inventory', f'inventory:{item_id}')
+        change_feed.notify()
         
-        return jsonify({"success": True, "message": "Inventory item deleted successfully"})
+        return jsonify({"success": True, "message": "Inventory adjusted successfully", "quantity": quantity})
     except Exception as e:
         conn.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
@@ -780,24 +1465,62 @@ def delete_inventory_item(item_id):
         cursor.close()
         conn.close()
 
-# Volunteer Routes
-@app.route('/api/volunteers', methods=['GET'])
-def get_volunteers():
+@app.route('/api/inventory/<int:item_id>', methods=['DELETE'])
+def delete_inventory_item(item_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        cursor.execute("SELECT * FROM Volunteer")
-        volunteers = cursor.fetchall()
-        result = convert_to_json(volunteers, cursor)
-        return jsonify({"success": True, "data": result})
+        # Lock the item first: it may be gone already, and no record can start
+        # referring to it between the dependency check and the delete
+        outcome, item = INVENTORY.lock(conn, item_id)
+        if outcome != versioning.UPDATED:
+            return version_mismatch(outcome, "Inventory item", item)
+        _, blocked_by = check_delete(cursor, 'Inventory', 'item_id', item_id)
+        if blocked_by:
+            return jsonify({"success": False, "message": blocked_by}), 400
+        
+        # Delete the item
+        INVENTORY.delete(conn, item_id)
+        camp_stats.adjust(cursor, 'inventory_units', {item['camp_id']: -(item['quantity'] or 0)})
+        changes.record(cursor, 'inventory', 'delete', [item_id])
+        conn.commit()
+        response_cache.invalidate('inventory', f'inventory:{item_id}')
+        change_feed.notify()
+        
+        return jsonify({"success": True, "message": "Inventory item deleted successfully"})
     except Exception as e:
+        conn.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
     finally:
         cursor.close()
         conn.close()
 
+# Volunteer Routes
+VOLUNTEER_FILTERS = {
+    'camp_id': ("EXISTS (SELECT 1 FROM VolunteerAssignment va "
+                "WHERE va.volunteer_id = v.volunteer_id AND va.camp_id = %s)", parse_int),
+    'name_prefix': (("v.first_name LIKE %s", "v.last_name LIKE %s"), like_prefix),
+    'active_on': ("EXISTS (SELECT 1 FROM VolunteerAssignment va "
+                  "WHERE va.volunteer_id = v.volunteer_id AND va.start_date <= %s "
+                  "AND (va.end_date IS NULL OR va.end_date >= %s))", parse_date),
+}
+
+VOLUNTEER_QUERY = "SELECT * FROM Volunteer v"
+
+@app.route('/api/volunteers', methods=['GET'])
+@response_cache.cached('volunteers')
+@primary_reads
+def get_volunteers():
+    return paginated_list(VOLUNTEER_QUERY, "v.volunteer_id", VOLUNTEER_FILTERS)
+
+@app.route('/api/volunteers/export', methods=['GET'])
+def export_volunteers():
+    return stream_export(VOLUNTEER_QUERY, "v.volunteer_id", VOLUNTEER_FILTERS, "volunteers")
+
 @app.route('/api/volunteers/<int:volunteer_id>', methods=['GET'])
+@response_cache.cached('volunteers:{volunteer_id}', 'relief_camps:names')
+@primary_reads
 def get_volunteer(volunteer_id):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -833,54 +1556,38 @@ def get_volunteer(volunteer_id):
 def add_volunteer():
     data = request.json if request.is_json else request.form.to_dict()
     
-    # Validate required fields
-    required_fields = ['first_name', 'last_name', 'contact_number']
-    for field in required_fields:
-        if field not in data:
-            return jsonify({"success": False, "message": f"Missing required field: {field}"}), 400
+    # Validate required fields; a camp_id also assigns the volunteer to that
+    # camp from start_date (default today) to end_date
+    try:
+        volunteer = VOLUNTEERS.row(data)
+    except TableError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    # Allocate the new ids before taking a connection; the allocator may need one of its own
+    try:
+        new_id = id_allocator.next_id(VOLUNTEERS.name)
+        new_assignment_id = None
+        if volunteer['camp_id'] is not None:
+            new_assignment_id = id_allocator.next_id(VOLUNTEER_ASSIGNMENTS.name)
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
     
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Get max volunteer_id and increment by 1 for new record
-        cursor.execute("SELECT MAX(volunteer_id) FROM Volunteer")
-        max_id = cursor.fetchone()[0]
-        new_id = 401 if max_id is None else max_id + 1
-        
-        # Build query based on available data
-        fields = ['volunteer_id', 'first_name', 'last_name', 'contact_number']
-        values = [new_id, data['first_name'], data['last_name'], data['contact_number']]
-        
-        # Optional fields
-        if 'skills' in data and data['skills']:
-            fields.append('skills')
-            values.append(data['skills'])
-        
-        # Create placeholders for SQL query
-        placeholders = ', '.join(['%s'] * len(fields))
-        field_names = ', '.join(fields)
-        
-        query = f"INSERT INTO Volunteer ({field_names}) VALUES ({placeholders})"
-        cursor.execute(query, tuple(values))
+        VOLUNTEERS.insert(conn, new_id, volunteer)
         
         # Add volunteer assignment if provided
-        if 'camp_id' in data and data['camp_id']:
-            # Get max assignment_id
-            cursor.execute("SELECT MAX(assignment_id) FROM VolunteerAssignment")
-            max_assignment_id = cursor.fetchone()[0]
-            new_assignment_id = 101 if max_assignment_id is None else max_assignment_id + 1
-            
-            # Set default dates if not provided
-            start_date = data.get('start_date', date.today().isoformat())
-            end_date = data.get('end_date', None)
-            
-            cursor.execute(
-                "INSERT INTO VolunteerAssignment (assignment_id, volunteer_id, camp_id, start_date, end_date) VALUES (%s, %s, %s, %s, %s)",
-                (new_assignment_id, new_id, data['camp_id'], start_date, end_date)
-            )
+        if new_assignment_id is not None:
+            VOLUNTEER_ASSIGNMENTS.insert(conn, new_assignment_id, {**volunteer, 'volunteer_id': new_id})
+            camp_stats.adjust_active_volunteers(
+                cursor, [(volunteer['camp_id'], volunteer['start_date'], volunteer['end_date'])], 1)
         
+        changes.record(cursor, 'volunteers', 'create', [new_id])
         conn.commit()
+        response_cache.invalidate('volunteers')
+        change_feed.notify()
         
         return jsonify({"success": True, "message": "Volunteer added successfully", "volunteer_id": new_id})
     except Exception as e:
@@ -890,49 +1597,133 @@ def add_volunteer():
         cursor.close()
         conn.close()
 
+@app.route('/api/volunteers/bulk', methods=['POST'])
+def add_volunteers_bulk():
+    camp_index = VOLUNTEERS.names.index('camp_id')
+    assignment_ids = []
+
+    def allocate_assignment_ids(valid):
+        count = sum(1 for _, values, _ in valid if values[camp_index] is not None)
+        if count:
+            assignment_ids.extend(id_allocator.allocate(VOLUNTEER_ASSIGNMENTS.name, count))
+
+    # Rows with a camp_id also get a VolunteerAssignment, as in add_volunteer
+    def insert_assignments(cursor, inserted):
+        assignments = []
+        for volunteer_id, values, _ in inserted:
+            if values[camp_index] is not None:
+                assignments.append((assignment_ids[len(assignments)], volunteer_id,
+                                    values[camp_index], values[camp_index + 1], values[camp_index + 2]))
+        if assignments:
+            VOLUNTEER_ASSIGNMENTS.insert_many(cursor, assignments)
+            camp_stats.adjust_active_volunteers(cursor, [assignment[2:] for assignment in assignments], 1)
+
+    return bulk_insert(
+        VOLUNTEERS,
+        prepare=allocate_assignment_ids,
+        after_insert=insert_assignments,
+        invalidates=['volunteers']
+    )
+
+# MySQL advisory lock held for a whole run (GET_LOCK)
+SCHEDULE_LOCK = 'drm_volunteer_schedule'
+
+# Assign free volunteers to the camps that need them most for a date window.
+# Camp needs come from CampStats (victims per volunteer, minus volunteers
+# already assigned); skills a camp lacks count extra. With "dry_run": true
+# the plan is returned without writing VolunteerAssignment rows.
+@app.route('/api/volunteers/schedule', methods=['POST'])
+def schedule_volunteers():
+    data = (request.json if request.is_json else request.form.to_dict()) or {}
+    try:
+        start_date = to_date(data['start_date']) if data.get('start_date') else date.today().isoformat()
+        end_date = to_date(data['end_date']) if data.get('end_date') else None
+    except ValueError as e:
+        return jsonify({"success": False, "message": f"Invalid date: {e}"}), 400
+    if end_date is not None and end_date < start_date:
+        return jsonify({"success": False, "message": "end_date must not be before start_date"}), 400
+    dry_run = str(data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        # One run at a time: two runs reading the same free volunteers would
+        # both assign them. The lock belongs to the connection, so MySQL drops
+        # it if the process dies mid-run.
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (SCHEDULE_LOCK, Config.SCHEDULE_LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            return jsonify({"success": False,
+                            "message": "Another schedule run is in progress; please try again shortly"}), 409
+        try:
+            return run_schedule(conn, cursor, start_date, end_date, dry_run)
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (SCHEDULE_LOCK,))
+            cursor.fetchone()
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+# Plan and write a schedule while holding the schedule lock, so the volunteers
+# read as free are still free when their assignments are inserted
+def run_schedule(conn, cursor, start_date, end_date, dry_run):
+    problem = scheduler.load_problem(cursor, start_date, end_date)
+    assignments, summary = scheduler.plan(*problem, Config.SCHEDULE_VICTIMS_PER_VOLUNTEER,
+                                          Config.SCHEDULE_SKILL_GAP_BONUS)
+    per_camp = Counter(camp_id for _, camp_id in assignments)
+    result = {
+        "success": True,
+        "start_date": start_date,
+        "end_date": end_date,
+        "dry_run": dry_run,
+        **summary,
+        "camps": [{"camp_id": camp_id, "assigned": count} for camp_id, count in sorted(per_camp.items())]
+    }
+    if dry_run or not assignments:
+        conn.rollback()
+        return jsonify(result)
+
+    # The allocator may need a connection of its own while this one is held;
+    # runs queued on the lock give theirs up after SCHEDULE_LOCK_TIMEOUT
+    assignment_ids = id_allocator.allocate(VOLUNTEER_ASSIGNMENTS.name, len(assignments))
+    rows = [(assignment_id, volunteer_id, camp_id, start_date, end_date)
+            for assignment_id, (volunteer_id, camp_id) in zip(assignment_ids, assignments)]
+    VOLUNTEER_ASSIGNMENTS.insert_many(cursor, rows)
+    camp_stats.adjust_active_volunteers(cursor, [row[2:] for row in rows], 1)
+    changes.record(cursor, 'volunteers', 'update', [row[1] for row in rows])
+    conn.commit()
+    response_cache.invalidate('volunteers', *(f'volunteers:{row[1]}' for row in rows))
+    change_feed.notify()
+    return jsonify(result)
+
 @app.route('/api/volunteers/<int:volunteer_id>', methods=['PUT'])
 def update_volunteer(volunteer_id):
     data = request.json if request.is_json else request.form.to_dict()
+    try:
+        expected = expected_version(request.headers, data)
+        fields = VOLUNTEERS.changes(data)
+    except (VersionError, TableError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
+    if not fields:
+        return jsonify({"success": False, "message": "No fields to update"}), 400
     
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # Check if volunteer exists
-        cursor.execute("SELECT * FROM Volunteer WHERE volunteer_id = %s", (volunteer_id,))
-        if not cursor.fetchone():
-            return jsonify({"success": False, "message": "Volunteer not found"}), 404
-        
-        # Update the volunteer details
-        update_fields = []
-        update_values = []
-        
-        if 'first_name' in data and data['first_name']:
-            update_fields.append("first_name = %s")
-            update_values.append(data['first_name'])
-            
-        if 'last_name' in data and data['last_name']:
-            update_fields.append("last_name = %s")
-            update_values.append(data['last_name'])
-            
-        if 'contact_number' in data and data['contact_number']:
-            update_fields.append("contact_number = %s")
-            update_values.append(data['contact_number'])
-            
-        if 'skills' in data:
-            update_fields.append("skills = %s")
-            update_values.append(data['skills'] if data['skills'] else None)
-        
-        if not update_fields:
-            return jsonify({"success": False, "message": "No fields to update"}), 400
-            
-        query = f"UPDATE Volunteer SET {', '.join(update_fields)} WHERE volunteer_id = %s"
-        update_values.append(volunteer_id)
-        
-        cursor.execute(query, tuple(update_values))
+        outcome, version = VOLUNTEERS.update(conn, volunteer_id, fields, expected)
+        if outcome != versioning.UPDATED:
+            return version_mismatch(outcome, "Volunteer", version)
+        changes.record(cursor, 'volunteers', 'update', [volunteer_id])
         conn.commit()
+        response_cache.invalidate('volunteers', f'volunteers:{volunteer_id}')
+        change_feed.notify()
         
-        return jsonify({"success": True, "message": "Volunteer updated successfully"})
+        return jsonify({"success": True, "message": "Volunteer updated successfully", "version": version})
     except Exception as e:
         conn.rollback()
         return jsonify({"success": False, "message": str(e)}), 500
@@ -947,16 +1738,23 @@ def delete_volunteer(volunteer_id):
     
     try:
         # Check if volunteer exists
-        cursor.execute("SELECT * FROM Volunteer WHERE volunteer_id = %s", (volunteer_id,))
-        if not cursor.fetchone():
+        exists, _ = check_delete(cursor, 'Volunteer', 'volunteer_id', volunteer_id)
+        if not exists:
             return jsonify({"success": False, "message": "Volunteer not found"}), 404
         
         # Delete associated assignments first
+        cursor.execute("SELECT camp_id, start_date, end_date FROM VolunteerAssignment WHERE volunteer_id = %s FOR UPDATE",
+                       (volunteer_id,))
+        assignments = cursor.fetchall()
         cursor.execute("DELETE FROM VolunteerAssignment WHERE volunteer_id = %s", (volunteer_id,))
+        camp_stats.adjust_active_volunteers(cursor, assignments, -1)
         
         # Delete the volunteer
-        cursor.execute("DELETE FROM Volunteer WHERE volunteer_id = %s", (volunteer_id,))
+        VOLUNTEERS.delete(conn, volunteer_id)
+        changes.record(cursor, 'volunteers', 'delete', [volunteer_id])
         conn.commit()
+        response_cache.invalidate('volunteers', f'volunteers:{volunteer_id}')
+        change_feed.notify()
         
         return jsonify({"success": True, "message": "Volunteer deleted successfully"})
     except Exception as e:
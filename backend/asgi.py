@@ -0,0 +1,259 @@
+# ASGI entry point for production serving.
+#
+# The high-volume read routes (victim and missing person lists and details)
+# run as async Quart handlers over an aiomysql pool, so a single worker keeps
+# many queries in flight instead of blocking a thread on each one. Every other
+# route is served by the Flask app in app.py through a WSGI adapter (in
+# hypercorn's thread pool). Camps, inventory and volunteers stay on the Flask
+# side, where the response cache answers most reads without touching MySQL.
+# With DB_REPLICA_HOSTS set, the async reads go to the replicas the Flask
+# app's router has in rotation, under the same read-your-writes rule.
+#
+#   cd backend
+#   hypercorn asgi:application --workers 4 --bind 0.0.0.0:5000
+
+import asyncio
+import hashlib
+import os
+
+import aiomysql
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from quart import Quart, Response, g, request, jsonify
+from quart.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import HTTPException
+
+import app as flask_app
+from config import Config
+from pagination import PaginationError, build_keyset_query, split_page
+from serializer import LIST_SHAPES, dumps, encode_columns, encode_rows
+
+
+# Encode responses with the same serializer as the Flask app
+class JSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return dumps(obj)
+
+
+quart_app = Quart(__name__)
+quart_app.json = JSONProvider(quart_app)
+db_pool = None
+replica_router = flask_app.replica_router
+# Replica (from replica_router) -> aiomysql pool
+replica_pools = {}
+
+
+async def create_pool(host, port=None):
+    options = {"port": port} if port else {}
+    return await aiomysql.create_pool(
+        host=host,
+        user=os.environ.get('DB_USER'),
+        password=os.environ.get('DB_PASSWORD'),
+        db=os.environ.get('DB_NAME'),
+        minsize=Config.ASYNC_DB_POOL_MIN,
+        maxsize=Config.ASYNC_DB_POOL_MAX,
+        pool_recycle=Config.DB_POOL_RECYCLE,
+        autocommit=True,
+        **options
+    )
+
+
+@quart_app.before_serving
+async def open_pool():
+    global db_pool
+    db_pool = await create_pool(os.environ.get('DB_HOST'))
+    for replica in replica_router.replicas:
+        replica_pools[replica] = await create_pool(replica.host, replica.port)
+
+
+@quart_app.after_serving
+async def close_pool():
+    for pool in [db_pool, *replica_pools.values()]:
+        pool.close()
+        await pool.wait_closed()
+
+
+@quart_app.after_request
+async def allow_cors(response):
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
+# ETags and gzip/brotli compression for the async routes, with the Flask
+# app's settings (see compression.py). Range requests are not served here.
+@quart_app.after_request
+async def compress_response(response):
+    compression = flask_app.compression
+    if response.status_code != 200 or not compression.compressible(response.mimetype):
+        return response
+    body = await response.get_data()
+    etag = hashlib.sha1(body).hexdigest()
+    response.set_etag(etag)
+    if request.method in ('GET', 'HEAD') and request.if_none_match.contains_weak(etag):
+        response.status_code = 304
+        response.set_data(b'')
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = compression.negotiate(request.accept_encodings)
+    if encoding is None or len(body) < compression.min_size:
+        return response
+    response.set_data(compression.compress(body, encoding))
+    response.set_etag(etag, weak=True)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+# Rate limits and load shedding for the async routes, counted together with
+# the Flask app's requests (see admission.py)
+@quart_app.before_request
+async def admit_request():
+    admission = flask_app.admission
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    priority, refused = admission.check(request.method, request.path, route, request.remote_addr,
+                                        request.headers, admission.is_continuation(request.method, request.args))
+    if refused is not None:
+        status, message, retry_after = refused
+        response = jsonify({"success": False, "message": message})
+        response.status_code = status
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+    admission.enter(priority)
+    g.admitted = True
+
+
+@quart_app.teardown_request
+async def release_admission(exc):
+    if g.pop('admitted', False):
+        flask_app.admission.leave()
+
+
+class AsyncPoolTimeout(Exception):
+    pass
+
+
+# Replica to read from for this request, or None for the primary. Lag checks
+# run in a thread, as they use the Flask app's synchronous replica pools.
+async def read_replica():
+    if not replica_router.replicas or replica_router.sticky(request.cookies, request.headers):
+        return None
+    if replica_router.check_due():
+        await asyncio.get_running_loop().run_in_executor(None, replica_router.check)
+    return replica_router.pick(check=False)
+
+
+@quart_app.errorhandler(AsyncPoolTimeout)
+async def handle_pool_timeout(e):
+    return jsonify({"success": False, "message": str(e)}), 503
+
+
+async def acquire(pool):
+    try:
+        return await asyncio.wait_for(pool.acquire(), Config.DB_POOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise AsyncPoolTimeout(f"No database connection available within {Config.DB_POOL_TIMEOUT}s")
+
+
+# Run one query and return (columns, rows), rows as dicts with dictionary=True.
+# Waits at most DB_POOL_TIMEOUT seconds for a free connection, like the
+# synchronous pool. Reads from a replica when one is in rotation, falling
+# back to the primary if it cannot be reached.
+async def fetch(query, params, dictionary=False):
+    pool, conn = db_pool, None
+    replica = await read_replica()
+    if replica is not None:
+        try:
+            conn = await acquire(replica_pools[replica])
+            pool = replica_pools[replica]
+        except AsyncPoolTimeout:
+            raise
+        except Exception as e:
+            replica_router.mark_down(replica, e)
+    if conn is None:
+        conn = await acquire(pool)
+    try:
+        async with conn.cursor(aiomysql.DictCursor if dictionary else aiomysql.Cursor) as cursor:
+            await cursor.execute(query, params)
+            rows = await cursor.fetchall()
+            columns = [column[0] for column in cursor.description]
+        return columns, rows
+    finally:
+        pool.release(conn)
+
+
+# Same responses as app.paginated_list, including ?shape=rows and ?shape=columns
+async def paginated_list(base_query, pk, filters):
+    shape = request.args.get('shape', 'objects')
+    if shape not in LIST_SHAPES:
+        return jsonify({"success": False, "message": f"shape must be one of: {', '.join(LIST_SHAPES)}"}), 400
+    try:
+        query, params, limit = build_keyset_query(base_query, pk, filters, request.args)
+    except PaginationError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    try:
+        columns, rows = await fetch(query, params, dictionary=(shape == 'objects'))
+        pk_column = pk.split('.')[-1]
+        if shape != 'objects':
+            rows, next_cursor = split_page(rows, limit, columns.index(pk_column))
+            encode_shape = encode_columns if shape == 'columns' else encode_rows
+            return Response(encode_shape(columns, rows, next_cursor), mimetype='application/json')
+        rows, next_cursor = split_page(rows, limit, pk_column)
+        return jsonify({"success": True, "data": rows, "next_cursor": next_cursor})
+    except AsyncPoolTimeout:
+        raise
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+async def get_one(query, value, not_found):
+    try:
+        columns, rows = await fetch(query, (value,))
+        if not rows:
+            return jsonify({"success": False, "message": not_found}), 404
+        return jsonify({"success": True, "data": dict(zip(columns, rows[0]))})
+    except AsyncPoolTimeout:
+        raise
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+@quart_app.route('/api/victims', methods=['GET'])
+async def get_victims():
+    return await paginated_list(flask_app.VICTIM_QUERY, "v.victim_id", flask_app.VICTIM_FILTERS)
+
+
+@quart_app.route('/api/victims/<int:victim_id>', methods=['GET'])
+async def get_victim(victim_id):
+    return await get_one(flask_app.VICTIM_QUERY + " WHERE v.victim_id = %s",
+                         victim_id, "Victim not found")
+
+
+@quart_app.route('/api/missing_persons', methods=['GET'])
+async def get_missing_persons():
+    return await paginated_list(flask_app.MISSING_PERSON_QUERY, "m.report_id",
+                                flask_app.MISSING_PERSON_FILTERS)
+
+
+@quart_app.route('/api/missing_persons/<int:report_id>', methods=['GET'])
+async def get_missing_person(report_id):
+    return await get_one(flask_app.MISSING_PERSON_QUERY + " WHERE m.report_id = %s",
+                         report_id, "Missing person report not found")
+
+
+wsgi_app = AsyncioWSGIMiddleware(flask_app.app)
+
+
+# Send a request to the async handlers if one matches its path and method,
+# otherwise to the Flask app. CORS preflights (OPTIONS) always go to the Flask
+# app, where flask_cors answers them with the allowed methods and headers.
+# Lifespan events go to Quart so the pool is opened and closed with the worker.
+async def application(scope, receive, send):
+    if scope['type'] == 'http':
+        if scope['method'] == 'OPTIONS':
+            await wsgi_app(scope, receive, send)
+            return
+        try:
+            quart_app.url_map.bind('').match(scope['path'], method=scope['method'])
+        except HTTPException:
+            await wsgi_app(scope, receive, send)
+            return
+    await quart_app(scope, receive, send)
@@ -0,0 +1,117 @@
+# Measure the vectorized inventory analytics (analytics.stock_flow) on large
+# synthetic frames, against a plain per-row Python loop over the same data.
+#
+# By default no database is needed: the frames are generated in memory
+# (10M supply records). With --db the tables are loaded from the database
+# configured in backend/.env instead, and load time is reported separately.
+#
+#   cd backend
+#   python benchmarks/bench_analytics.py --supplies 10000000
+#   python benchmarks/bench_analytics.py --db
+
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import DEFAULT_WINDOW_DAYS, load_frames, stock_flow  # noqa: E402
+
+ITEM_NAMES = ['Rice Bags', 'Water Bottles', 'Medicines', 'Blankets', 'Tents', 'Baby Food',
+              'Clothes', 'Hygiene Kits', 'First Aid Kits', 'Solar Lamps']
+
+
+def synthetic_frames(items, donations, supplies, camps, seed):
+    rng = np.random.default_rng(seed)
+    item_ids = np.arange(1, items + 1)
+    inventory = pd.DataFrame({
+        'item_id': item_ids,
+        'item_name': np.array(ITEM_NAMES, dtype=object)[rng.integers(0, len(ITEM_NAMES), items)],
+        'camp_id': rng.integers(1, camps + 1, items),
+        'quantity': rng.integers(0, 5000, items),
+    })
+    start = np.datetime64(date.today(), 'D') - 365
+
+    def flows(count, date_column):
+        return pd.DataFrame({
+            'item_id': rng.integers(1, items + 1, count),
+            'quantity': rng.integers(1, 200, count),
+            date_column: start + rng.integers(0, 366, count),
+        })
+
+    return inventory, flows(donations, 'date_donated'), flows(supplies, 'date_received')
+
+
+# The same computation written as a loop over rows, as it would be without
+# vectorization
+def per_row(inventory, donations, supplies, window_days=DEFAULT_WINDOW_DAYS):
+    window_start = np.datetime64(date.today(), 'D') - window_days
+    owner = {item_id: (camp_id, name) for item_id, name, camp_id in
+             zip(inventory['item_id'], inventory['item_name'], inventory['camp_id'])}
+    totals = defaultdict(lambda: [0, 0, 0, 0])
+    for item_id, quantity in zip(inventory['item_id'], inventory['quantity']):
+        totals[owner[item_id]][0] += quantity
+    for item_id, quantity in zip(donations['item_id'], donations['quantity']):
+        if item_id in owner:
+            totals[owner[item_id]][1] += quantity
+    for item_id, quantity, received in zip(supplies['item_id'], supplies['quantity'], supplies['date_received']):
+        if item_id in owner:
+            totals[owner[item_id]][2] += quantity
+            if received > window_start:
+                totals[owner[item_id]][3] += quantity
+    return {key: (stock, donated, supplied, stock / (recent / window_days) if recent else None)
+            for key, (stock, donated, supplied, recent) in totals.items()}
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory analytics benchmark")
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--donations', type=int, default=1000000)
+    parser.add_argument('--supplies', type=int, default=10000000)
+    parser.add_argument('--camps', type=int, default=2000)
+    parser.add_argument('--loop-sample', type=int, default=1000000,
+                        help="supply rows run through the per-row loop (time is scaled up)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--db', action='store_true', help="load the frames from the database")
+    args = parser.parse_args()
+
+    if args.db:
+        import app as relief_app
+        conn = relief_app.create_mysql_connection()
+        try:
+            frames, load_time = timed(load_frames, conn)
+        finally:
+            conn.close()
+        print(f"load_frames: {load_time:.2f} s")
+    else:
+        frames, build_time = timed(synthetic_frames, args.items, args.donations, args.supplies,
+                                   args.camps, args.seed)
+        print(f"generated frames in {build_time:.2f} s")
+    inventory, donations, supplies = frames
+    print(f"rows: inventory={len(inventory):,} donations={len(donations):,} supplies={len(supplies):,}")
+
+    result, vector_time = timed(stock_flow, inventory, donations, supplies)
+    print(f"stock_flow (vectorized): {vector_time:.2f} s for {len(result):,} camp/item rows")
+
+    sample = min(args.loop_sample, len(supplies))
+    if sample:
+        _, loop_time = timed(per_row, inventory, donations.head(sample), supplies.head(sample))
+        scale = len(supplies) / sample
+        print(f"per-row loop: {loop_time:.2f} s for {sample:,} supplies "
+              f"(~{loop_time * scale:.1f} s extrapolated to {len(supplies):,})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# Compare read throughput of the Flask development server (python app.py)
+# with the ASGI server (hypercorn asgi:application) side by side.
+#
+# Starts both servers against the database configured in backend/.env, drives
+# the async read routes on each at increasing concurrency and prints requests
+# per second and p95 latency for both.
+#
+#   cd backend
+#   python benchmarks/generate_data.py --scale 0.1      # optional: realistic volumes
+#   python benchmarks/bench_asgi.py --workers 4 --concurrency 16 64 256
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import Client, Scenario, run_scenario, sample_ids  # noqa: E402
+
+
+class NoCounter:
+    def read(self):
+        return None
+
+
+# All benchmark traffic comes from one address at high concurrency: turn off
+# rate limits and load shedding, which would otherwise refuse most of it
+SERVER_ENV = dict(os.environ, RATE_LIMIT_ENABLED='false', SHED_MAX_IN_FLIGHT='0', SHED_MAX_POOL_WAIT='0')
+
+
+def start_server(args, port):
+    process = subprocess.Popen(args, cwd=BACKEND_DIR, env=SERVER_ENV,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    client = Client(f"http://127.0.0.1:{port}")
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if client.request('GET', '/')[0] == 200:
+                return process, client
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise SystemExit(f"Server on port {port} did not start: {' '.join(args)}")
+
+
+def scenarios(client, limit):
+    victim_ids = sample_ids(client, 'victims', 'victim_id')
+    report_ids = sample_ids(client, 'missing_persons', 'report_id')
+    return [
+        Scenario('GET /api/victims', 'GET', lambda n: f"/api/victims?limit={limit}"),
+        Scenario('GET /api/victims/<id>', 'GET',
+                 lambda n: f"/api/victims/{victim_ids[n % len(victim_ids)]}"),
+        Scenario('GET /api/missing_persons', 'GET', lambda n: f"/api/missing_persons?limit={limit}"),
+        Scenario('GET /api/missing_persons/<id>', 'GET',
+                 lambda n: f"/api/missing_persons/{report_ids[n % len(report_ids)]}"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flask vs ASGI read throughput")
+    parser.add_argument('--workers', type=int, default=1, help="hypercorn worker processes")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 64, 256])
+    parser.add_argument('--requests', type=int, default=2000, help="requests per endpoint and level")
+    parser.add_argument('--limit', type=int, default=100, help="page size for the list routes")
+    parser.add_argument('--flask-port', type=int, default=5101)
+    parser.add_argument('--asgi-port', type=int, default=5102)
+    args = parser.parse_args()
+
+    flask_cmd = [sys.executable, '-c',
+                 f"import app; app.app.run(port={args.flask_port}, threaded=True)"]
+    asgi_cmd = [sys.executable, '-m', 'hypercorn', 'asgi:application',
+                '--workers', str(args.workers), '--bind', f"127.0.0.1:{args.asgi_port}"]
+
+    servers = []
+    try:
+        flask_process, flask_client = start_server(flask_cmd, args.flask_port)
+        servers.append(flask_process)
+        asgi_process, asgi_client = start_server(asgi_cmd, args.asgi_port)
+        servers.append(asgi_process)
+
+        counter = NoCounter()
+        print(f"{'endpoint':<32} {'conc':>5} {'flask rps':>10} {'asgi rps':>10} "
+              f"{'flask p95':>10} {'asgi p95':>10} {'errors':>7}")
+        for concurrency in args.concurrency:
+            for flask_scenario, asgi_scenario in zip(scenarios(flask_client, args.limit),
+                                                     scenarios(asgi_client, args.limit)):
+                f = run_scenario(flask_client, flask_scenario, args.requests, concurrency, counter)
+                a = run_scenario(asgi_client, asgi_scenario, args.requests, concurrency, counter)
+                print(f"{flask_scenario.name:<32} {concurrency:>5} {f['throughput_rps']:>10.1f} "
+                      f"{a['throughput_rps']:>10.1f} {f['latency_ms']['p95']:>10.2f} "
+                      f"{a['latency_ms']['p95']:>10.2f} {f['errors'] + a['errors']:>7}")
+    finally:
+        for process in servers:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
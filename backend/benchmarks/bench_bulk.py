@@ -0,0 +1,92 @@
+# Measure bulk intake throughput (rows/second) through POST /api/victims/bulk.
+#
+# Runs the Flask app in-process against the database configured in backend/.env,
+# posts synthetic victims in batches and removes them again afterwards.
+#
+#   cd backend
+#   python benchmarks/bench_bulk.py --rows 100000 --batch 5000
+#   python benchmarks/bench_bulk.py --format csv
+
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as relief_app  # noqa: E402
+import camp_stats  # noqa: E402
+
+# Synthetic rows are tagged through their address so they can be removed again
+SEED_ADDRESS = 'bench-bulk'
+
+
+def make_rows(start, count):
+    return [
+        {'first_name': f"First{n}", 'last_name': f"Last{n}", 'date_of_birth': '1990-01-01',
+         'contact_no': f"9{n:09d}"[:15], 'address': SEED_ADDRESS, 'camp_id': n % 10 + 1}
+        for n in range(start, start + count)
+    ]
+
+
+def to_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def cleanup():
+    conn = relief_app.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM VictimSurvivor WHERE address = %s", (SEED_ADDRESS,))
+        deleted = cursor.rowcount
+        camp_stats.rebuild(cursor)
+        conn.commit()
+        return deleted
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk intake throughput benchmark")
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--batch', type=int, default=5000)
+    parser.add_argument('--format', choices=['json', 'csv'], default='json')
+    parser.add_argument('--keep', action='store_true', help="keep the inserted rows")
+    args = parser.parse_args()
+
+    client = relief_app.app.test_client()
+    inserted = 0
+    request_time = 0.0
+
+    for start in range(0, args.rows, args.batch):
+        rows = make_rows(start, min(args.batch, args.rows - start))
+        if args.format == 'csv':
+            kwargs = {'data': to_csv(rows), 'content_type': 'text/csv'}
+        else:
+            kwargs = {'json': rows}
+
+        started = time.perf_counter()
+        response = client.post('/api/victims/bulk', **kwargs)
+        request_time += time.perf_counter() - started
+
+        if response.status_code != 200:
+            print(f"Batch at row {start} failed: {response.status_code} {response.get_json()}")
+            break
+        inserted += response.get_json()['inserted']
+
+    print(f"{inserted} rows in {request_time:.2f} s -> {inserted / request_time:,.0f} rows/s "
+          f"(batch={args.batch}, format={args.format})")
+
+    if not args.keep:
+        print(f"Removed {cleanup()} rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# Measure bytes on the wire and end-to-end load time of a 100k-row victim list
+# for each response shape (objects, rows, columns) and content encoding
+# (identity, gzip, and brotli when installed). No database needed.
+#
+# Load time = server time (encode + compress) + round trip + transfer at the
+# link's bandwidth + client time (decompress + JSON parse), per link profile:
+#   2g: 280 kbit/s, 800 ms round trip    3g: 1.6 Mbit/s, 300 ms    wifi: 30 Mbit/s, 20 ms
+#
+#   cd backend
+#   python benchmarks/bench_compression.py --rows 100000
+
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import serializer  # noqa: E402
+from bench_serialize import COLUMNS, best_of, make_rows  # noqa: E402
+from compression import Compression, brotli  # noqa: E402
+
+# name -> (bits per second, round trip seconds)
+LINKS = {'2g': (280e3, 0.8), '3g': (1.6e6, 0.3), 'wifi': (30e6, 0.02)}
+
+
+def decompress(body, encoding):
+    if encoding == 'gzip':
+        return zlib.decompress(body, 31)
+    if encoding == 'br':
+        return brotli.decompress(body)
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response compression benchmark")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=5)
+    parser.add_argument('--gzip-level', type=int, default=6)
+    parser.add_argument('--brotli-quality', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.seed)
+    dict_rows = [dict(zip(COLUMNS, row)) for row in rows]
+    compression = Compression(min_size=0, level=args.gzip_level, brotli_quality=args.brotli_quality)
+    shapes = [
+        ('objects', lambda: serializer.encode({"success": True, "data": dict_rows, "next_cursor": None})),
+        ('rows', lambda: serializer.encode_rows(COLUMNS, rows)),
+        ('columns', lambda: serializer.encode_columns(COLUMNS, rows)),
+    ]
+    encodings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+
+    print(f"{args.rows} rows, {serializer.ENCODER} encoder"
+          + ("" if brotli is not None else " (brotli not installed: pip install brotli)"))
+    print(f"{'shape':<8} {'encoding':<9} {'MB':>7} {'ratio':>6} {'server ms':>10} {'client ms':>10}"
+          + ''.join(f" {name + ' s':>8}" for name in LINKS))
+    baseline = None
+    for shape, encode in shapes:
+        encode_time, body = best_of(args.repeat, encode)
+        for encoding in encodings:
+            if encoding == 'identity':
+                compress_time, wire = 0.0, body
+            else:
+                compress_time, wire = best_of(args.repeat, lambda: compression.compress(body, encoding))
+            client_time, _ = best_of(args.repeat, lambda: json.loads(decompress(wire, encoding)))
+            baseline = baseline or len(wire)
+            server_time = encode_time + compress_time
+            loads = [server_time + rtt + len(wire) * 8 / bandwidth + client_time
+                     for bandwidth, rtt in LINKS.values()]
+            print(f"{shape:<8} {encoding:<9} {len(wire) / 1e6:>7.2f} {baseline / len(wire):>5.1f}x "
+                  f"{server_time * 1000:>10.1f} {client_time * 1000:>10.1f}"
+                  + ''.join(f" {seconds:>8.1f}" for seconds in loads))
+
+
+if __name__ == '__main__':
+    main()
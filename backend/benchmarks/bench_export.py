@@ -0,0 +1,131 @@
+# Compare the streaming export endpoints with the old "fetchall + convert_to_json
+# + jsonify" list path on a large table.
+#
+# Runs the Flask app in-process against the database configured in backend/.env
+# and reports, per path, the time to first byte, total time and peak Python
+# memory (tracemalloc).
+#
+#   cd backend
+#   python benchmarks/bench_export.py --seed 1000000      # add 1M synthetic victims
+#   python benchmarks/bench_export.py                     # run the comparison
+#   python benchmarks/bench_export.py --cleanup           # remove the synthetic rows
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify  # noqa: E402
+import app as relief_app  # noqa: E402
+import camp_stats  # noqa: E402
+
+# Synthetic rows are tagged through their address so they can be removed again
+SEED_ADDRESS = 'bench-export'
+
+
+def seed_victims(count, batch_size=10000):
+    conn = relief_app.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COALESCE(MAX(victim_id), 0) FROM VictimSurvivor")
+        next_id = cursor.fetchone()[0] + 1
+        cursor.execute("SELECT camp_id FROM ReliefCamp")
+        camps = [row[0] for row in cursor.fetchall()] or [None]
+
+        for start in range(0, count, batch_size):
+            rows = []
+            for n in range(start, min(start + batch_size, count)):
+                rows.append((next_id + n, f"First{n}", f"Last{n}", '1990-01-01',
+                             f"9{n:09d}"[:15], SEED_ADDRESS, camps[n % len(camps)]))
+            cursor.executemany(
+                "INSERT INTO VictimSurvivor (victim_id, first_name, last_name, date_of_birth, "
+                "contact_no, address, camp_id) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                rows
+            )
+            conn.commit()
+        camp_stats.rebuild(cursor)
+        conn.commit()
+        print(f"Inserted {count} victims")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def cleanup_victims():
+    conn = relief_app.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM VictimSurvivor WHERE address = %s", (SEED_ADDRESS,))
+        deleted = cursor.rowcount
+        camp_stats.rebuild(cursor)
+        conn.commit()
+        print(f"Deleted {deleted} victims")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# The list endpoint as it worked before pagination: one big JSON document
+def legacy_full_list():
+    conn = relief_app.get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(relief_app.VICTIM_QUERY)
+        rows = cursor.fetchall()
+        result = relief_app.convert_to_json(rows, cursor)
+        body = jsonify({"success": True, "data": result}).get_data()
+        return [body]
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def streamed_export(export_format):
+    client = relief_app.app.test_client()
+    response = client.get(f'/api/victims/export?format={export_format}', buffered=False)
+    return response.response
+
+
+def measure(name, make_chunks):
+    tracemalloc.start()
+    started = time.perf_counter()
+    first_byte = None
+    total_bytes = 0
+
+    with relief_app.app.app_context():
+        for chunk in make_chunks():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            total_bytes += len(chunk)
+
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<16} ttfb={first_byte * 1000:9.1f} ms  total={elapsed:7.2f} s  "
+          f"bytes={total_bytes / 1e6:9.1f} MB  peak_mem={peak / 1e6:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming export vs. full list benchmark")
+    parser.add_argument('--seed', type=int, help="insert this many synthetic victims and exit")
+    parser.add_argument('--cleanup', action='store_true', help="delete the synthetic victims and exit")
+    args = parser.parse_args()
+
+    if args.seed:
+        seed_victims(args.seed)
+        return
+    if args.cleanup:
+        cleanup_victims()
+        return
+
+    measure('legacy get_*', legacy_full_list)
+    measure('export ndjson', lambda: streamed_export('ndjson'))
+    measure('export csv', lambda: streamed_export('csv'))
+
+
+if __name__ == '__main__':
+    main()
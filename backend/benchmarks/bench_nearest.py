@@ -0,0 +1,75 @@
+# Measure nearest-camp lookups (geo.KDTree, as used by /api/relief_camps/nearest)
+# on synthetic camps spread over India, against a linear scan of every camp.
+# A share of camps is full, so the free-capacity filter has to skip some.
+# Every KD-tree answer is checked against the scan.
+#
+#   cd backend
+#   python benchmarks/bench_nearest.py --camps 2000 --queries 10000
+#   python benchmarks/bench_nearest.py --camps 100000
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geo import KDTree, to_xyz  # noqa: E402
+
+
+def random_location(rng):
+    return rng.uniform(8.0, 34.0), rng.uniform(69.0, 95.0)
+
+
+def linear_scan(points, free, query, k, min_free):
+    distances = []
+    for position, point in enumerate(points):
+        if free[position] >= min_free:
+            dx, dy, dz = query[0] - point[0], query[1] - point[1], query[2] - point[2]
+            distances.append((dx * dx + dy * dy + dz * dz, position))
+    distances.sort()
+    return distances[:k]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nearest-camp lookup benchmark")
+    parser.add_argument('--camps', type=int, default=2000)
+    parser.add_argument('--queries', type=int, default=10000)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--min-free', type=int, default=1)
+    parser.add_argument('--full', type=float, default=0.3, help="share of camps with no free places")
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    tree = KDTree([to_xyz(*random_location(rng)) for _ in range(args.camps)])
+    print(f"built KD-tree over {args.camps:,} camps in {(time.perf_counter() - started) * 1000:.1f} ms")
+    free = [0 if rng.random() < args.full else rng.randint(1, 500) for _ in range(args.camps)]
+
+    queries = [to_xyz(*random_location(rng)) for _ in range(args.queries)]
+    tree_times, scan_times = [], []
+    for index, query in enumerate(queries):
+        started = time.perf_counter()
+        found = tree.nearest(query, args.k, lambda position: free[position] >= args.min_free)
+        tree_times.append(time.perf_counter() - started)
+        # The scan is slow on large inputs; check a sample of the queries
+        if index < 200:
+            started = time.perf_counter()
+            expected = linear_scan(tree.points, free, query, args.k, args.min_free)
+            scan_times.append(time.perf_counter() - started)
+            if [position for _, position in found] != [position for _, position in expected]:
+                raise SystemExit(f"KD-tree and linear scan disagree for query {index}")
+
+    print(f"KD-tree:     p50 {percentile(tree_times, 0.5) * 1e6:8.1f} us   p99 {percentile(tree_times, 0.99) * 1e6:8.1f} us")
+    print(f"linear scan: p50 {percentile(scan_times, 0.5) * 1e6:8.1f} us   p99 {percentile(scan_times, 0.99) * 1e6:8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
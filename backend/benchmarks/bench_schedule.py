@@ -0,0 +1,107 @@
+# Measure the volunteer scheduler (scheduler.solve) on a synthetic problem:
+# 50k free volunteers in a dozen skill groups and 2k camps with random
+# occupancy and skill coverage, needing more volunteers than there are. The min-cost flow result is compared with a
+# greedy baseline that fills the most valuable (skill, camp) pairs first.
+#
+# With --db the problem is read from the database configured in backend/.env
+# instead (scheduler.load_problem), for the window starting today.
+#
+#   cd backend
+#   python benchmarks/bench_schedule.py --volunteers 50000 --camps 2000
+#   python benchmarks/bench_schedule.py --db
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+import scheduler  # noqa: E402
+
+SKILLS = ['medical assistance', 'food distribution', 'logistics', 'counseling', 'search and rescue',
+          'sanitation support', 'shelter management', 'child care', 'it support', 'transport',
+          scheduler.GENERAL_SKILL]
+
+
+def synthetic_problem(volunteers, camps, seed):
+    rng = np.random.default_rng(seed)
+    weights = np.linspace(2, 1, len(SKILLS))
+    skill_of = rng.choice(len(SKILLS), volunteers, p=weights / weights.sum())
+    pools = {skill: [] for skill in SKILLS}
+    for volunteer_id, skill in enumerate(skill_of, start=1):
+        pools[SKILLS[skill]].append(volunteer_id)
+    capacity = rng.integers(200, 2000, camps)
+    victims = (capacity * rng.uniform(0.1, 1.3, camps)).astype(int)
+    camp_rows = list(zip(range(1, camps + 1), capacity.tolist(), victims.tolist()))
+    covered = {(camp_id, skill): 1 for camp_id in range(1, camps + 1) for skill in SKILLS
+               if rng.random() < 0.3}
+    return {skill: pool for skill, pool in pools.items() if pool}, camp_rows, covered
+
+
+# Fill (skill, camp) pairs in order of value until volunteers or needs run out
+def greedy(supply, need, value):
+    supply, need = np.array(supply), np.array(need)
+    total = 0.0
+    for flat in np.argsort(-value, axis=None):
+        i, j = np.unravel_index(flat, value.shape)
+        amount = min(supply[i], need[j])
+        if amount:
+            supply[i] -= amount
+            need[j] -= amount
+            total += amount * value[i, j]
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Volunteer scheduler benchmark")
+    parser.add_argument('--volunteers', type=int, default=50000)
+    parser.add_argument('--camps', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--db', action='store_true', help="read the problem from the database")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.db:
+        import app as relief_app
+        conn = relief_app.create_mysql_connection()
+        cursor = conn.cursor()
+        try:
+            problem = scheduler.load_problem(cursor, date.today().isoformat(), None)
+        finally:
+            cursor.close()
+            conn.close()
+    else:
+        problem = synthetic_problem(args.volunteers, args.camps, args.seed)
+    print(f"loaded problem in {time.perf_counter() - started:.2f} s")
+
+    assignments, summary = scheduler.plan(*problem, Config.SCHEDULE_VICTIMS_PER_VOLUNTEER,
+                                          Config.SCHEDULE_SKILL_GAP_BONUS)
+    print(f"volunteers={summary['volunteers_available']:,} skill groups={len(problem[0])} "
+          f"camps in need={summary['camps_in_need']:,} volunteers needed={summary['volunteers_needed']:,}")
+    print(f"min-cost flow: {summary['solve_time_ms'] / 1000:.2f} s, assigned {summary['assigned']:,}, "
+          f"objective {summary['objective']:,.1f}")
+
+    # The greedy baseline on the same value matrix
+    volunteers, camps, covered = problem
+    skills = sorted(volunteers)
+    assigned = {}
+    for (camp_id, _), count in covered.items():
+        assigned[camp_id] = assigned.get(camp_id, 0) + count
+    needs = [(camp_id, scheduler.camp_need(victims, assigned.get(camp_id, 0), Config.SCHEDULE_VICTIMS_PER_VOLUNTEER),
+              scheduler.camp_priority(victims, capacity)) for camp_id, capacity, victims in camps]
+    needs = [camp for camp in needs if camp[1] > 0]
+    value = scheduler.assignment_values(skills, [camp[0] for camp in needs], [camp[2] for camp in needs],
+                                        covered, Config.SCHEDULE_SKILL_GAP_BONUS)
+    started = time.perf_counter()
+    baseline = greedy([len(volunteers[skill]) for skill in skills], [camp[1] for camp in needs], value)
+    print(f"greedy baseline: {time.perf_counter() - started:.2f} s, objective {baseline:,.1f} "
+          f"({summary['objective'] / baseline - 1:+.2%} for min-cost flow)" if baseline else "greedy baseline: nothing to assign")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# Measure /api/search latency on a large database.
+#
+# Runs the Flask app in-process against the database configured in backend/.env
+# (load it first, e.g. generate_data.py --victims 1000000). Query terms are
+# sampled from existing rows: surnames, the middle digits of phone numbers and
+# address words. Each kind is timed through /api/search, and once through a
+# LIKE '%term%' scan as a baseline (what filtering the full list amounts to).
+#
+#   cd backend
+#   python benchmarks/generate_data.py --victims 1000000 --missing 200000 --volunteers 100000
+#   python benchmarks/bench_search.py --queries 200
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as relief_app  # noqa: E402
+from search import SEARCH_SOURCES  # noqa: E402
+
+
+def document_count():
+    conn = relief_app.create_mysql_connection()
+    cursor = conn.cursor()
+    try:
+        total = 0
+        for table, *_ in SEARCH_SOURCES.values():
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            total += cursor.fetchone()[0]
+        return total
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# {kind: [search terms]} drawn from random victims
+def sample_terms(count, rng):
+    conn = relief_app.create_mysql_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT MAX(victim_id) FROM VictimSurvivor")
+        max_id = cursor.fetchone()[0] or 0
+        terms = {'surname': [], 'phone digits': [], 'address word': [], 'full name': []}
+        while len(terms['surname']) < count and max_id:
+            cursor.execute(
+                "SELECT first_name, last_name, contact_no, address FROM VictimSurvivor "
+                "WHERE victim_id >= %s ORDER BY victim_id LIMIT 1", (rng.randint(1, max_id),)
+            )
+            row = cursor.fetchone()
+            if not row or not row[1]:
+                continue
+            first_name, last_name, contact_no, address = row
+            terms['surname'].append(last_name)
+            terms['full name'].append(f"{first_name} {last_name}")
+            if contact_no and len(contact_no) >= 8:
+                terms['phone digits'].append(contact_no[3:8])
+            words = [word for word in (address or '').split() if len(word) >= 4]
+            if words:
+                terms['address word'].append(rng.choice(words))
+        return terms
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def like_scan(term):
+    conn = relief_app.create_mysql_connection()
+    cursor = conn.cursor()
+    try:
+        pattern = f"%{term.split()[0]}%"
+        started = time.perf_counter()
+        cursor.execute(
+            "SELECT victim_id FROM VictimSurvivor WHERE first_name LIKE %s OR last_name LIKE %s "
+            "OR contact_no LIKE %s OR address LIKE %s LIMIT 100", (pattern,) * 4
+        )
+        cursor.fetchall()
+        return time.perf_counter() - started
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search latency benchmark")
+    parser.add_argument('--queries', type=int, default=200, help="queries per kind")
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"Indexed documents: {document_count():,}")
+    client = relief_app.app.test_client()
+
+    print(f"{'query kind':<14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'avg hits':>9} {'LIKE scan ms':>13}")
+    for kind, terms in sample_terms(args.queries, rng).items():
+        if not terms:
+            continue
+        latencies = []
+        hits = 0
+        for term in terms:
+            started = time.perf_counter()
+            response = client.get('/api/search', query_string={'q': term, 'limit': args.limit})
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise SystemExit(f"/api/search?q={term} failed: {response.get_json()}")
+            hits += len(response.get_json()['data'])
+        scan = like_scan(terms[0])
+        print(f"{kind:<14} {percentile(latencies, 0.5) * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} "
+              f"{percentile(latencies, 0.99) * 1000:>8.1f} {hits / len(terms):>9.1f} {scan * 1000:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
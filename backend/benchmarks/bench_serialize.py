@@ -0,0 +1,84 @@
+# Measure encoding a 100k-row list response (victim-shaped rows with dates and
+# decimals) along the serialization paths:
+#   before: tuple rows zipped into dicts, encoded by Flask's stock provider
+#   objects: rows from a dictionary cursor, encoded by serializer.encode()
+#   rows: tuple rows in the ?shape=rows layout (serializer.encode_rows())
+# each with orjson and with the standard library encoder. No database needed.
+#
+#   cd backend
+#   python benchmarks/bench_serialize.py --rows 100000
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+import serializer  # noqa: E402
+
+COLUMNS = ['victim_id', 'first_name', 'last_name', 'date_of_birth', 'contact_no', 'address',
+           'camp_id', 'camp_name', 'latitude']
+NAMES = ['Amit', 'Priya', 'Rahul', 'Sneha', 'Vikram', 'Anjali', 'Sharma', 'Singh', 'Patel', 'Das']
+CITIES = ['New Delhi', 'Mumbai', 'Kolkata', 'Chennai', 'Guwahati', 'Patna']
+
+
+def make_rows(count, seed):
+    rng = random.Random(seed)
+    start = date(1940, 1, 1)
+    return [(victim_id, rng.choice(NAMES), rng.choice(NAMES), start + timedelta(days=rng.randrange(30000)),
+             f"9{rng.randrange(10 ** 9):09d}", f"{rng.randrange(1, 999)} Main Road, {rng.choice(CITIES)}",
+             rng.randrange(1, 2000), f"{rng.choice(CITIES)} Relief Camp", Decimal(f"{rng.uniform(8, 34):.6f}"))
+            for victim_id in range(1, count + 1)]
+
+
+def best_of(repeat, function):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization benchmark")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.seed)
+    dict_rows = [dict(zip(COLUMNS, row)) for row in rows]  # as a dictionary cursor returns them
+    stock = DefaultJSONProvider(Flask(__name__))
+
+    paths = [('before: zip + Flask json', None,
+              lambda: stock.dumps({"success": True, "data": [dict(zip(COLUMNS, row)) for row in rows],
+                                   "next_cursor": None}).encode())]
+    encoders = ['orjson', 'json'] if serializer.orjson is not None else ['json']
+    for encoder in encoders:
+        paths.append((f"objects ({encoder})", encoder,
+                      lambda: serializer.encode({"success": True, "data": dict_rows, "next_cursor": None})))
+        paths.append((f"zip + objects ({encoder})", encoder,
+                      lambda: serializer.encode({"success": True, "data": serializer.rows_to_dicts(rows, COLUMNS),
+                                                 "next_cursor": None})))
+        paths.append((f"rows shape ({encoder})", encoder, lambda: serializer.encode_rows(COLUMNS, rows)))
+
+    print(f"{'path':<28} {'ms':>9} {'MB':>7} {'vs before':>10}")
+    baseline = None
+    for name, encoder, function in paths:
+        if encoder:
+            serializer.use_encoder(encoder)
+        seconds, body = best_of(args.repeat, function)
+        baseline = baseline or seconds
+        print(f"{name:<28} {seconds * 1000:>9.1f} {len(body) / 1e6:>7.2f} {baseline / seconds:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
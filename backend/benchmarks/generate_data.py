@@ -0,0 +1,266 @@
+# Reproducible synthetic data generator for load testing.
+#
+# Fills all nine tables to the requested sizes with realistic foreign key
+# distributions: a few large camps hold most victims (Zipf-like), most victims
+# are housed in a camp, a share of missing person reports is linked to a
+# registered victim, and so on. The same --seed always produces the same data.
+#
+#   cd backend
+#   python benchmarks/generate_data.py --victims 1000000 --inventory 100000
+#   python benchmarks/generate_data.py --scale 0.01 --reset    # wipe tables first
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_mysql_connection, ID_SEQUENCES  # noqa: E402
+import camp_stats  # noqa: E402
+from geo import geocode  # noqa: E402
+
+BATCH_SIZE = 5000
+
+# Table sizes at --scale 1
+DEFAULT_SIZES = {
+    'camps': 2000,
+    'victims': 1000000,
+    'inventory': 100000,
+    'donors': 20000,
+    'donations': 200000,
+    'supplies': 500000,
+    'volunteers': 50000,
+    'assignments': 100000,
+    'missing': 100000,
+}
+
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Amit', 'Anil', 'Anita', 'Arjun', 'Asha', 'Deepa', 'Divya', 'Ganesh',
+    'Gita', 'Harish', 'Kavita', 'Kiran', 'Lakshmi', 'Manoj', 'Meena', 'Mohan', 'Neha', 'Pooja',
+    'Priya', 'Rahul', 'Rajesh', 'Ramesh', 'Ravi', 'Rekha', 'Sanjay', 'Sita', 'Sunil', 'Sunita',
+    'Suresh', 'Usha', 'Vijay', 'Vikram', 'Vikash', 'Yash', 'Zara', 'Farhan', 'Imran', 'Ayesha',
+]
+LAST_NAMES = [
+    'Sharma', 'Verma', 'Singh', 'Kumar', 'Das', 'Yadav', 'Mishra', 'Nair', 'Patil', 'Menon',
+    'Gupta', 'Reddy', 'Iyer', 'Khan', 'Joshi', 'Mehta', 'Shah', 'Chopra', 'Bose', 'Pillai',
+    'Rao', 'Naidu', 'Ghosh', 'Banerjee', 'Sinha', 'Pandey', 'Tiwari', 'Chauhan', 'Kaur', 'Ali',
+]
+CITIES = [
+    'New Delhi', 'Mumbai', 'Kolkata', 'Chennai', 'Guwahati', 'Patna', 'Dehradun', 'Jaipur',
+    'Bhubaneswar', 'Thiruvananthapuram', 'Hyderabad', 'Bengaluru', 'Ahmedabad', 'Pune', 'Lucknow',
+    'Bhopal', 'Ranchi', 'Raipur', 'Shimla', 'Srinagar', 'Visakhapatnam', 'Kochi', 'Surat', 'Nagpur',
+]
+DISASTERS = ['Flood Relief Camp', 'Cyclone Shelter', 'Earthquake Relief', 'Landslide Shelter',
+             'Drought Relief', 'Tsunami Shelter', 'Monsoon Relief']
+ITEMS = ['Rice Bags', 'Wheat Flour', 'Medicines', 'Water Bottles', 'Blankets', 'Dry Food Packets',
+         'First Aid Kits', 'Baby Food', 'Cooked Meals', 'Sanitary Kits', 'Tarpaulins', 'Tents',
+         'Clothes', 'Solar Lamps', 'Mosquito Nets', 'ORS Packets', 'Blood Units', 'Torches']
+SKILLS = ['Medical Assistance', 'Food Distribution', 'Logistics', 'Counseling', 'Search and Rescue',
+          'Sanitation Support', 'Shelter Management', 'Child Care', 'IT Support', 'Transport']
+DONORS = ['Foundation', 'Trust', 'NGO', 'CSR', 'Relief Fund', 'Charitable Society']
+
+
+def phone(rng):
+    return str(rng.randint(6000000000, 9999999999))
+
+
+def random_date(rng, start, days):
+    return start + timedelta(days=rng.randrange(days))
+
+
+# Cumulative Zipf-like weights: a handful of large camps, a long tail of small ones
+def zipf_weights(count, exponent=0.8):
+    total = 0.0
+    cumulative = []
+    for rank in range(1, count + 1):
+        total += 1.0 / rank ** exponent
+        cumulative.append(total)
+    return cumulative
+
+
+class Generator:
+    def __init__(self, conn, rng, sizes):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.rng = rng
+        self.sizes = sizes
+        self.today = date.today()
+
+    def next_id(self, table, pk):
+        self.cursor.execute(f"SELECT COALESCE(MAX({pk}), 0) + 1 FROM {table}")
+        return self.cursor.fetchone()[0]
+
+    def insert(self, table, columns, rows):
+        placeholders = ', '.join(['%s'] * len(columns))
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == BATCH_SIZE:
+                self.cursor.executemany(query, batch)
+                self.conn.commit()
+                count += len(batch)
+                batch = []
+        if batch:
+            self.cursor.executemany(query, batch)
+            self.conn.commit()
+            count += len(batch)
+        return count
+
+    def run(self):
+        rng = self.rng
+        sizes = self.sizes
+        timings = {}
+
+        def timed(name, table, columns, rows):
+            started = time.perf_counter()
+            count = self.insert(table, columns, rows)
+            timings[name] = (count, time.perf_counter() - started)
+            print(f"{table:<22} {count:>10,} rows in {timings[name][1]:6.1f} s")
+
+        # Relief camps
+        first = self.next_id('ReliefCamp', 'camp_id')
+        camp_ids = list(range(first, first + sizes['camps']))
+        timed('camps', 'ReliefCamp', ['camp_id', 'camp_name', 'location', 'capacity', 'contact_person'], (
+            (camp_id, f"{rng.choice(CITIES)} {rng.choice(DISASTERS)} {camp_id}", rng.choice(CITIES),
+             rng.choice([200, 300, 350, 400, 450, 500, 600, 800, 1000, 2000]),
+             f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}")
+            for camp_id in camp_ids))
+        camp_weights = zipf_weights(len(camp_ids))
+
+        def pick_camp():
+            return rng.choices(camp_ids, cum_weights=camp_weights)[0]
+
+        # Victims: 85% housed in a camp
+        first = self.next_id('VictimSurvivor', 'victim_id')
+        victim_ids = range(first, first + sizes['victims'])
+        victim_camps = {}
+
+        def victims():
+            for victim_id in victim_ids:
+                camp_id = pick_camp() if rng.random() < 0.85 else None
+                if camp_id is not None and rng.random() < 0.3:
+                    victim_camps[victim_id] = camp_id
+                yield (victim_id, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                       random_date(rng, date(1935, 1, 1), 365 * 88), phone(rng), rng.choice(CITIES), camp_id)
+        timed('victims', 'VictimSurvivor',
+              ['victim_id', 'first_name', 'last_name', 'date_of_birth', 'contact_no', 'address', 'camp_id'],
+              victims())
+
+        # Inventory, mostly held at the busier camps
+        first = self.next_id('Inventory', 'item_id')
+        item_ids = list(range(first, first + sizes['inventory']))
+        timed('inventory', 'Inventory', ['item_id', 'item_name', 'camp_id', 'quantity', 'date_received'], (
+            (item_id, rng.choice(ITEMS), pick_camp(), rng.randint(10, 2000),
+             random_date(rng, self.today - timedelta(days=180), 180))
+            for item_id in item_ids))
+
+        # Donors and their donations
+        first = self.next_id('Donor', 'donor_id')
+        donor_ids = list(range(first, first + sizes['donors']))
+        timed('donors', 'Donor', ['donor_id', 'donor_name', 'item_id', 'quantity', 'date_donated'], (
+            (donor_id, f"{rng.choice(LAST_NAMES)} {rng.choice(DONORS)}", rng.choice(item_ids),
+             rng.randint(10, 1000), random_date(rng, self.today - timedelta(days=180), 180))
+            for donor_id in donor_ids))
+
+        first = self.next_id('Donation', 'donation_id')
+        timed('donations', 'Donation', ['donation_id', 'donor_id', 'item_id', 'quantity', 'date_donated'], (
+            (donation_id, rng.choice(donor_ids), rng.choice(item_ids), rng.randint(1, 500),
+             random_date(rng, self.today - timedelta(days=180), 180))
+            for donation_id in range(first, first + sizes['donations'])))
+
+        # Supplies sent out to camps
+        first = self.next_id('Supply', 'supply_id')
+        timed('supplies', 'Supply', ['supply_id', 'item_id', 'camp_id', 'quantity', 'date_received'], (
+            (supply_id, rng.choice(item_ids), pick_camp(), rng.randint(1, 200),
+             random_date(rng, self.today - timedelta(days=180), 180))
+            for supply_id in range(first, first + sizes['supplies'])))
+
+        # Volunteers and assignments (a third are still ongoing)
+        first = self.next_id('Volunteer', 'volunteer_id')
+        volunteer_ids = list(range(first, first + sizes['volunteers']))
+        timed('volunteers', 'Volunteer', ['volunteer_id', 'first_name', 'last_name', 'contact_number', 'skills'], (
+            (volunteer_id, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), phone(rng),
+             ', '.join(rng.sample(SKILLS, rng.randint(1, 3))))
+            for volunteer_id in volunteer_ids))
+
+        def assignments():
+            for assignment_id in range(first_assignment, first_assignment + sizes['assignments']):
+                start = random_date(rng, self.today - timedelta(days=120), 120)
+                end = None if rng.random() < 0.33 else start + timedelta(days=rng.randint(3, 30))
+                yield (assignment_id, rng.choice(volunteer_ids), pick_camp(), start, end)
+        first_assignment = self.next_id('VolunteerAssignment', 'assignment_id')
+        timed('assignments', 'VolunteerAssignment',
+              ['assignment_id', 'volunteer_id', 'camp_id', 'start_date', 'end_date'], assignments())
+
+        # Missing person reports; some were found among the registered victims
+        linked = list(victim_camps.items())
+
+        def reports():
+            for report_id in range(first_report, first_report + sizes['missing']):
+                victim_id, camp_id = (None, None)
+                if linked and rng.random() < 0.3:
+                    victim_id, camp_id = rng.choice(linked)
+                yield (report_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                       f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", rng.choice(CITIES),
+                       random_date(rng, self.today - timedelta(days=90), 90), phone(rng), camp_id, victim_id)
+        first_report = self.next_id('MissingPersonReport', 'report_id')
+        timed('missing', 'MissingPersonReport',
+              ['report_id', 'reporter_name', 'missing_person_name', 'last_seen_location', 'date_reported',
+               'contact', 'camp_id', 'victim_id'], reports())
+
+        self.sync_sequences()
+        geocode(self.cursor)
+        camp_stats.rebuild(self.cursor)
+        self.conn.commit()
+        return timings
+
+    # Move the id sequences past the generated rows so the API keeps working
+    def sync_sequences(self):
+        for name, (table, pk, first_id) in ID_SEQUENCES.items():
+            self.cursor.execute(
+                f"UPDATE IdSequence SET next_id = GREATEST(next_id, "
+                f"(SELECT COALESCE(MAX({pk}) + 1, %s) FROM {table})) WHERE name = %s",
+                (first_id, name)
+            )
+        self.conn.commit()
+
+    def reset(self):
+        for table in ['CampStats', 'MissingPersonReport', 'VolunteerAssignment', 'Volunteer', 'Supply',
+                      'Donation', 'Donor', 'Inventory', 'VictimSurvivor', 'ReliefCamp']:
+            self.cursor.execute(f"DELETE FROM {table}")
+        self.conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic disaster relief data generator")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--scale', type=float, default=1.0, help="multiplier for the default table sizes")
+    for name, size in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{name}", type=int, help=f"rows to generate (default {size} x scale)")
+    parser.add_argument('--reset', action='store_true', help="delete all existing rows first")
+    args = parser.parse_args()
+
+    sizes = {}
+    for name, size in DEFAULT_SIZES.items():
+        explicit = getattr(args, name)
+        sizes[name] = explicit if explicit is not None else max(1, int(size * args.scale))
+
+    conn = create_mysql_connection()
+    try:
+        generator = Generator(conn, random.Random(args.seed), sizes)
+        if args.reset:
+            generator.reset()
+        started = time.perf_counter()
+        generator.run()
+        print(f"Done in {time.perf_counter() - started:.1f} s")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
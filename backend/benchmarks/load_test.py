@@ -0,0 +1,356 @@
+# Load test harness for the API.
+#
+# Drives every route of a running server at the requested concurrency and
+# reports p50/p95/p99 latency, throughput and (when the database is reachable)
+# the number of SQL statements per request for each endpoint. Results are
+# written as JSON so runs can be compared across commits.
+#
+#   cd backend
+#   python benchmarks/generate_data.py --scale 0.1      # optional: realistic volumes
+#   python app.py &
+#   python benchmarks/load_test.py --concurrency 32 --requests 500 --output results/head.json
+#   python benchmarks/load_test.py --compare results/base.json results/head.json
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Scenario:
+    # path and body are callables taking the request number, so every request
+    # can target a different record.
+    # records: list of ids created by an earlier scenario that this one needs;
+    # with once_per_record the scenario sends exactly one request per id.
+    def __init__(self, name, method, path, body=None, on_response=None, group='read',
+                 records=None, once_per_record=False):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.on_response = on_response
+        self.group = group
+        self.records = records
+        self.once_per_record = once_per_record
+
+
+class Client:
+    def __init__(self, base_url):
+        url = urlparse(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self._local = threading.local()
+
+    # One keep-alive connection per worker thread
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=120)
+            self._local.conn = conn
+        return conn
+
+    def request(self, method, path, body=None):
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                return response.status, data
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+
+# Counts statements the MySQL server has executed (Questions status variable)
+class QueryCounter:
+    def __init__(self):
+        try:
+            from app import create_mysql_connection
+            self.conn = create_mysql_connection()
+        except Exception as e:
+            print(f"Query counts disabled (cannot reach the database: {e})")
+            self.conn = None
+
+    def read(self):
+        if self.conn is None:
+            return None
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+            return int(cursor.fetchone()[1])
+        finally:
+            cursor.close()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(client, scenario, requests, concurrency, counter):
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    next_request = iter(range(requests))
+
+    def worker():
+        while True:
+            with lock:
+                n = next(next_request, None)
+            if n is None:
+                return
+            body = scenario.body(n) if scenario.body else None
+            started = time.perf_counter()
+            try:
+                status, data = client.request(scenario.method, scenario.path(n), body)
+            except Exception:
+                status, data = 'error', b''
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if scenario.on_response and status in (200, 207):
+                scenario.on_response(n, json.loads(data))
+
+    before = counter.read()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(min(concurrency, requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    after = counter.read()
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not status.startswith(('2', '3')))
+    result = {
+        'method': scenario.method,
+        'group': scenario.group,
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'status_counts': statuses,
+        'throughput_rps': round(requests / wall, 2),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+            'mean': round(sum(latencies) / len(latencies) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3),
+        },
+        'db_queries_per_request': None,
+    }
+    if before is not None and after is not None:
+        # The SHOW STATUS call itself counts as one statement
+        result['db_queries_per_request'] = round((after - before - 1) / requests, 2)
+    return result
+
+
+# Pick existing ids to read from the first pages of the list endpoints
+def sample_ids(client, resource, pk, count=200):
+    status, data = client.request('GET', f"/api/{resource}?limit={count}")
+    if status != 200:
+        raise SystemExit(f"GET /api/{resource} failed with {status}: is the server running?")
+    ids = [row[pk] for row in json.loads(data)['data']]
+    if not ids:
+        raise SystemExit(f"/api/{resource} is empty; load the seed data or run generate_data.py first")
+    return ids
+
+
+# Create/update/delete scenarios for one resource. Records created by POST are
+# updated and then deleted again, so a run leaves the database as it found it.
+def write_scenarios(resource, pk, make_body, make_update):
+    created = []
+    lock = threading.Lock()
+
+    def remember(n, data):
+        with lock:
+            created.append(data[pk])
+
+    def remember_bulk(n, data):
+        with lock:
+            created.extend(result[pk] for result in data['results'] if result['success'])
+
+    def created_id(n):
+        return created[n % len(created)]
+
+    return [
+        Scenario(f"POST /api/{resource}", 'POST', lambda n: f"/api/{resource}",
+                 body=make_body, on_response=remember, group='write'),
+        Scenario(f"POST /api/{resource}/bulk", 'POST', lambda n: f"/api/{resource}/bulk",
+                 body=lambda n: [make_body(n * 100 + i) for i in range(100)],
+                 on_response=remember_bulk, group='write'),
+        Scenario(f"PUT /api/{resource}/<id>", 'PUT', lambda n: f"/api/{resource}/{created_id(n)}",
+                 body=make_update, group='write', records=created),
+        # Deleting is measured too and doubles as the clean-up
+        Scenario(f"DELETE /api/{resource}/<id>", 'DELETE', lambda n: f"/api/{resource}/{created[n]}",
+                 group='write', records=created, once_per_record=True),
+    ]
+
+
+def build_scenarios(client, include_exports):
+    rng = random.Random(7)
+    camps = sample_ids(client, 'relief_camps', 'camp_id')
+    victims = sample_ids(client, 'victims', 'victim_id')
+    reports = sample_ids(client, 'missing_persons', 'report_id')
+    items = sample_ids(client, 'inventory', 'item_id')
+    volunteers = sample_ids(client, 'volunteers', 'volunteer_id')
+
+    def pick(ids):
+        return lambda n: ids[n % len(ids)]
+
+    camp = pick(camps)
+    scenarios = [
+        Scenario("GET /", 'GET', lambda n: '/'),
+        Scenario("GET /api/relief_camps", 'GET', lambda n: '/api/relief_camps'),
+        Scenario("GET /api/relief_camps?name_prefix=", 'GET',
+                 lambda n: f"/api/relief_camps?name_prefix={rng.choice('ABCDKMPR')}"),
+        Scenario("GET /api/relief_camps/<id>", 'GET', lambda n: f"/api/relief_camps/{camp(n)}"),
+        Scenario("GET /api/relief_camps/stats", 'GET', lambda n: '/api/relief_camps/stats'),
+        Scenario("GET /api/victims", 'GET', lambda n: '/api/victims'),
+        Scenario("GET /api/victims?cursor=", 'GET', lambda n: f"/api/victims?cursor={victims[n % len(victims)]}"),
+        Scenario("GET /api/victims?camp_id=", 'GET', lambda n: f"/api/victims?camp_id={camp(n)}"),
+        Scenario("GET /api/victims?name_prefix=", 'GET',
+                 lambda n: f"/api/victims?name_prefix={rng.choice('ADKMPRSV')}"),
+        Scenario("GET /api/victims/<id>", 'GET', lambda n: f"/api/victims/{pick(victims)(n)}"),
+        Scenario("GET /api/missing_persons", 'GET', lambda n: '/api/missing_persons'),
+        Scenario("GET /api/missing_persons?camp_id=", 'GET', lambda n: f"/api/missing_persons?camp_id={camp(n)}"),
+        Scenario("GET /api/missing_persons/<id>", 'GET', lambda n: f"/api/missing_persons/{pick(reports)(n)}"),
+        Scenario("GET /api/inventory", 'GET', lambda n: '/api/inventory'),
+        Scenario("GET /api/inventory?camp_id=", 'GET', lambda n: f"/api/inventory?camp_id={camp(n)}"),
+        Scenario("GET /api/inventory/<id>", 'GET', lambda n: f"/api/inventory/{pick(items)(n)}"),
+        Scenario("GET /api/volunteers", 'GET', lambda n: '/api/volunteers'),
+        Scenario("GET /api/volunteers?camp_id=", 'GET', lambda n: f"/api/volunteers?camp_id={camp(n)}"),
+        Scenario("GET /api/volunteers/<id>", 'GET', lambda n: f"/api/volunteers/{pick(volunteers)(n)}"),
+        Scenario("GET /api/pool_stats", 'GET', lambda n: '/api/pool_stats'),
+        Scenario("GET /api/cache_stats", 'GET', lambda n: '/api/cache_stats'),
+        Scenario("POST /api/contact", 'POST', lambda n: '/api/contact', group='write',
+                 body=lambda n: {'name': 'Load Test', 'email': 'load@test', 'subject': 'x', 'message': 'y'}),
+    ]
+
+    if include_exports:
+        for resource in ['relief_camps', 'victims', 'missing_persons', 'inventory', 'volunteers']:
+            scenarios.append(Scenario(f"GET /api/{resource}/export", 'GET',
+                                      lambda n, r=resource: f"/api/{r}/export", group='export'))
+
+    write_specs = [
+        ('relief_camps', 'camp_id',
+         lambda n: {'camp_name': f"Load Test Camp {n}", 'location': 'Load Test', 'capacity': 100,
+                    'contact_person': 'Load Test'},
+         lambda n: {'capacity': 100 + n % 50}),
+        ('victims', 'victim_id',
+         lambda n: {'first_name': f"Load{n}", 'last_name': 'Test', 'address': 'Load Test', 'camp_id': camp(n)},
+         lambda n: {'address': f"Load Test {n}"}),
+        ('missing_persons', 'report_id',
+         lambda n: {'reporter_name': 'Load Test', 'missing_person_name': f"Load{n}",
+                    'last_seen_location': 'Load Test', 'contact': '9000000000'},
+         lambda n: {'last_seen_location': f"Load Test {n}"}),
+        ('inventory', 'item_id',
+         lambda n: {'item_name': f"Load Test Item {n}", 'quantity': 10, 'camp_id': camp(n)},
+         lambda n: {'quantity': 10 + n % 50}),
+        ('volunteers', 'volunteer_id',
+         lambda n: {'first_name': f"Load{n}", 'last_name': 'Test', 'contact_number': '9000000000',
+                    'camp_id': camp(n)},
+         lambda n: {'skills': 'Logistics'}),
+    ]
+    for resource, pk, make_body, make_update in write_specs:
+        scenarios.extend(write_scenarios(resource, pk, make_body, make_update))
+
+    return scenarios
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(base_path, head_path):
+    with open(base_path) as f:
+        base = json.load(f)['endpoints']
+    with open(head_path) as f:
+        head = json.load(f)['endpoints']
+
+    print(f"{'endpoint':<42} {'p95 base':>10} {'p95 head':>10} {'change':>8} {'rps base':>10} {'rps head':>10}")
+    for name in sorted(set(base) & set(head)):
+        b, h = base[name], head[name]
+        change = (h['latency_ms']['p95'] - b['latency_ms']['p95']) / b['latency_ms']['p95'] * 100
+        print(f"{name:<42} {b['latency_ms']['p95']:>10.2f} {h['latency_ms']['p95']:>10.2f} {change:>+7.1f}% "
+              f"{b['throughput_rps']:>10.1f} {h['throughput_rps']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API load test")
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help="requests per endpoint")
+    parser.add_argument('--only', help="run only endpoints whose name contains this text")
+    parser.add_argument('--exports', action='store_true', help="also stream the full-table exports")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    client = Client(args.url)
+    counter = QueryCounter()
+    scenarios = build_scenarios(client, args.exports)
+
+    results = {}
+    print(f"{'endpoint':<42} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7} {'queries':>8}")
+    for scenario in scenarios:
+        # Always run deletes so the records created by this run are removed
+        if args.only and args.only not in scenario.name and not scenario.once_per_record:
+            continue
+        requests = args.requests
+        if scenario.records is not None:
+            if not scenario.records:
+                continue
+            if scenario.once_per_record:
+                requests = len(scenario.records)
+        result = run_scenario(client, scenario, requests, args.concurrency, counter)
+        results[scenario.name] = result
+        queries = result['db_queries_per_request']
+        print(f"{scenario.name:<42} {result['throughput_rps']:>9.1f} {result['latency_ms']['p50']:>9.2f} "
+              f"{result['latency_ms']['p95']:>9.2f} {result['latency_ms']['p99']:>9.2f} "
+              f"{result['errors']:>7} {queries if queries is not None else '-':>8}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'timestamp': datetime.now().isoformat(timespec='seconds'),
+                    'commit': git_commit(),
+                    'url': args.url,
+                    'concurrency': args.concurrency,
+                    'requests_per_endpoint': args.requests,
+                },
+                'endpoints': results,
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# Concurrency stress test for primary key allocation.
+#
+# Fires thousands of parallel POSTs at a running API server and checks that
+# every request succeeded and that no id was handed out twice.
+#
+#   cd backend
+#   python app.py &
+#   python benchmarks/stress_ids.py --requests 5000 --workers 64
+#   python benchmarks/stress_ids.py --resource volunteers --cleanup
+
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# resource -> (id field in the response, payload factory)
+RESOURCES = {
+    'victims': ('victim_id', lambda n: {
+        'first_name': f"Stress{n}", 'last_name': 'Test', 'address': 'stress-test'}),
+    'relief_camps': ('camp_id', lambda n: {
+        'camp_name': f"Stress Camp {n}", 'location': 'stress-test', 'capacity': 10,
+        'contact_person': 'Stress Test'}),
+    'inventory': ('item_id', lambda n: {
+        'item_name': f"Stress Item {n}", 'quantity': 1}),
+    'volunteers': ('volunteer_id', lambda n: {
+        'first_name': f"Stress{n}", 'last_name': 'Test', 'contact_number': '0000000000'}),
+    'missing_persons': ('report_id', lambda n: {
+        'reporter_name': 'Stress Test', 'missing_person_name': f"Stress{n}",
+        'last_seen_location': 'stress-test', 'contact': '0000000000'}),
+}
+
+
+def request(method, url, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=body, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b'{}')
+    except Exception as e:
+        return None, {'message': str(e)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel POST stress test for id allocation")
+    parser.add_argument('--url', default='http://localhost:5000/api')
+    parser.add_argument('--resource', choices=sorted(RESOURCES), default='victims')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=64)
+    parser.add_argument('--cleanup', action='store_true', help="delete the created rows afterwards")
+    args = parser.parse_args()
+
+    id_field, make_payload = RESOURCES[args.resource]
+    url = f"{args.url}/{args.resource}"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda n: request('POST', url, make_payload(n)), range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    ids = [body[id_field] for status, body in results if status == 200]
+    failures = Counter(f"{status}: {body.get('message')}" for status, body in results if status != 200)
+    duplicates = [i for i, count in Counter(ids).items() if count > 1]
+
+    print(f"{args.requests} POSTs to /{args.resource} with {args.workers} workers in {elapsed:.2f} s "
+          f"({args.requests / elapsed:.0f} req/s)")
+    print(f"succeeded: {len(ids)}  failed: {sum(failures.values())}  duplicate ids: {len(duplicates)}")
+    for message, count in failures.most_common(5):
+        print(f"  {count} x {message}")
+
+    if args.cleanup:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            list(pool.map(lambda i: request('DELETE', f"{url}/{i}"), ids))
+
+    sys.exit(1 if failures or duplicates else 0)
+
+
+if __name__ == '__main__':
+    main()
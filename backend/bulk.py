@@ -0,0 +1,110 @@
+import csv
+import io
+from datetime import date
+
+
+class BulkError(ValueError):
+    pass
+
+
+# Read the rows of a bulk request. Accepted bodies:
+#   - a JSON array of objects, or {"rows": [...]}
+#   - a CSV upload (multipart field "file") or a text/csv body with a header row
+def read_bulk_rows(request, max_rows):
+    if 'file' in request.files:
+        rows = _read_csv(request.files['file'].read())
+    elif request.mimetype in ('text/csv', 'application/csv'):
+        rows = _read_csv(request.get_data())
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('rows')
+        if not isinstance(data, list):
+            raise BulkError("Expected a JSON array of rows, {\"rows\": [...]} or a CSV upload")
+        rows = data
+
+    if not rows:
+        raise BulkError("No rows to import")
+    if len(rows) > max_rows:
+        raise BulkError(f"Too many rows: {len(rows)} (maximum is {max_rows} per request)")
+    return rows
+
+
+def _read_csv(raw):
+    text = raw.decode('utf-8-sig') if isinstance(raw, bytes) else raw
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        {key.strip(): (value.strip() if value and value.strip() else None)
+         for key, value in row.items() if key}
+        for row in reader
+    ]
+
+
+def to_int(value):
+    return int(value)
+
+
+def to_date(value):
+    return date.fromisoformat(str(value)).isoformat()
+
+
+# Validate and normalise every row before anything touches the database.
+#   columns: insert columns in order (without the primary key)
+#   required: columns that must be present and non-empty
+#   converters: {column: callable} raising ValueError on bad input
+#   defaults: {column: zero-argument callable} used when a column is empty
+# Returns (valid, errors): valid is a list of (row index, values tuple, row),
+# errors maps row index to a message.
+def validate_rows(rows, columns, required, converters=None, defaults=None):
+    converters = converters or {}
+    defaults = defaults or {}
+    valid = []
+    errors = {}
+
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors[index] = "Row must be an object"
+            continue
+
+        missing = [field for field in required if row.get(field) in (None, '')]
+        if missing:
+            errors[index] = f"Missing required field: {missing[0]}"
+            continue
+
+        values = []
+        try:
+            for column in columns:
+                value = row.get(column)
+                if value in (None, ''):
+                    value = defaults[column]() if column in defaults else None
+                elif column in converters:
+                    value = converters[column](value)
+                values.append(value)
+        except (TypeError, ValueError):
+            errors[index] = f"Invalid value for {column}: {row.get(column)}"
+            continue
+
+        valid.append((index, tuple(values), row))
+
+    return valid, errors
+
+
+# Mark rows that reference a missing parent row (e.g. a camp_id with no
+# ReliefCamp), using one IN (...) lookup for the whole batch
+def check_references(cursor, valid, index, table, key, errors):
+    keys = {values[index] for _, values, _ in valid if values[index] is not None}
+    if not keys:
+        return valid
+
+    placeholders = ', '.join(['%s'] * len(keys))
+    cursor.execute(f"SELECT {key} FROM {table} WHERE {key} IN ({placeholders})", tuple(keys))
+    existing = {row[0] for row in cursor.fetchall()}
+
+    kept = []
+    for entry in valid:
+        value = entry[1][index]
+        if value is not None and value not in existing:
+            errors[entry[0]] = f"{table} {value} does not exist"
+        else:
+            kept.append(entry)
+    return kept
@@ -0,0 +1,267 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, Response
+
+
+# A cached GET response
+class CachedResponse:
+    def __init__(self, body, status, content_type, etag):
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+        self.etag = etag
+
+
+# In-process LRU cache with a TTL per entry. Each entry carries tags; writes
+# evict exactly the entries tagged with what they changed.
+#
+# Every invalidation advances an epoch and stamps its tags with it. A view
+# computed since epoch N is only stored if none of its tags was invalidated
+# after N, so a write landing mid-computation cannot leave its stale result
+# cached. Stamps are kept for the `max_entries` most recently invalidated tags;
+# a computation older than the oldest forgotten stamp is not stored.
+class MemoryBackend:
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._epoch = 0
+        self._invalidated = OrderedDict()  # tag -> epoch of its last invalidation, oldest first
+        self._forgotten = 0
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+            value, expires_at, tags = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.counters['expirations'] += 1
+                self.counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return value
+
+    def epoch(self):
+        with self._lock:
+            return self._epoch
+
+    # Store an entry, unless one of its tags was invalidated after epoch
+    # `since`. Returns whether it was stored.
+    def set(self, key, value, tags, since=None):
+        with self._lock:
+            if since is not None and (since < self._forgotten or
+                                      any(self._invalidated.get(tag, 0) > since for tag in tags)):
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.counters['evictions'] += 1
+        return True
+
+    def invalidate(self, *tags):
+        with self._lock:
+            self._epoch += 1
+            for tag in tags:
+                self._invalidated.pop(tag, None)
+                self._invalidated[tag] = self._epoch
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    self.counters['invalidations'] += 1
+            while len(self._invalidated) > self.max_entries:
+                _, stamp = self._invalidated.popitem(last=False)
+                self._forgotten = max(self._forgotten, stamp)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    # Caller must hold the lock
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats.update({'backend': 'memory', 'entries': len(self._entries),
+                          'max_entries': self.max_entries, 'ttl': self.ttl})
+        return stats
+
+
+# Redis (or any Redis-compatible server) backend, shared by all worker
+# processes. Entries expire through Redis TTLs; tags are Redis sets of keys.
+# Invalidations advance a shared epoch and stamp their tags as in
+# MemoryBackend; the stamp check and the write run in one Lua script. Stamps
+# expire with the entries, after `ttl` seconds.
+class RedisBackend:
+    SET_SCRIPT = """
+        local tags = (#KEYS - 1) / 2
+        local since = tonumber(ARGV[1])
+        for i = 1, tags do
+            if since >= 0 and tonumber(redis.call('GET', KEYS[1 + tags + i]) or 0) > since then
+                return 0
+            end
+        end
+        redis.call('HSET', KEYS[1], 'body', ARGV[4], 'status', ARGV[5],
+                   'content_type', ARGV[6], 'etag', ARGV[7])
+        redis.call('EXPIRE', KEYS[1], ARGV[2])
+        for i = 1, tags do
+            redis.call('SADD', KEYS[1 + i], ARGV[3])
+            redis.call('EXPIRE', KEYS[1 + i], ARGV[2])
+        end
+        return 1
+    """
+
+    def __init__(self, client, ttl=60, prefix='drm:cache:'):
+        self._client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self._set = client.register_script(self.SET_SCRIPT)
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def get(self, key):
+        data = self._client.hgetall(self.prefix + key)
+        if not data:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return CachedResponse(data[b'body'], int(data[b'status']),
+                              data[b'content_type'].decode(), data[b'etag'].decode())
+
+    def epoch(self):
+        return int(self._client.get(self.prefix + 'epoch') or 0)
+
+    def set(self, key, value, tags, since=None):
+        keys = ([self.prefix + key] + [self.prefix + 'tag:' + tag for tag in tags]
+                + [self.prefix + 'invalidated:' + tag for tag in tags])
+        # since -1: store without checking
+        args = [-1 if since is None else since, self.ttl, key,
+                value.body, value.status, value.content_type, value.etag]
+        return bool(self._set(keys=keys, args=args))
+
+    # Stamp first, then delete: a set racing with this either lands before the
+    # delete or sees the stamp
+    def invalidate(self, *tags):
+        epoch = self._client.incr(self.prefix + 'epoch')
+        pipe = self._client.pipeline()
+        for tag in tags:
+            pipe.set(self.prefix + 'invalidated:' + tag, epoch, ex=self.ttl)
+        pipe.execute()
+        for tag in tags:
+            tag_key = self.prefix + 'tag:' + tag
+            keys = self._client.smembers(tag_key)
+            if keys:
+                self._client.delete(*[self.prefix + key.decode() for key in keys])
+                self._count('invalidations', len(keys))
+            self._client.delete(tag_key)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + '*'):
+            self._client.delete(key)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats.update({'backend': 'redis', 'ttl': self.ttl})
+        return stats
+
+
+# backend: 'memory' or 'redis' (the redis package is only needed for the latter)
+def create_backend(backend='memory', max_entries=1024, ttl=60, redis_url=None):
+    if backend == 'redis':
+        import redis
+        return RedisBackend(redis.Redis.from_url(redis_url or 'redis://localhost:6379/0'), ttl=ttl)
+    return MemoryBackend(max_entries=max_entries, ttl=ttl)
+
+
+class ResponseCache:
+    def __init__(self, backend, enabled=True):
+        self.backend = backend
+        self.enabled = enabled
+
+    # Route + query string, with the arguments sorted so equivalent URLs share an entry
+    @staticmethod
+    def request_key():
+        args = sorted(request.args.items(multi=True))
+        query = '&'.join(f"{name}={value}" for name, value in args)
+        return f"{request.path}?{query}"
+
+    # Cache a GET view. Tags are format strings filled in from the view's
+    # arguments, e.g. cached('relief_camps:{camp_id}'). Responses carry an ETag
+    # and answer If-None-Match with 304 Not Modified.
+    def cached(self, *tag_templates):
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+
+                key = self.request_key()
+                entry = self.backend.get(key)
+                if entry is None:
+                    since = self.backend.epoch()
+                    response = view(*args, **kwargs)
+                    if isinstance(response, tuple):
+                        response, status = response[0], response[1]
+                        response.status_code = status
+                    if response.status_code != 200:
+                        return response
+
+                    body = response.get_data()
+                    entry = CachedResponse(body, response.status_code, response.content_type,
+                                           hashlib.sha1(body).hexdigest())
+                    tags = [template.format(**kwargs) for template in tag_templates]
+                    # Not stored if a write invalidated one of the tags meanwhile
+                    self.backend.set(key, entry, tags, since)
+
+                return self._respond(entry)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _respond(entry):
+        # Weak comparison: compressed responses carry the ETag as W/"..."
+        if request.if_none_match.contains_weak(entry.etag):
+            response = Response(status=304)
+        else:
+            response = Response(entry.body, status=entry.status, content_type=entry.content_type)
+        response.set_etag(entry.etag)
+        return response
+
+    def invalidate(self, *tags):
+        if self.enabled:
+            self.backend.invalidate(*tags)
+
+    def stats(self):
+        stats = self.backend.stats()
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['enabled'] = self.enabled
+        return stats
@@ -0,0 +1,102 @@
+from collections import Counter
+from datetime import date
+
+# Per-camp counters in the CampStats table (migration 0005). The write
+# handlers adjust them in the same transaction as the rows they change:
+#   victims               VictimSurvivor rows in the camp
+#   open_missing_reports  MissingPersonReport rows not yet linked to a victim
+#   inventory_units       SUM(Inventory.quantity)
+#   active_volunteers     VolunteerAssignment rows covering volunteers_on
+# active_volunteers depends on the date, so it is recounted once a day by
+# refresh_active_volunteers(); in between, handlers only adjust rows that
+# are already counted for today.
+COUNTERS = ('victims', 'active_volunteers', 'open_missing_reports', 'inventory_units')
+
+
+def _as_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+# Add counter rows for new camps
+def create(cursor, camp_ids):
+    cursor.executemany("INSERT INTO CampStats (camp_id) VALUES (%s)", [(camp_id,) for camp_id in camp_ids])
+
+
+def delete(cursor, camp_id):
+    cursor.execute("DELETE FROM CampStats WHERE camp_id = %s", (camp_id,))
+
+
+# deltas: {camp_id: amount to add}; rows without a camp are ignored
+def adjust(cursor, counter, deltas):
+    if counter not in COUNTERS:
+        raise ValueError(f"Unknown camp counter: {counter}")
+    rows = [(delta, camp_id) for camp_id, delta in deltas.items() if camp_id is not None and delta]
+    if rows:
+        cursor.executemany(f"UPDATE CampStats SET {counter} = {counter} + %s WHERE camp_id = %s", rows)
+
+
+# Add `delta` to the counter of whichever camp the row `pk_value` of `table`
+# belongs to, without reading the row first
+def adjust_owner(cursor, counter, table, pk, pk_value, delta):
+    if counter not in COUNTERS:
+        raise ValueError(f"Unknown camp counter: {counter}")
+    cursor.execute(
+        f"UPDATE CampStats SET {counter} = {counter} + %s "
+        f"WHERE camp_id = (SELECT camp_id FROM {table} WHERE {pk} = %s)", (delta, pk_value)
+    )
+
+
+# A row that counted `old_amount` in old_camp now counts `new_amount` in new_camp
+def move(cursor, counter, old_camp, old_amount, new_camp, new_amount):
+    deltas = Counter()
+    deltas[old_camp] -= old_amount
+    deltas[new_camp] += new_amount
+    adjust(cursor, counter, deltas)
+
+
+# assignments: [(camp_id, start_date, end_date)] inserted (sign=1) or deleted (sign=-1)
+def adjust_active_volunteers(cursor, assignments, sign, today=None):
+    today = today or date.today()
+    deltas = Counter()
+    for camp_id, start_date, end_date in assignments:
+        start_date, end_date = _as_date(start_date), _as_date(end_date)
+        if camp_id is not None and start_date <= today and (end_date is None or end_date >= today):
+            deltas[camp_id] += sign
+    rows = [(delta, camp_id, today) for camp_id, delta in deltas.items() if delta]
+    if rows:
+        cursor.executemany(
+            "UPDATE CampStats SET active_volunteers = active_volunteers + %s "
+            "WHERE camp_id = %s AND volunteers_on = %s", rows
+        )
+
+
+# Recount active_volunteers for camps not yet counted for today
+def refresh_active_volunteers(cursor, today=None):
+    today = today or date.today()
+    cursor.execute("""
+        UPDATE CampStats
+        SET active_volunteers = (
+                SELECT COUNT(*) FROM VolunteerAssignment va
+                WHERE va.camp_id = CampStats.camp_id AND va.start_date <= %s
+                  AND (va.end_date IS NULL OR va.end_date >= %s)
+            ),
+            volunteers_on = %s
+        WHERE volunteers_on IS NULL OR volunteers_on <> %s
+    """, (today, today, today, today))
+    return cursor.rowcount
+
+
+# Recount every camp from scratch (after loading data that bypassed the API)
+def rebuild(cursor):
+    cursor.execute("DELETE FROM CampStats")
+    cursor.execute("""
+        INSERT INTO CampStats (camp_id, victims, open_missing_reports, inventory_units)
+        SELECT c.camp_id,
+               (SELECT COUNT(*) FROM VictimSurvivor v WHERE v.camp_id = c.camp_id),
+               (SELECT COUNT(*) FROM MissingPersonReport m WHERE m.camp_id = c.camp_id AND m.victim_id IS NULL),
+               (SELECT COALESCE(SUM(i.quantity), 0) FROM Inventory i WHERE i.camp_id = c.camp_id)
+        FROM ReliefCamp c
+    """)
+    refresh_active_volunteers(cursor)
@@ -0,0 +1,227 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from serializer import dumps
+
+# Change feed for live dashboards.
+#
+# Write handlers append one ChangeLog row (migration 0008) per record they
+# create, update or delete, in the same transaction as the write, so the log
+# never shows a change that was rolled back. Each process tails the log in
+# one background thread and keeps the most recent events in memory; /api/stream
+# clients are all served from that buffer, and /api/changes?since= from the
+# table. Tailing the table rather than publishing from the handlers means
+# streams also see writes made by other server processes.
+
+RESOURCES = ('relief_camps', 'victims', 'missing_persons', 'inventory', 'volunteers')
+ACTIONS = ('create', 'update', 'delete')
+
+
+class ChangeError(ValueError):
+    pass
+
+
+# Comma-separated resource names -> tuple, or None for all resources
+def parse_resources(value):
+    if not value:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in names if name not in RESOURCES]
+    if unknown:
+        raise ChangeError(f"Unknown resource: {', '.join(unknown)} (expected {', '.join(RESOURCES)})")
+    return names or None
+
+
+def parse_seq(value, name='since'):
+    try:
+        seq = int(value)
+    except (TypeError, ValueError):
+        raise ChangeError(f"Invalid {name}: {value}")
+    if seq < 0:
+        raise ChangeError(f"{name} must not be negative")
+    return seq
+
+
+# Append changes to the log in the caller's transaction
+def record(cursor, resource, action, record_ids):
+    if resource not in RESOURCES or action not in ACTIONS:
+        raise ValueError(f"Unknown change: {resource} {action}")
+    rows = [(resource, record_id, action) for record_id in record_ids]
+    if rows:
+        cursor.executemany("INSERT INTO ChangeLog (resource, record_id, action) VALUES (%s, %s, %s)", rows)
+
+
+def _event(row):
+    seq, resource, record_id, action, changed_at = row
+    if isinstance(changed_at, datetime):
+        changed_at = changed_at.isoformat()
+    return {"seq": seq, "resource": resource, "id": record_id, "action": action, "changed_at": changed_at}
+
+
+# One server-sent event: the resource as event name, seq as id
+def to_sse(event):
+    return f"id: {event['seq']}\nevent: {event['resource']}\ndata: {dumps(event)}\n\n"
+
+
+def build_read_query(since, until, limit, resources=None):
+    query = """
+        SELECT seq, resource, record_id, action, changed_at FROM ChangeLog
+        WHERE seq > %s AND seq <= %s
+    """
+    params = [since, until]
+    if resources:
+        query += f" AND resource IN ({', '.join(['%s'] * len(resources))})"
+        params.extend(resources)
+    query += " ORDER BY seq LIMIT %s"
+    params.append(limit)
+    return query, tuple(params)
+
+
+# Events with since < seq <= until, oldest first
+def read(cursor, since, until, limit, resources=None):
+    cursor.execute(*build_read_query(since, until, limit, resources))
+    return [_event(row) for row in cursor.fetchall()]
+
+
+# Oldest seq still in the log; None when the log is empty
+def oldest(cursor):
+    cursor.execute("SELECT MIN(seq) FROM ChangeLog")
+    return cursor.fetchone()[0]
+
+
+# Tails ChangeLog and keeps the latest `buffer_size` events in memory.
+#   poll_interval: seconds between reads of the log when nothing calls notify()
+#   gap_timeout: seconds to wait for a missing seq to commit before skipping it
+#   retention_days: log rows older than this are deleted (hourly)
+class ChangeFeed:
+    BATCH_SIZE = 1000
+    PRUNE_INTERVAL = 3600
+
+    # connect: zero-argument callable returning a DB connection (e.g. the pool)
+    def __init__(self, connect, poll_interval=1.0, gap_timeout=10.0, buffer_size=10000,
+                 retention_days=7, logger=None):
+        self._connect = connect
+        self.poll_interval = poll_interval
+        self.gap_timeout = gap_timeout
+        self.buffer_size = buffer_size
+        self.retention_days = retention_days
+        self.logger = logger
+        self._recent = deque()
+        # The buffer holds every event with buffered_from < seq <= watermark
+        self._buffered_from = 0
+        self._watermark = None
+        self._gap_seen = None
+        self._pruned_at = 0.0
+        self._changed = threading.Condition()
+        self._wake = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    # Start tailing from the current end of the log (on first use, so
+    # importing the app does not need a database)
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            conn = self._connect()
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM ChangeLog")
+                self._watermark = self._buffered_from = cursor.fetchone()[0]
+            finally:
+                cursor.close()
+                conn.close()
+            self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+            self._thread.start()
+
+    # Highest seq up to which every change has been seen. Changes are only
+    # served up to here, so a transaction that commits late with a lower seq
+    # is not skipped by clients that already moved past it.
+    @property
+    def watermark(self):
+        self._start()
+        return self._watermark
+
+    # Read the log now instead of at the next poll (call after a commit)
+    def notify(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self.poll()
+            except Exception as e:
+                if self.logger is not None:
+                    self.logger.warning("Change feed poll failed: %s", e)
+
+    # Read new log rows into the buffer and wake waiting streams
+    def poll(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            while True:
+                cursor.execute("""
+                    SELECT seq, resource, record_id, action, changed_at FROM ChangeLog
+                    WHERE seq > %s ORDER BY seq LIMIT %s
+                """, (self._watermark, self.BATCH_SIZE))
+                rows = cursor.fetchall()
+                events = self._advance(rows)
+                if events:
+                    with self._changed:
+                        self._recent.extend(events)
+                        while len(self._recent) > self.buffer_size:
+                            self._buffered_from = self._recent.popleft()["seq"]
+                        self._watermark = events[-1]["seq"]
+                        self._changed.notify_all()
+                if len(rows) < self.BATCH_SIZE or len(events) < len(rows):
+                    break
+            if time.monotonic() - self._pruned_at > self.PRUNE_INTERVAL:
+                cursor.execute("DELETE FROM ChangeLog WHERE changed_at < %s",
+                               (datetime.now() - timedelta(days=self.retention_days),))
+                conn.commit()
+                self._pruned_at = time.monotonic()
+        finally:
+            cursor.close()
+            conn.close()
+
+    # Events from rows that can be published, stopping at a gap in seq: the
+    # missing numbers may belong to transactions that have not committed yet.
+    # A gap still open after gap_timeout is a rollback and is skipped.
+    def _advance(self, rows):
+        events = []
+        expected = self._watermark + 1
+        for row in rows:
+            if row[0] != expected:
+                now = time.monotonic()
+                if self._gap_seen is None:
+                    self._gap_seen = now
+                if now - self._gap_seen < self.gap_timeout:
+                    break
+            self._gap_seen = None
+            events.append(_event(row))
+            expected = row[0] + 1
+        return events
+
+    # Wait up to `timeout` seconds for changes after `since`. Returns
+    # (events, watermark); events is None when `since` is older than the
+    # buffer and the caller has to read the log itself.
+    def wait(self, since, timeout):
+        self._start()
+        with self._changed:
+            self._changed.wait_for(lambda: self._watermark > since, timeout)
+            watermark = self._watermark
+            if since < self._buffered_from:
+                return None, watermark
+            events = []
+            for event in reversed(self._recent):
+                if event["seq"] <= since:
+                    break
+                events.append(event)
+        events.reverse()
+        return events, watermark
@@ -0,0 +1,133 @@
+import zlib
+
+from flask import request
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.wsgi import ClosingIterator
+
+# brotli is optional; without it responses are only gzip-compressed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Negotiated compression of response bodies, and conditional GETs.
+#
+# Responses of a text type at least `min_size` bytes long are compressed with
+# brotli or gzip, whichever the client's Accept-Encoding prefers (brotli on a
+# tie, when installed). Streamed responses (the exports) are compressed chunk
+# by chunk and flushed after each one, so they still arrive as they are
+# read. GET responses get an ETag, so a client polling an unchanged page gets
+# 304 Not Modified. Range requests are answered from the uncompressed body
+# (206 responses are not compressed, and compressed ones do not advertise
+# Accept-Ranges).
+
+# Types worth compressing. The change stream (text/event-stream) is left alone:
+# its events have to reach the client as soon as they are written.
+COMPRESSIBLE = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html')
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._stream = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data):
+        return self._stream.compress(data) + self._stream.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._stream.flush()
+
+
+class _Brotli:
+    def __init__(self, quality):
+        self._stream = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._stream.process(data) + self._stream.flush()
+
+    def finish(self):
+        return self._stream.finish()
+
+
+class Compression:
+    # level: gzip level (1-9); brotli_quality: 0-11 (5 is about gzip's speed
+    # at a noticeably smaller size)
+    def __init__(self, min_size=1024, level=6, brotli_quality=5, enabled=True):
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.enabled = enabled
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    # Content-Encoding to send for an Accept-Encoding header (werkzeug's
+    # parsed request.accept_encodings), or None
+    def negotiate(self, accept_encodings):
+        if not self.enabled:
+            return None
+        return accept_encodings.best_match(self.encodings)
+
+    @staticmethod
+    def compressible(mimetype):
+        return mimetype in COMPRESSIBLE
+
+    # Whole body -> compressed body
+    def compress(self, body, encoding):
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        stream = _Gzip(self.level)
+        return stream.compress(body) + stream.finish()
+
+    def _compress_stream(self, chunks, encoding):
+        stream = _Brotli(self.brotli_quality) if encoding == 'br' else _Gzip(self.level)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.finish()
+
+    # Install before the app's other after_request hooks: Flask runs them in
+    # reverse order, so this one runs last and e.g. idempotency keys store
+    # uncompressed bodies
+    def install(self, app):
+        app.after_request(self._after_request)
+
+    def _after_request(self, response):
+        if request.method in ('GET', 'HEAD') and response.status_code == 200 and not response.is_streamed:
+            if response.get_etag()[0] is None:
+                response.add_etag()
+            try:
+                response.make_conditional(request, accept_ranges=True,
+                                          complete_length=response.calculate_content_length())
+            except RequestedRangeNotSatisfiable as e:
+                return e.get_response()
+
+        if response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return response
+        if not self.compressible(response.mimetype):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self.negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            # Closing the response still closes the wrapped body (which hands
+            # its connection back), even if it was never iterated
+            body = response.response
+            response.response = ClosingIterator(self._compress_stream(body, encoding), getattr(body, 'close', None))
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            response.set_data(self.compress(body, encoding))
+            # Another encoding of the same content: the ETag no longer
+            # identifies these exact bytes
+            etag, weak = response.get_etag()
+            if etag is not None and not weak:
+                response.set_etag(etag, weak=True)
+        response.headers['Content-Encoding'] = encoding
+        # Ranges are only served from the uncompressed body
+        response.headers.pop('Accept-Ranges', None)
+        return response
@@ -8,3 +8,106 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-for-disaster-relief'
     SQLALCHEMY_DATABASE_URI = f"mysql+pymysql://{os.environ.get('DB_USER')}:{os.environ.get('DB_PASSWORD')}@{os.environ.get('DB_HOST')}/{os.environ.get('DB_NAME')}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Database connection pool
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_POOL_MAX_OVERFLOW = int(os.environ.get('DB_POOL_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 3600))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+    # Read replicas ("host[:port]", comma-separated; same user, password and database as
+    # DB_HOST, one pool each sized like the primary's). GET requests read from a replica at
+    # most REPLICA_MAX_LAG seconds behind, checked every REPLICA_CHECK_INTERVAL seconds; a
+    # client reads from the primary for READ_YOUR_WRITES_WINDOW seconds after it writes.
+    DB_REPLICA_HOSTS = os.environ.get('DB_REPLICA_HOSTS', '')
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 5))
+    REPLICA_CHECK_INTERVAL = float(os.environ.get('REPLICA_CHECK_INTERVAL', 2))
+    READ_YOUR_WRITES_WINDOW = float(os.environ.get('READ_YOUR_WRITES_WINDOW', 5))
+
+    # Response compression: bodies of at least COMPRESSION_MIN_SIZE bytes are sent with gzip
+    # (GZIP_LEVEL 1-9) or brotli (BROTLI_QUALITY 0-11, when the brotli package is installed),
+    # as the client's Accept-Encoding allows
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+    BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+
+    # Rate limits per client and route (token buckets: requests per second, burst), the public
+    # ones for the public priority class; RATE_LIMIT_BACKEND memory (per process) or redis
+    # (shared, at REDIS_URL). Requests with X-Coordinator-Token: COORDINATOR_TOKEN are not
+    # limited or shed.
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMIT_RATE = float(os.environ.get('RATE_LIMIT_RATE', 20))
+    RATE_LIMIT_BURST = int(os.environ.get('RATE_LIMIT_BURST', 100))
+    RATE_LIMIT_PUBLIC_RATE = float(os.environ.get('RATE_LIMIT_PUBLIC_RATE', 2))
+    RATE_LIMIT_PUBLIC_BURST = int(os.environ.get('RATE_LIMIT_PUBLIC_BURST', 20))
+    COORDINATOR_TOKEN = os.environ.get('COORDINATOR_TOKEN', '')
+
+    # Load shedding: public requests get 503 once SHED_MAX_IN_FLIGHT requests are running in
+    # the process or the recent average wait for a pooled connection reaches SHED_MAX_POOL_WAIT
+    # seconds, normal ones at twice that. Refused clients are told to retry after
+    # SHED_RETRY_AFTER seconds. 0 turns a threshold off.
+    SHED_MAX_IN_FLIGHT = int(os.environ.get('SHED_MAX_IN_FLIGHT', 64))
+    SHED_MAX_POOL_WAIT = float(os.environ.get('SHED_MAX_POOL_WAIT', 0.5))
+    SHED_RETRY_AFTER = int(os.environ.get('SHED_RETRY_AFTER', 5))
+
+    # Rows fetched per round trip by the streaming export endpoints
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+
+    # Primary keys reserved from IdSequence per database round trip
+    ID_BLOCK_SIZE = int(os.environ.get('ID_BLOCK_SIZE', 100))
+
+    # Largest batch accepted by the /bulk endpoints
+    BULK_MAX_ROWS = int(os.environ.get('BULK_MAX_ROWS', 50000))
+
+    # Response cache for reference data GETs (backend: memory or redis)
+    CACHE_ENABLED = os.environ.get('CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    CACHE_TTL = int(os.environ.get('CACHE_TTL', 60))
+    REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+
+    # aiomysql pool used by the async read routes in asgi.py (per worker)
+    ASYNC_DB_POOL_MIN = int(os.environ.get('ASYNC_DB_POOL_MIN', 5))
+    ASYNC_DB_POOL_MAX = int(os.environ.get('ASYNC_DB_POOL_MAX', 200))
+
+    # Missing person matching index (seconds between full rebuilds, victims scored per match)
+    MATCH_INDEX_REFRESH = int(os.environ.get('MATCH_INDEX_REFRESH', 300))
+    MATCH_MAX_CANDIDATES = int(os.environ.get('MATCH_MAX_CANDIDATES', 2000))
+
+    # Volunteer scheduler (victims each volunteer looks after, value bonus for a skill a camp lacks)
+    SCHEDULE_VICTIMS_PER_VOLUNTEER = int(os.environ.get('SCHEDULE_VICTIMS_PER_VOLUNTEER', 20))
+    SCHEDULE_SKILL_GAP_BONUS = float(os.environ.get('SCHEDULE_SKILL_GAP_BONUS', 0.5))
+    # Seconds a schedule run waits for one already in progress before giving up with 409
+    SCHEDULE_LOCK_TIMEOUT = int(os.environ.get('SCHEDULE_LOCK_TIMEOUT', 5))
+
+    # Seconds the nearest-camp index may serve free capacity before reloading it from CampStats
+    GEO_OCCUPANCY_REFRESH = int(os.environ.get('GEO_OCCUPANCY_REFRESH', 5))
+
+    # Seconds inventory analytics may serve stock flow before reloading Inventory, Donation and Supply
+    ANALYTICS_REFRESH = int(os.environ.get('ANALYTICS_REFRESH', 60))
+
+    # Request instrumentation: statement runs per request reported as N+1, and the
+    # opt-in ?profile=1 sampling profiler (off unless enabled; samples every PROFILE_INTERVAL seconds)
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 3))
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.001))
+
+    # JSON encoder for responses: orjson, or json for the standard library encoder
+    JSON_ENCODER = os.environ.get('JSON_ENCODER', 'orjson')
+
+    # Change feed (/api/stream, /api/changes): seconds between reads of ChangeLog, seconds to
+    # wait for a missing seq to commit, events kept in memory, days of log kept, and seconds
+    # between keepalive comments on idle streams
+    CHANGE_POLL_INTERVAL = float(os.environ.get('CHANGE_POLL_INTERVAL', 1.0))
+    CHANGE_GAP_TIMEOUT = float(os.environ.get('CHANGE_GAP_TIMEOUT', 10))
+    CHANGE_BUFFER_SIZE = int(os.environ.get('CHANGE_BUFFER_SIZE', 10000))
+    CHANGE_RETENTION_DAYS = int(os.environ.get('CHANGE_RETENTION_DAYS', 7))
+    CHANGE_STREAM_HEARTBEAT = float(os.environ.get('CHANGE_STREAM_HEARTBEAT', 15))
+
+    # Idempotency keys: seconds a stored response is replayed for a retried key, and seconds
+    # after which a claim whose request never finished can be taken over
+    IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 86400))
+    IDEMPOTENCY_LEASE = int(os.environ.get('IDEMPOTENCY_LEASE', 60))
@@ -0,0 +1,276 @@
+import math
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+# Seconds over which recent_wait() forgets a wait: the average of checkout
+# waits decays by 1/e every RECENT_WAIT_DECAY seconds
+RECENT_WAIT_DECAY = 5.0
+
+
+# A raw DB-API connection plus the bookkeeping the pool needs to recycle it
+class _ConnectionRecord:
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        # statement text -> prepared cursor (see PooledConnection.prepared_cursor)
+        self.statements = {}
+
+
+# Connection handed out to route handlers. It behaves like the underlying
+# connection, except that close() returns it to the pool instead of
+# tearing down the socket.
+class PooledConnection:
+    def __init__(self, pool, record):
+        self._pool = pool
+        self._record = record
+
+    def __getattr__(self, name):
+        record = self.__dict__.get('_record')
+        if record is None:
+            raise AttributeError("Connection has already been returned to the pool")
+        return getattr(record.raw, name)
+
+    @property
+    def raw_connection(self):
+        return self._record.raw
+
+    # Prepared cursor for `statement`, kept with the physical connection so
+    # the server parses the statement once per connection instead of once
+    # per request. The cursor stays open: execute() it and fetch all rows,
+    # but do not close it. Pass the same str object every time (the
+    # connector only skips re-preparing for an identical statement object),
+    # i.e. statements built once, as in tables.py.
+    def prepared_cursor(self, statement):
+        record = self._record
+        cursor = record.statements.get(statement)
+        if cursor is None:
+            cursor = record.statements[statement] = record.raw.cursor(prepared=True)
+        return cursor
+
+    def close(self):
+        record, self._record = self._record, None
+        if record is not None:
+            self._pool._release(record)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    # creator: zero-argument callable returning a new DB-API connection
+    # pool_size: connections kept open while idle
+    # max_overflow: extra connections allowed under load, closed on return
+    # timeout: seconds to wait for a free connection before PoolTimeout
+    # recycle: seconds after which a connection is replaced (-1 disables)
+    # pre_ping: check the connection is still alive on every checkout
+    def __init__(self, creator, pool_size=5, max_overflow=10, timeout=30.0,
+                 recycle=3600, pre_ping=True):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self._creator = creator
+        self.pool_size = pool_size
+        self.max_overflow = max(0, max_overflow)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle = []
+        self._total = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._recent_wait = 0.0
+        self._recent_wait_at = time.monotonic()
+        self._cond = threading.Condition()
+
+        self._counters = {
+            'checkouts': 0,
+            'connects': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'timeouts': 0,
+            'recycled': 0,
+            'ping_failures': 0,
+            'discarded': 0,
+        }
+
+    def connect(self):
+        record = self._checkout()
+        try:
+            record = self._validate(record)
+        except Exception:
+            self._discard(record)
+            raise
+        return PooledConnection(self, record)
+
+    def _checkout(self):
+        deadline = None
+        waited_since = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    record = self._idle.pop()
+                    break
+                if self._total < self.pool_size + self.max_overflow:
+                    # Reserve the slot now and open the socket outside the lock
+                    self._total += 1
+                    record = None
+                    break
+
+                if waited_since is None:
+                    waited_since = time.monotonic()
+                    deadline = waited_since + self.timeout
+                    self._counters['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    self._counters['wait_time_total'] += time.monotonic() - waited_since
+                    self._note_wait(time.monotonic() - waited_since)
+                    raise PoolTimeout(
+                        f"Connection pool exhausted: {self._total} connections in use "
+                        f"(pool_size={self.pool_size}, max_overflow={self.max_overflow})"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            waited = time.monotonic() - waited_since if waited_since is not None else 0.0
+            self._counters['wait_time_total'] += waited
+            self._note_wait(waited)
+            self._in_use += 1
+            self._counters['checkouts'] += 1
+
+        if record is None:
+            try:
+                record = self._new_record()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        return record
+
+    # Fold one checkout's wait into the recent average (under self._cond)
+    def _note_wait(self, waited):
+        now = time.monotonic()
+        self._recent_wait = self._decayed_wait(now) * 0.9 + waited * 0.1
+        self._recent_wait_at = now
+
+    def _decayed_wait(self, now):
+        return self._recent_wait * math.exp(-(now - self._recent_wait_at) / RECENT_WAIT_DECAY)
+
+    # Recent average seconds a checkout waited for a connection. It falls
+    # back towards 0 as time passes without waits, also when no checkouts
+    # happen at all.
+    def recent_wait(self):
+        with self._cond:
+            return self._decayed_wait(time.monotonic())
+
+    def _new_record(self):
+        record = _ConnectionRecord(self._creator())
+        with self._cond:
+            self._counters['connects'] += 1
+        return record
+
+    # Replace connections that are too old or no longer answer a ping
+    def _validate(self, record):
+        if self.recycle is not None and self.recycle >= 0 and \
+                time.monotonic() - record.created_at > self.recycle:
+            self._close_quietly(record.raw)
+            with self._cond:
+                self._counters['recycled'] += 1
+            return self._new_record()
+
+        if self.pre_ping and not self._ping(record.raw):
+            self._close_quietly(record.raw)
+            with self._cond:
+                self._counters['ping_failures'] += 1
+            return self._new_record()
+
+        return record
+
+    @staticmethod
+    def _ping(raw):
+        try:
+            if hasattr(raw, 'ping'):
+                # mysql.connector raises InterfaceError if the server went away
+                raw.ping(reconnect=False)
+            else:
+                cursor = raw.cursor()
+                try:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchall()
+                finally:
+                    cursor.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _release(self, record):
+        # End any transaction the handler left open so the next checkout
+        # starts from a clean snapshot
+        try:
+            record.raw.rollback()
+        except Exception:
+            self._discard(record)
+            return
+
+        with self._cond:
+            self._in_use -= 1
+            if len(self._idle) < self.pool_size:
+                self._idle.append(record)
+                record = None
+            else:
+                self._total -= 1
+            self._cond.notify()
+
+        if record is not None:
+            self._close_quietly(record.raw)
+
+    def _discard(self, record):
+        self._close_quietly(record.raw)
+        with self._cond:
+            self._in_use -= 1
+            self._total -= 1
+            self._counters['discarded'] += 1
+            self._cond.notify()
+
+    def dispose(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+        for record in idle:
+            self._close_quietly(record.raw)
+
+    def stats(self):
+        with self._cond:
+            stats = {
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'open': self._total,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'overflow': max(0, self._total - self.pool_size),
+                'waiting': self._waiting,
+                'recent_wait': round(self._decayed_wait(time.monotonic()), 6),
+            }
+            stats.update(self._counters)
+        stats['wait_time_total'] = round(stats['wait_time_total'], 6)
+        return stats
@@ -0,0 +1,52 @@
+# Rows in other tables that stop a record from being deleted:
+# parent table -> [(child table, foreign key column, error message)]
+REFERENCES = {
+    'ReliefCamp': [
+        ('VictimSurvivor', 'camp_id', "Cannot delete camp with associated victims"),
+        ('Inventory', 'camp_id', "Cannot delete camp with associated inventory items"),
+        ('VolunteerAssignment', 'camp_id', "Cannot delete camp with assigned volunteers"),
+        ('MissingPersonReport', 'camp_id', "Cannot delete camp with associated missing person reports"),
+        ('Supply', 'camp_id', "Cannot delete camp with associated supplies"),
+    ],
+    'VictimSurvivor': [
+        ('MissingPersonReport', 'victim_id', "Cannot delete victim with associated missing person reports"),
+    ],
+    'Inventory': [
+        ('Donor', 'item_id', "Cannot delete item with associated donors"),
+        ('Donation', 'item_id', "Cannot delete item with associated donations"),
+        ('Supply', 'item_id', "Cannot delete item with associated supplies"),
+    ],
+    'MissingPersonReport': [],
+    # Assignments are deleted together with the volunteer
+    'Volunteer': [],
+}
+
+_queries = {}
+
+
+# One query that answers "does the row exist?" and "is any child row pointing
+# at it?" together. Each EXISTS stops at the first match on the indexed
+# foreign key, so the cost does not grow with the size of the child tables.
+def _dependency_query(table, pk):
+    key = (table, pk)
+    if key not in _queries:
+        probes = [f"EXISTS (SELECT 1 FROM {table} WHERE {pk} = %s)"]
+        probes.extend(f"EXISTS (SELECT 1 FROM {child} WHERE {column} = %s)"
+                      for child, column, _ in REFERENCES[table])
+        _queries[key] = "SELECT " + ", ".join(probes)
+    return _queries[key]
+
+
+# Returns (exists, message) where message explains the first dependency that
+# blocks the delete, or None if the row can be deleted
+def check_delete(cursor, table, pk, value):
+    references = REFERENCES[table]
+    cursor.execute(_dependency_query(table, pk), (value,) * (len(references) + 1))
+    row = cursor.fetchone()
+
+    if not row[0]:
+        return False, None
+    for (_, _, message), found in zip(references, row[1:]):
+        if found:
+            return True, message
+    return True, None
@@ -0,0 +1,191 @@
+import heapq
+import math
+import threading
+import time
+
+EARTH_RADIUS_KM = 6371.0
+
+
+class GeoError(ValueError):
+    pass
+
+
+def parse_coordinate(value, name, bound):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise GeoError(f"Invalid {name}: {value}")
+    if not -bound <= number <= bound:
+        raise GeoError(f"{name} must be between -{bound} and {bound}")
+    return number
+
+
+# Fill in coordinates from the Gazetteer for camps that have none, by
+# location name (all camps when camp_ids is None)
+def geocode(cursor, camp_ids=None):
+    query = """
+        UPDATE ReliefCamp
+        SET latitude = (SELECT g.latitude FROM Gazetteer g WHERE g.name = ReliefCamp.location),
+            longitude = (SELECT g.longitude FROM Gazetteer g WHERE g.name = ReliefCamp.location)
+        WHERE latitude IS NULL
+    """
+    params = ()
+    if camp_ids is not None:
+        if not camp_ids:
+            return
+        query += f" AND camp_id IN ({', '.join(['%s'] * len(camp_ids))})"
+        params = tuple(camp_ids)
+    cursor.execute(query, params)
+
+
+def lookup(cursor, name):
+    cursor.execute("SELECT latitude, longitude FROM Gazetteer WHERE name = %s", (name,))
+    row = cursor.fetchone()
+    return (float(row[0]), float(row[1])) if row else None
+
+
+# Point on the unit sphere; straight-line distance between two of them grows
+# with the great-circle distance, so a 3-d KD-tree finds the nearest camps
+def to_xyz(latitude, longitude):
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def chord_to_km(squared_chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(squared_chord) / 2))
+
+
+# Static KD-tree over a list of points, stored implicitly: the node for
+# points[lo:hi] is points[(lo + hi) // 2], split on axes[(lo + hi) // 2]
+class KDTree:
+    def __init__(self, points):
+        self.order = list(range(len(points)))
+        self.points = list(points)
+        self.axes = [0] * len(points)
+        self._build(0, len(points))
+        self.points = [self.points[i] for i in self.order]
+
+    def _build(self, lo, hi):
+        if hi - lo <= 1:
+            return
+        items = self.order[lo:hi]
+        # Split on the axis where the points are most spread out
+        axis = max(range(3), key=lambda a: max(self.points[i][a] for i in items)
+                   - min(self.points[i][a] for i in items))
+        items.sort(key=lambda i: self.points[i][axis])
+        self.order[lo:hi] = items
+        mid = (lo + hi) // 2
+        self.axes[mid] = axis
+        self._build(lo, mid)
+        self._build(mid + 1, hi)
+
+    # The k points nearest to `query` for which accept(position) is true, as
+    # [(squared distance, position in self.order)] nearest first
+    def nearest(self, query, k, accept):
+        best = []  # max-heap of (-squared distance, position)
+        stack = [(0, len(self.points))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            point = self.points[mid]
+            dx, dy, dz = query[0] - point[0], query[1] - point[1], query[2] - point[2]
+            distance = dx * dx + dy * dy + dz * dz
+            if accept(mid) and (len(best) < k or distance < -best[0][0]):
+                if len(best) == k:
+                    heapq.heapreplace(best, (-distance, mid))
+                else:
+                    heapq.heappush(best, (-distance, mid))
+            if hi - lo == 1:
+                continue
+            diff = query[self.axes[mid]] - point[self.axes[mid]]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            # Visit the near side first (pushed last); the far side only if
+            # the splitting plane is closer than the worst result so far
+            if len(best) < k or diff * diff < -best[0][0]:
+                stack.append(far)
+            stack.append(near)
+        return sorted((-negative, position) for negative, position in best)
+
+
+# In-memory spatial index of camps with coordinates, and their free
+# capacity. The tree is rebuilt after camp writes (invalidate()); free
+# capacity is reloaded from CampStats at most every `occupancy_refresh`
+# seconds, so it can lag victim writes by that long.
+class CampLocator:
+    # connect: zero-argument callable returning a DB connection (e.g. the pool)
+    def __init__(self, connect, occupancy_refresh=5):
+        self._connect = connect
+        self.occupancy_refresh = occupancy_refresh
+        self._tree = None
+        self._dirty = True
+        self._camps = []
+        self._positions = {}
+        self._free = []
+        self._occupancy_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._dirty = True
+
+    def _build(self, cursor):
+        cursor.execute("""
+            SELECT camp_id, camp_name, location, capacity, latitude, longitude
+            FROM ReliefCamp WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        """)
+        rows = cursor.fetchall()
+        tree = KDTree([to_xyz(float(row[4]), float(row[5])) for row in rows])
+        self._camps = [rows[i] for i in tree.order]
+        self._positions = {camp[0]: position for position, camp in enumerate(self._camps)}
+        self._tree = tree
+
+    def _load_occupancy(self, cursor):
+        cursor.execute("SELECT camp_id, victims FROM CampStats")
+        free = [camp[3] for camp in self._camps]
+        for camp_id, victims in cursor.fetchall():
+            position = self._positions.get(camp_id)
+            if position is not None:
+                free[position] -= victims
+        self._free = free
+        self._occupancy_at = time.monotonic()
+
+    def _refresh(self):
+        if not self._dirty and time.monotonic() - self._occupancy_at <= self.occupancy_refresh:
+            return
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            with self._lock:
+                if self._dirty:
+                    self._build(cursor)
+                    self._dirty = False
+                    self._occupancy_at = 0.0
+                if time.monotonic() - self._occupancy_at > self.occupancy_refresh:
+                    self._load_occupancy(cursor)
+        finally:
+            cursor.close()
+            conn.close()
+
+    # The k camps nearest to (latitude, longitude) with at least min_free
+    # places left, nearest first
+    def nearest(self, latitude, longitude, k=5, min_free=1):
+        self._refresh()
+        with self._lock:
+            tree, camps, free = self._tree, self._camps, self._free
+        found = tree.nearest(to_xyz(latitude, longitude), k, lambda position: free[position] >= min_free)
+        results = []
+        for squared_chord, position in found:
+            camp_id, camp_name, location, capacity, camp_latitude, camp_longitude = camps[position]
+            results.append({
+                "camp_id": camp_id,
+                "camp_name": camp_name,
+                "location": location,
+                "capacity": capacity,
+                "free": free[position],
+                "latitude": float(camp_latitude),
+                "longitude": float(camp_longitude),
+                "distance_km": round(chord_to_km(squared_chord), 2)
+            })
+        return results
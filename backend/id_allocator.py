@@ -0,0 +1,82 @@
+import threading
+
+
+# Hands out primary keys from the IdSequence table.
+#
+# Each process reserves a block of ids with a single atomic UPDATE and then
+# serves them from memory, so inserts never scan the target table and two
+# requests can never be given the same id. Ids left in a block when the
+# process stops are simply skipped.
+class IdAllocator:
+    # connect: zero-argument callable returning a DB connection (e.g. the pool)
+    # sequences: {sequence name: (table, primary key column, first id)}
+    # block_size: ids reserved per round trip to the database
+    def __init__(self, connect, sequences, block_size=100):
+        self._connect = connect
+        self._sequences = sequences
+        self.block_size = block_size
+        self._blocks = {}
+        self._lock = threading.Lock()
+
+    def next_id(self, name):
+        return self.allocate(name, 1)[0]
+
+    # Return a range of `count` consecutive ids for the sequence
+    def allocate(self, name, count):
+        if name not in self._sequences:
+            raise KeyError(f"Unknown id sequence: {name}")
+        if count < 1:
+            raise ValueError("count must be at least 1")
+
+        with self._lock:
+            next_id, end = self._blocks.get(name, (0, 0))
+            if end - next_id >= count:
+                self._blocks[name] = (next_id + count, end)
+                return range(next_id, next_id + count)
+
+            # Large requests (bulk inserts) get a block of exactly their size;
+            # otherwise refill the local block
+            if count >= self.block_size:
+                start = self._reserve(name, count)
+                return range(start, start + count)
+
+            start = self._reserve(name, self.block_size)
+            self._blocks[name] = (start + count, start + self.block_size)
+            return range(start, start + count)
+
+    def _reserve(self, name, count):
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            # LAST_INSERT_ID(expr) makes the incremented value readable on this
+            # connection without a second locking read
+            cursor.execute(
+                "UPDATE IdSequence SET next_id = LAST_INSERT_ID(next_id + %s) WHERE name = %s",
+                (count, name)
+            )
+            if cursor.rowcount == 0:
+                self._create_sequence(cursor, name)
+                cursor.execute(
+                    "UPDATE IdSequence SET next_id = LAST_INSERT_ID(next_id + %s) WHERE name = %s",
+                    (count, name)
+                )
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            end = cursor.fetchone()[0]
+            conn.commit()
+            return end - count
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    # First use of a sequence on a database that predates IdSequence: start
+    # after the highest existing key (the only time the table is scanned)
+    def _create_sequence(self, cursor, name):
+        table, pk, first_id = self._sequences[name]
+        cursor.execute(
+            f"INSERT IGNORE INTO IdSequence (name, next_id) "
+            f"SELECT %s, COALESCE(MAX({pk}) + 1, %s) FROM {table}",
+            (name, first_id)
+        )
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import secrets
+import time
+from datetime import datetime, timedelta
+
+from flask import Response, current_app, g, jsonify, request
+
+# Idempotency keys for write requests (migration 0009).
+#
+# A client sends "Idempotency-Key: <unique string>" with a POST, PUT or
+# DELETE. The first request with a key claims it and runs; its status and
+# body are stored with the key. A retry with the same key gets the stored
+# response back (with "Idempotent-Replayed: true") without running the
+# handler again, so a registration retried after a timeout does not create a
+# second victim. Keys expire after `ttl` seconds.
+#
+# Only completed responses below 500 are stored. A server error releases the
+# key, so the request can be retried. A claim whose request never finished
+# (the process died) can be taken over after `lease` seconds.
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 100
+METHODS = ('POST', 'PUT', 'DELETE')
+
+# Outcomes of claiming a key
+CLAIMED = 'claimed'          # the caller runs the request
+REPLAY = 'replay'            # finished before: (status, content type, body)
+IN_PROGRESS = 'in_progress'  # another request with the key is still running
+MISMATCH = 'mismatch'        # the key was used for a different request
+
+
+class IdempotencyError(ValueError):
+    pass
+
+
+def validate_key(key):
+    if not isinstance(key, str) or not key.strip():
+        raise IdempotencyError(f"{HEADER} must be a non-empty string")
+    if len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyError(f"{HEADER} must be at most {MAX_KEY_LENGTH} characters")
+    return key
+
+
+# Hash of what a request does, so a key reused for another request is refused
+def fingerprint(method, path, payload):
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(f"{method} {path} {body}".encode()).hexdigest()
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class IdempotencyStore:
+    CHUNK_SIZE = 1000
+    PRUNE_INTERVAL = 3600
+
+    # connect: zero-argument callable returning a DB connection (e.g. the pool)
+    def __init__(self, connect, ttl=86400, lease=60):
+        self._connect = connect
+        self.ttl = ttl
+        self.lease = lease
+        self._pruned_at = 0.0
+
+    # Claim keys for one caller. entries: {key: fingerprint}.
+    # Returns (owner, {key: (outcome, stored response or None)}); owner
+    # identifies the caller's claims to complete() and release().
+    def claim(self, entries):
+        owner = secrets.token_hex(16)
+        now = datetime.now()
+        results = {}
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            if time.monotonic() - self._pruned_at > self.PRUNE_INTERVAL:
+                cursor.execute("DELETE FROM IdempotencyKey WHERE expires_at < %s", (now,))
+                self._pruned_at = time.monotonic()
+            for keys in _chunks(list(entries), self.CHUNK_SIZE):
+                placeholders = ', '.join(['%s'] * len(keys))
+                # Expired keys and abandoned claims are free to take
+                cursor.execute(
+                    f"DELETE FROM IdempotencyKey WHERE idem_key IN ({placeholders}) "
+                    f"AND (expires_at < %s OR (status IS NULL AND created_at < %s))",
+                    tuple(keys) + (now, now - timedelta(seconds=self.lease))
+                )
+                cursor.executemany(
+                    "INSERT IGNORE INTO IdempotencyKey (idem_key, owner, request_hash, created_at, expires_at) "
+                    "VALUES (%s, %s, %s, %s, %s)",
+                    [(key, owner, entries[key], now, now + timedelta(seconds=self.ttl)) for key in keys]
+                )
+                cursor.execute(
+                    f"SELECT idem_key, owner, request_hash, status, content_type, body "
+                    f"FROM IdempotencyKey WHERE idem_key IN ({placeholders})", tuple(keys)
+                )
+                for key, key_owner, request_hash, status, content_type, body in cursor.fetchall():
+                    if key_owner == owner:
+                        results[key] = (CLAIMED, None)
+                    elif request_hash != entries[key]:
+                        results[key] = (MISMATCH, None)
+                    elif status is None:
+                        results[key] = (IN_PROGRESS, None)
+                    else:
+                        results[key] = (REPLAY, (status, content_type, bytes(body or b'')))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+        return owner, results
+
+    # Store the responses of claimed keys: [(key, status, content type, body bytes)]
+    def complete(self, owner, responses):
+        if not responses:
+            return
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(
+                "UPDATE IdempotencyKey SET status = %s, content_type = %s, body = %s "
+                "WHERE idem_key = %s AND owner = %s",
+                [(status, content_type, body, key, owner) for key, status, content_type, body in responses]
+            )
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    # Give claimed keys back (the request failed and may be retried)
+    def release(self, owner, keys):
+        keys = list(keys)
+        if not keys:
+            return
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            for chunk in _chunks(keys, self.CHUNK_SIZE):
+                cursor.execute(
+                    f"DELETE FROM IdempotencyKey WHERE idem_key IN ({', '.join(['%s'] * len(chunk))}) AND owner = %s",
+                    tuple(chunk) + (owner,)
+                )
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    # Response for a key that was not claimed
+    @staticmethod
+    def response_for(outcome, stored):
+        if outcome == REPLAY:
+            status, content_type, body = stored
+            response = Response(body, status=status, content_type=content_type)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        if outcome == IN_PROGRESS:
+            response = jsonify({"success": False,
+                                "message": f"A request with this {HEADER} is still being processed"})
+            response.status_code = 409
+            response.headers['Retry-After'] = '1'
+            return response
+        return jsonify({"success": False, "message": f"{HEADER} was already used for a different request"}), 422
+
+    # Apply keys to every POST/PUT/DELETE route except the `exempt` endpoints
+    # (which handle keys themselves)
+    def install(self, app, exempt=()):
+        self.exempt = set(exempt)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        key = request.headers.get(HEADER)
+        if key is None or request.method not in METHODS or request.endpoint in self.exempt:
+            return None
+        try:
+            validate_key(key)
+        except IdempotencyError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        if request.is_json:
+            payload = request.get_json(silent=True)
+        else:
+            # Uploaded files are compared by name only
+            payload = [request.form.to_dict(flat=False), sorted(request.files)]
+        owner, results = self.claim({key: fingerprint(request.method, request.path, payload)})
+        outcome, stored = results[key]
+        if outcome != CLAIMED:
+            return self.response_for(outcome, stored)
+        g.idempotency_claim = (owner, key)
+        return None
+
+    def _after_request(self, response):
+        claim = g.pop('idempotency_claim', None)
+        if claim is None:
+            return response
+        owner, key = claim
+        if response.status_code >= 500 or response.is_streamed:
+            self.release(owner, [key])
+            return response
+        try:
+            self.complete(owner, [(key, response.status_code, response.content_type, response.get_data())])
+        except Exception as e:
+            # The request itself ran: send its response, and free the key
+            # rather than leave it claimed until the lease runs out
+            current_app.logger.warning("Could not store the response for %s %s: %s", HEADER, key, e)
+            try:
+                self.release(owner, [key])
+            except Exception:
+                pass  # the claim lapses after `lease` seconds
+        return response
+
+    # The handler raised instead of returning a response
+    def _teardown_request(self, exc):
+        claim = g.pop('idempotency_claim', None)
+        if claim is not None:
+            try:
+                self.release(claim[0], [claim[1]])
+            except Exception:
+                pass  # the claim lapses after `lease` seconds
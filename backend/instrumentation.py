@@ -0,0 +1,345 @@
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from flask import g, request
+
+from serializer import FastJSONProvider
+
+# Request duration histogram buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Statistics of the request being handled on this thread (None outside requests)
+_current = ContextVar('request_stats', default=None)
+
+
+# SELECT ... FROM <table> ... WHERE [alias.]<column> = %s
+_SINGLE_KEY_LOOKUP = re.compile(
+    r'SELECT .*? FROM (?P<table>\w+)\b.* WHERE (?:(?P<alias>\w+)\.)?(?P<column>\w+) = %s$', re.IGNORECASE)
+
+
+# (table, column, value) a single-id SELECT looks up, or None for other
+# statements. An aliased column is resolved to the table it was joined as.
+def _lookup_key(statement, params):
+    if not (isinstance(params, (tuple, list)) and len(params) == 1 and isinstance(params[0], int)):
+        return None
+    lookup = _SINGLE_KEY_LOOKUP.match(statement)
+    if not lookup:
+        return None
+    table = lookup['table']
+    if lookup['alias']:
+        joined = re.search(r'(?:FROM|JOIN) (\w+) (?:AS )?' + re.escape(lookup['alias']) + r'\b',
+                           statement, re.IGNORECASE)
+        table = joined.group(1) if joined else lookup['alias']
+    return table.lower(), lookup['column'].lower(), params[0]
+
+
+def _normalize(statement):
+    return re.sub(r'\s+', ' ', statement).strip()
+
+
+# What one request did: every statement with its duration, rows fetched and
+# time spent serializing JSON
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []  # (statement, params, seconds)
+        self.rows = 0
+        self.serialize_time = 0.0
+
+    @property
+    def query_time(self):
+        return sum(seconds for _, _, seconds in self.queries)
+
+    # N+1 patterns in this request, as [(kind, statement)]:
+    #   repeated: the same statement run `threshold` or more times
+    #   same_key: different SELECTs looking up the same id in the same column
+    #             of the same table, i.e. one row read piecemeal where one
+    #             query would do
+    def n_plus_one(self, threshold):
+        found = []
+        counts = Counter(statement for statement, _, _ in self.queries)
+        found.extend(('repeated', statement) for statement, count in counts.items() if count >= threshold)
+
+        by_key = defaultdict(set)
+        for statement, params, _ in self.queries:
+            key = _lookup_key(statement, params)
+            if key:
+                by_key[key].add(statement)
+        for statements in by_key.values():
+            if len(statements) > 1:
+                found.extend(('same_key', statement) for statement in sorted(statements))
+        return found
+
+
+# Cursor that times execute()/executemany() and counts fetched rows into the
+# current request's RequestStats
+class InstrumentedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._count(1)
+            yield row
+
+    def _record(self, method, statement, params):
+        started = time.perf_counter()
+        try:
+            return method(statement, params) if params is not None else method(statement)
+        finally:
+            stats = _current.get()
+            if stats is not None:
+                stats.queries.append((_normalize(statement), params, time.perf_counter() - started))
+
+    def _count(self, rows):
+        stats = _current.get()
+        if stats is not None:
+            stats.rows += rows
+
+    def execute(self, statement, params=None):
+        return self._record(self._cursor.execute, statement, params)
+
+    def executemany(self, statement, rows):
+        return self._record(self._cursor.executemany, statement, rows)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._count(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count(len(rows))
+        return rows
+
+
+# Connection whose cursors are instrumented; everything else is passed through
+class InstrumentedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+    def prepared_cursor(self, statement):
+        return InstrumentedCursor(self._conn.prepared_cursor(statement))
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# JSON provider that adds the time spent encoding to the current request
+class TimedJSONProvider(FastJSONProvider):
+    def encode(self, obj):
+        started = time.perf_counter()
+        try:
+            return super().encode(obj)
+        finally:
+            stats = _current.get()
+            if stats is not None:
+                stats.serialize_time += time.perf_counter() - started
+
+
+# Samples one thread's stack every `interval` seconds. folded() returns the
+# samples in the collapsed format flame graph tools read ("a;b;c 12")
+class SamplingProfiler:
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class _Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+def _labels(**labels):
+    text = ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                    for name, value in labels.items())
+    return '{' + text + '}'
+
+
+# Per-endpoint request, query and serialization metrics, exported in the
+# Prometheus text format. Endpoints are labelled by URL rule, so
+# /api/victims/1 and /api/victims/2 share "/api/victims/<int:victim_id>".
+#   n_plus_one_threshold: runs of one statement in a request reported as N+1
+#   profiling: allow ?profile=1 / X-Profile: 1 to return a stack sample dump
+class Instrumentation:
+    def __init__(self, n_plus_one_threshold=3, profiling=False, profile_interval=0.001, logger=None):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.profiling = profiling
+        self.profile_interval = profile_interval
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._requests = Counter()           # (endpoint, method, status)
+        self._durations = defaultdict(_Histogram)
+        self._queries = Counter()
+        self._query_time = Counter()
+        self._rows = Counter()
+        self._serialize_time = Counter()
+        self._n_plus_one = Counter()         # (endpoint, method, kind)
+
+    def wrap(self, conn):
+        return InstrumentedConnection(conn)
+
+    def install(self, app):
+        self.logger = self.logger or app.logger
+        app.json = TimedJSONProvider(app)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _profile_requested(self):
+        return self.profiling and (request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1')
+
+    def _before_request(self):
+        stats = RequestStats()
+        g.request_stats = stats
+        _current.set(stats)
+        if self._profile_requested():
+            g.profiler = SamplingProfiler(threading.get_ident(), self.profile_interval)
+            g.profiler.start()
+
+    def _after_request(self, response):
+        stats = g.get('request_stats')
+        if stats is None:
+            return response
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        method = request.method
+
+        profiler = g.pop('profiler', None)
+        if profiler is not None and response.is_streamed:
+            # Streamed bodies (exports, the change stream) are sent as they are
+            # produced and the change stream never ends: they are not profiled
+            profiler.stop()
+            response.headers['X-Profile-Skipped'] = 'streamed response'
+        elif profiler is not None:
+            profiler.stop()
+            self._finish(stats, endpoint, method, response.status_code)
+            _current.set(None)
+            profiled = response.__class__(profiler.folded(), mimetype='text/plain')
+            profiled.headers['X-Profile-Samples'] = str(sum(profiler.samples.values()))
+            profiled.headers['X-Profiled-Status'] = str(response.status_code)
+            return profiled
+
+        response.headers['Server-Timing'] = (
+            f'db;dur={stats.query_time * 1000:.2f};desc="{len(stats.queries)} queries", '
+            f'app;dur={(time.perf_counter() - stats.started) * 1000:.2f}'
+        )
+        if response.is_streamed:
+            # Streamed bodies query while they are sent; count them when done
+            response.call_on_close(lambda: self._finish(stats, endpoint, method, response.status_code))
+        else:
+            self._finish(stats, endpoint, method, response.status_code)
+            _current.set(None)
+        return response
+
+    def _finish(self, stats, endpoint, method, status):
+        duration = time.perf_counter() - stats.started
+        patterns = stats.n_plus_one(self.n_plus_one_threshold)
+        with self._lock:
+            self._requests[(endpoint, method, status)] += 1
+            self._durations[(endpoint, method)].observe(duration)
+            self._queries[(endpoint, method)] += len(stats.queries)
+            self._query_time[(endpoint, method)] += stats.query_time
+            self._rows[(endpoint, method)] += stats.rows
+            self._serialize_time[(endpoint, method)] += stats.serialize_time
+            for kind, _ in patterns:
+                self._n_plus_one[(endpoint, method, kind)] += 1
+        if patterns and self.logger is not None:
+            self.logger.warning("N+1 query pattern in %s %s: %s", method, endpoint,
+                                '; '.join(f"[{kind}] {statement}" for kind, statement in patterns))
+
+    # Prometheus text exposition; gauges: {metric name: {label dict tuple or (): value}}
+    def render(self, gauges=None):
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+
+        with self._lock:
+            family('http_requests_total', 'counter', 'Requests handled, by endpoint, method and status.',
+                   [f"http_requests_total{_labels(endpoint=e, method=m, status=s)} {count}"
+                    for (e, m, s), count in sorted(self._requests.items())])
+            samples = []
+            for (e, m), histogram in sorted(self._durations.items()):
+                for bound, count in zip(DURATION_BUCKETS, histogram.buckets):
+                    samples.append(f"http_request_duration_seconds_bucket{_labels(endpoint=e, method=m, le=bound)} {count}")
+                samples.append(f"http_request_duration_seconds_bucket{_labels(endpoint=e, method=m, le='+Inf')} "
+                               f"{histogram.count}")
+                samples.append(f"http_request_duration_seconds_sum{_labels(endpoint=e, method=m)} {histogram.sum:.6f}")
+                samples.append(f"http_request_duration_seconds_count{_labels(endpoint=e, method=m)} {histogram.count}")
+            family('http_request_duration_seconds', 'histogram', 'Wall time per request.', samples)
+            for name, kind, help_text, values, fmt in (
+                ('db_queries_total', 'counter', 'SQL statements executed.', self._queries, '{}'),
+                ('db_query_seconds_total', 'counter', 'Time spent in cursor.execute.', self._query_time, '{:.6f}'),
+                ('db_rows_fetched_total', 'counter', 'Rows fetched from cursors.', self._rows, '{}'),
+                ('json_serialize_seconds_total', 'counter', 'Time spent serializing JSON.', self._serialize_time,
+                 '{:.6f}'),
+            ):
+                family(name, kind, help_text, [f"{name}{_labels(endpoint=e, method=m)} {fmt.format(value)}"
+                                               for (e, m), value in sorted(values.items())])
+            family('db_n_plus_one_requests_total', 'counter', 'Requests showing an N+1 query pattern.',
+                   [f"db_n_plus_one_requests_total{_labels(endpoint=e, method=m, kind=k)} {count}"
+                    for (e, m, k), count in sorted(self._n_plus_one.items())])
+
+        for name, values in (gauges or {}).items():
+            family(name, 'gauge', name.replace('_', ' ') + '.',
+                   [f"{name}{_labels(**dict(labels)) if labels else ''} {value}" for labels, value in values.items()])
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,258 @@
+import re
+import threading
+import time
+import unicodedata
+from itertools import islice
+from datetime import date
+
+# Score weights; components that cannot be computed (no age given, no date of
+# birth on record) are left out and the rest are scaled back up to 1
+NAME_WEIGHT = 0.6
+AGE_WEIGHT = 0.2
+LOCATION_WEIGHT = 0.2
+# An age difference of this many years or more scores 0
+AGE_TOLERANCE = 10
+
+SOUNDEX_CODES = {}
+for letters, code in (('bfpv', '1'), ('cgjkqsxz', '2'), ('dt', '3'), ('l', '4'), ('mn', '5'), ('r', '6')):
+    for letter in letters:
+        SOUNDEX_CODES[letter] = code
+
+
+# Lower-case ASCII words, accents and punctuation removed
+def tokenize(text):
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode().lower()
+    return re.findall(r'[a-z]+', text)
+
+
+# American Soundex: first letter + three digits for the following consonant
+# groups, so "Sharma", "Sharmaa" and "Sherma" all become S650
+def soundex(word):
+    code = word[0].upper()
+    previous = SOUNDEX_CODES.get(word[0], '')
+    for letter in word[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def trigrams(tokens):
+    text = '  ' + ' '.join(tokens) + ' '
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# Dice coefficient of the two names' trigram sets, independent of word order
+def name_similarity(query_grams, tokens):
+    grams = trigrams(sorted(tokens))
+    if not query_grams or not grams:
+        return 0.0
+    return 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+
+
+def age_at(date_of_birth, on):
+    return on.year - date_of_birth.year - ((on.month, on.day) < (date_of_birth.month, date_of_birth.day))
+
+
+# In-memory index of registered victims for matching missing person reports.
+#
+# Victims are bucketed by the Soundex key of every name part. A match looks
+# up the buckets for the reported name, so only victims sharing a phonetic
+# name part are scored (by trigram name similarity, age and location), never
+# the whole table. The index is built on first use and rebuilt in the
+# background every `refresh_interval` seconds; handlers that write victims
+# call invalidate() so those rows are reloaded before the next match.
+class VictimIndex:
+    # connect: zero-argument callable returning a DB connection (e.g. the pool)
+    # max_candidates: most victims scored per match
+    def __init__(self, connect, refresh_interval=300, max_candidates=2000, chunk_size=10000):
+        self._connect = connect
+        self.refresh_interval = refresh_interval
+        self.max_candidates = max_candidates
+        self.chunk_size = chunk_size
+        self._victims = None
+        self._postings = {}
+        self._dirty = set()
+        self._built_at = 0.0
+        self._rebuilding = False
+        # Victims reloaded while a rebuild is reading the table; the rebuilt
+        # index may predate their change, so they are reloaded again after it
+        self._touched = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    QUERY = """
+        SELECT v.victim_id, v.first_name, v.last_name, v.date_of_birth, v.address,
+               c.location, c.camp_name
+        FROM VictimSurvivor v
+        LEFT JOIN ReliefCamp c ON v.camp_id = c.camp_id
+    """
+
+    # victim_id -> (name tokens, date of birth, location tokens)
+    @staticmethod
+    def _entry(row):
+        _, first_name, last_name, date_of_birth, address, camp_location, camp_name = row
+        if isinstance(date_of_birth, str):
+            date_of_birth = date.fromisoformat(date_of_birth)
+        location = set(tokenize(address)) | set(tokenize(camp_location)) | set(tokenize(camp_name))
+        return tuple(tokenize(first_name) + tokenize(last_name)), date_of_birth, frozenset(location)
+
+    @staticmethod
+    def _add(victims, postings, victim_id, entry):
+        victims[victim_id] = entry
+        for key in {soundex(token) for token in entry[0]}:
+            postings.setdefault(key, set()).add(victim_id)
+
+    @staticmethod
+    def _remove(victims, postings, victim_id):
+        entry = victims.pop(victim_id, None)
+        if entry is None:
+            return
+        for key in {soundex(token) for token in entry[0]}:
+            bucket = postings.get(key)
+            if bucket is not None:
+                bucket.discard(victim_id)
+                if not bucket:
+                    del postings[key]
+
+    def _build(self):
+        victims, postings = {}, {}
+        with self._lock:
+            self._touched = set()
+        conn = self._connect()
+        cursor = conn.cursor(buffered=False)
+        try:
+            cursor.execute(self.QUERY)
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    self._add(victims, postings, row[0], self._entry(row))
+        except Exception:
+            with self._lock:
+                self._touched = None
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+        with self._lock:
+            self._victims, self._postings = victims, postings
+            self._built_at = time.monotonic()
+            self._dirty |= self._touched
+            self._touched = None
+
+    def _background_rebuild(self):
+        try:
+            with self._build_lock:
+                self._build()
+        finally:
+            self._rebuilding = False
+
+    def _ensure_built(self):
+        if self._victims is None:
+            with self._build_lock:
+                if self._victims is None:
+                    self._build()
+        elif time.monotonic() - self._built_at > self.refresh_interval and not self._rebuilding:
+            self._rebuilding = True
+            threading.Thread(target=self._background_rebuild, daemon=True).start()
+
+    # Mark victims as changed (inserted, updated or deleted); they are
+    # reloaded from the database before the next match
+    def invalidate(self, *victim_ids):
+        with self._lock:
+            self._dirty.update(victim_ids)
+
+    def _reload_dirty(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            if self._touched is not None:
+                self._touched |= dirty
+        if not dirty:
+            return
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            placeholders = ', '.join(['%s'] * len(dirty))
+            cursor.execute(self.QUERY + f" WHERE v.victim_id IN ({placeholders})", tuple(dirty))
+            rows = cursor.fetchall()
+        except Exception:
+            with self._lock:
+                self._dirty |= dirty
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+        with self._lock:
+            for victim_id in dirty:
+                self._remove(self._victims, self._postings, victim_id)
+            for row in rows:
+                self._add(self._victims, self._postings, row[0], self._entry(row))
+
+    # Victims sharing every phonetic name part with the query first, then
+    # those sharing some of them (rarest parts first), at most max_candidates
+    def _candidates(self, keys):
+        buckets = sorted((self._postings.get(key, set()) for key in keys), key=len)
+        if not buckets[-1]:
+            return []
+        candidates = set.intersection(*buckets) if buckets[0] else set()
+        if len(candidates) >= self.max_candidates:
+            return list(islice(candidates, self.max_candidates))
+
+        for bucket in buckets:
+            for victim_id in bucket:
+                candidates.add(victim_id)
+                if len(candidates) >= self.max_candidates:
+                    return list(candidates)
+        return list(candidates)
+
+    # Rank registered victims against a reported name.
+    #   age: the missing person's approximate age on `reported_on` (optional)
+    #   location: where they were last seen (optional)
+    # Returns [(victim_id, score, {"name": ..., "age": ..., "location": ...})]
+    # best first, scores between 0 and 1.
+    def match(self, name, age=None, location=None, reported_on=None, limit=10, min_score=0.0):
+        tokens = tokenize(name)
+        if not tokens:
+            return []
+        self._ensure_built()
+        self._reload_dirty()
+
+        query_grams = trigrams(sorted(tokens))
+        location_tokens = set(tokenize(location))
+        reported_on = reported_on or date.today()
+        keys = {soundex(token) for token in tokens}
+
+        results = []
+        with self._lock:
+            for victim_id in self._candidates(keys):
+                name_tokens, date_of_birth, victim_location = self._victims[victim_id]
+                components = {"name": round(name_similarity(query_grams, name_tokens), 4)}
+                total = NAME_WEIGHT * components["name"]
+                weight = NAME_WEIGHT
+
+                if age is not None and date_of_birth is not None:
+                    difference = abs(age_at(date_of_birth, reported_on) - age)
+                    components["age"] = round(max(0.0, 1 - difference / AGE_TOLERANCE), 4)
+                    total += AGE_WEIGHT * components["age"]
+                    weight += AGE_WEIGHT
+
+                if location_tokens:
+                    overlap = len(location_tokens & victim_location) / len(location_tokens)
+                    components["location"] = round(overlap, 4)
+                    total += LOCATION_WEIGHT * overlap
+                    weight += LOCATION_WEIGHT
+
+                score = total / weight
+                if score >= min_score:
+                    results.append((victim_id, round(score, 4), components))
+
+        results.sort(key=lambda result: (-result[1], result[0]))
+        return results[:limit]
@@ -0,0 +1,317 @@
+# Versioned schema migrations.
+#
+# Migrations live in backend/migrations as NNNN_name.up.sql / NNNN_name.down.sql
+# pairs and are applied in version order. Applied versions are recorded in the
+# SchemaVersion table.
+#
+#   python migrate.py status            # list applied and pending migrations
+#   python migrate.py up [--to N]       # apply pending migrations (up to version N)
+#   python migrate.py down [--to N]     # roll back the last migration (or down to version N)
+#   python migrate.py check-plans       # EXPLAIN the API queries, fail on scans, sorts or wrong indexes
+
+import argparse
+import os
+import re
+import sys
+from datetime import datetime
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.(up|down)\.sql$')
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    def __init__(self, version, name):
+        self.version = version
+        self.name = name
+        self.up_path = None
+        self.down_path = None
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        migration = migrations.setdefault(version, Migration(version, match.group(2)))
+        if migration.name != match.group(2):
+            raise MigrationError(f"Version {version} is used by two migrations")
+        setattr(migration, f"{match.group(3)}_path", os.path.join(directory, filename))
+
+    for migration in migrations.values():
+        if migration.up_path is None or migration.down_path is None:
+            raise MigrationError(f"Migration {migration.version:04d}_{migration.name} needs both an up and a down script")
+    return [migrations[version] for version in sorted(migrations)]
+
+
+# Split a script into statements: drop comment lines, split on ';' at line end
+def split_statements(sql):
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    statements = re.split(r';\s*$', '\n'.join(lines), flags=re.MULTILINE)
+    return [statement.strip() for statement in statements if statement.strip()]
+
+
+def ensure_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS SchemaVersion (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL
+        )
+    """)
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM SchemaVersion ORDER BY version")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def run_script(conn, cursor, path):
+    with open(path) as script:
+        for statement in split_statements(script.read()):
+            cursor.execute(statement)
+    conn.commit()
+
+
+def migrate_up(conn, target=None):
+    cursor = conn.cursor()
+    try:
+        ensure_version_table(cursor)
+        applied = applied_versions(cursor)
+        for migration in load_migrations():
+            if migration.version in applied or (target is not None and migration.version > target):
+                continue
+            print(f"Applying {migration.version:04d}_{migration.name}")
+            # MySQL commits DDL implicitly, so each migration is recorded as
+            # soon as its script has run
+            run_script(conn, cursor, migration.up_path)
+            cursor.execute(
+                "INSERT INTO SchemaVersion (version, name, applied_at) VALUES (%s, %s, %s)",
+                (migration.version, migration.name, datetime.now())
+            )
+            conn.commit()
+    finally:
+        cursor.close()
+
+
+def migrate_down(conn, target=None):
+    cursor = conn.cursor()
+    try:
+        ensure_version_table(cursor)
+        applied = applied_versions(cursor)
+        to_revert = [m for m in reversed(load_migrations()) if m.version in applied]
+        if target is None:
+            to_revert = to_revert[:1]
+        else:
+            to_revert = [m for m in to_revert if m.version > target]
+
+        for migration in to_revert:
+            print(f"Reverting {migration.version:04d}_{migration.name}")
+            run_script(conn, cursor, migration.down_path)
+            cursor.execute("DELETE FROM SchemaVersion WHERE version = %s", (migration.version,))
+            conn.commit()
+    finally:
+        cursor.close()
+
+
+def show_status(conn):
+    cursor = conn.cursor()
+    try:
+        ensure_version_table(cursor)
+        applied = applied_versions(cursor)
+    finally:
+        cursor.close()
+    for migration in load_migrations():
+        state = 'applied' if migration.version in applied else 'pending'
+        print(f"{migration.version:04d}_{migration.name:<40} {state}")
+
+
+# What the plan of one API query must look like.
+#   indexes: {table or alias: index names it may be read through}
+#   sorts: a filesort is expected, e.g. a range filter on another column than
+#          the primary key the pages are ordered by, or a relevance sort
+class PlanExpectation:
+    def __init__(self, indexes=None, sorts=False):
+        self.indexes = indexes or {}
+        self.sorts = sorts
+
+
+NO_SORT = PlanExpectation()
+
+# Index each list filter is read through, per list route. Equality filters
+# hit an index ending with the primary key, so their pages come out already
+# sorted; range and prefix filters sort their matches.
+def _filter_plans(**indexes):
+    return {arg: PlanExpectation(tables, sorts=arg not in ('location', 'camp_id'))
+            for arg, tables in indexes.items()}
+
+
+CAMP_FILTER_PLANS = _filter_plans(name_prefix={'ReliefCamp': ('idx_camp_name',)},
+                                  location={'ReliefCamp': ('idx_camp_location',)})
+CAMP_STATS_FILTER_PLANS = _filter_plans(name_prefix={'c': ('idx_camp_name',)},
+                                        location={'c': ('idx_camp_location',)})
+VICTIM_FILTER_PLANS = _filter_plans(camp_id={'v': ('idx_victim_camp',)},
+                                    name_prefix={'v': ('idx_victim_first_name', 'idx_victim_last_name')},
+                                    born_from={'v': ('idx_victim_dob',)},
+                                    born_to={'v': ('idx_victim_dob',)})
+MISSING_PERSON_FILTER_PLANS = _filter_plans(camp_id={'m': ('idx_missing_camp',)},
+                                            name_prefix={'m': ('idx_missing_name',)},
+                                            date_from={'m': ('idx_missing_reported',)},
+                                            date_to={'m': ('idx_missing_reported',)})
+INVENTORY_FILTER_PLANS = _filter_plans(camp_id={'i': ('idx_inventory_camp',)},
+                                       name_prefix={'i': ('idx_inventory_name',)},
+                                       date_from={'i': ('idx_inventory_received',)},
+                                       date_to={'i': ('idx_inventory_received',)})
+VOLUNTEER_FILTER_PLANS = _filter_plans(name_prefix={'v': ('idx_volunteer_first_name', 'idx_volunteer_last_name')},
+                                       camp_id={'va': ('idx_assignment_camp',)},
+                                       active_on={'va': ('idx_assignment_volunteer',)})
+
+
+# The queries the API actually runs, built the same way the routes build them,
+# as (label, query, params, PlanExpectation)
+def api_queries():
+    import app as relief_app
+    from changes import build_read_query
+    from dependencies import REFERENCES, _dependency_query
+    from pagination import build_keyset_query
+    from search import SEARCH_SOURCES, build_search_query
+    from tables import TABLES
+
+    list_routes = [
+        ('relief_camps', relief_app.RELIEF_CAMP_QUERY, 'camp_id', relief_app.RELIEF_CAMP_FILTERS,
+         CAMP_FILTER_PLANS),
+        ('relief_camps/stats', relief_app.CAMP_STATS_QUERY, 'c.camp_id', relief_app.RELIEF_CAMP_FILTERS,
+         CAMP_STATS_FILTER_PLANS),
+        ('victims', relief_app.VICTIM_QUERY, 'v.victim_id', relief_app.VICTIM_FILTERS, VICTIM_FILTER_PLANS),
+        ('missing_persons', relief_app.MISSING_PERSON_QUERY, 'm.report_id', relief_app.MISSING_PERSON_FILTERS,
+         MISSING_PERSON_FILTER_PLANS),
+        ('inventory', relief_app.INVENTORY_QUERY, 'i.item_id', relief_app.INVENTORY_FILTERS,
+         INVENTORY_FILTER_PLANS),
+        ('volunteers', relief_app.VOLUNTEER_QUERY, 'v.volunteer_id', relief_app.VOLUNTEER_FILTERS,
+         VOLUNTEER_FILTER_PLANS),
+    ]
+    sample_values = {'camp_id': '1', 'name_prefix': 'A', 'location': 'Delhi',
+                     'born_from': '1990-01-01', 'born_to': '2000-01-01', 'active_on': '2025-02-05',
+                     'date_from': '2024-01-01', 'date_to': '2025-01-01'}
+
+    queries = []
+    for name, base_query, pk, filters, filter_plans in list_routes:
+        queries.append((f"GET /api/{name}", *build_keyset_query(base_query, pk, filters, {'cursor': '1'})[:2],
+                        NO_SORT))
+        for arg in filters:
+            args = {'cursor': '1', arg: sample_values[arg]}
+            queries.append((f"GET /api/{name}?{arg}=", *build_keyset_query(base_query, pk, filters, args)[:2],
+                            filter_plans[arg]))
+
+    queries.append(("GET /api/volunteers/<id> assignments", """
+            SELECT va.*, rc.camp_name
+            FROM VolunteerAssignment va
+            JOIN ReliefCamp rc ON va.camp_id = rc.camp_id
+            WHERE va.volunteer_id = %s
+        """, (401,), PlanExpectation({'va': ('idx_assignment_volunteer',), 'rc': ('PRIMARY',)})))
+
+    # Hits are ordered by relevance, which no index provides
+    fulltext = {'VictimSurvivor': ('ft_victim_search',), 'MissingPersonReport': ('ft_missing_search',),
+                'Volunteer': ('ft_volunteer_search',)}
+    queries.append(("GET /api/search", *build_search_query('sharma 98', list(SEARCH_SOURCES), 100, 0),
+                    PlanExpectation(fulltext, sorts=True)))
+    queries.append(("GET /api/changes", *build_read_query(0, 1000, 101, ('inventory',)),
+                    PlanExpectation({'ChangeLog': ('PRIMARY',)})))
+
+    # Write statements generated from the table metadata
+    for table in TABLES:
+        by_pk = PlanExpectation({table.name: ('PRIMARY',)})
+        queries.append((f"DELETE {table.name}", table.delete_sql, (1,), by_pk))
+        if table.update_sql:
+            queries.append((f"PUT {table.name}", table.conditional_update_sql,
+                            (0, None) * len(table.stored) + (1, 1), by_pk))
+            queries.append((f"PUT {table.name} lock", table.lock_sql, (1,), by_pk))
+
+    pks = {'ReliefCamp': 'camp_id', 'VictimSurvivor': 'victim_id', 'Inventory': 'item_id',
+           'MissingPersonReport': 'report_id', 'Volunteer': 'volunteer_id'}
+    for table, references in REFERENCES.items():
+        queries.append((f"DELETE {table} dependency check", _dependency_query(table, pks[table]),
+                        (1,) * (len(references) + 1), NO_SORT))
+    return queries
+
+
+# Problems in the EXPLAIN rows of one query: full table or index scans, a
+# table read through another index than expected, temporary tables, and
+# filesorts where none is expected. Rows for derived and UNION results
+# (table "<...>") and for steps without a table are skipped.
+def explain_problems(label, steps, expectation):
+    problems = []
+    for step in steps:
+        table = step.get('table')
+        if not table or table.startswith('<'):
+            continue
+        extra = step.get('Extra') or ''
+        if step['type'] == 'ALL':
+            problems.append(f"{label}: full scan of {table}")
+        elif step['type'] == 'index':
+            problems.append(f"{label}: full index scan of {table} ({step['key']})")
+        expected = expectation.indexes.get(table)
+        if expected and step['key'] not in expected:
+            problems.append(f"{label}: reads {table} through {step['key'] or 'no index'}, "
+                            f"expected {' or '.join(expected)}")
+        if 'Using temporary' in extra:
+            problems.append(f"{label}: temporary table for {table}")
+        if 'Using filesort' in extra and not expectation.sorts:
+            problems.append(f"{label}: filesort of {table}")
+    return problems
+
+
+# EXPLAIN every API query and return the problems found (see
+# explain_problems). max_seeks_for_key=1 makes the optimiser choose an index
+# over a table scan whenever it can use one, so the small seed tables of a
+# test database are planned the way large production tables are.
+def plan_problems(conn):
+    cursor = conn.cursor(dictionary=True)
+    problems = []
+    try:
+        cursor.execute("SET SESSION max_seeks_for_key = 1")
+        for label, query, params, expectation in api_queries():
+            cursor.execute("EXPLAIN " + query, params)
+            problems.extend(explain_problems(label, cursor.fetchall(), expectation))
+    finally:
+        cursor.close()
+    return problems
+
+
+def check_plans(conn):
+    problems = plan_problems(conn)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if not problems:
+        print("All API queries use their expected indexes")
+    return not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Disaster Relief schema migrations")
+    parser.add_argument('command', choices=['status', 'up', 'down', 'check-plans'])
+    parser.add_argument('--to', type=int, help="target schema version")
+    args = parser.parse_args()
+
+    from app import create_mysql_connection
+    conn = create_mysql_connection()
+    try:
+        if args.command == 'status':
+            show_status(conn)
+        elif args.command == 'up':
+            migrate_up(conn, args.to)
+        elif args.command == 'down':
+            migrate_down(conn, args.to)
+        elif not check_plans(conn):
+            sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
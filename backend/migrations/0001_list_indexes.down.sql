@@ -0,0 +1,21 @@
+DROP INDEX idx_camp_name ON ReliefCamp;
+DROP INDEX idx_camp_location ON ReliefCamp;
+
+DROP INDEX idx_victim_camp ON VictimSurvivor;
+DROP INDEX idx_victim_first_name ON VictimSurvivor;
+DROP INDEX idx_victim_last_name ON VictimSurvivor;
+DROP INDEX idx_victim_dob ON VictimSurvivor;
+
+DROP INDEX idx_inventory_camp ON Inventory;
+DROP INDEX idx_inventory_name ON Inventory;
+DROP INDEX idx_inventory_received ON Inventory;
+
+DROP INDEX idx_volunteer_first_name ON Volunteer;
+DROP INDEX idx_volunteer_last_name ON Volunteer;
+
+DROP INDEX idx_assignment_volunteer ON VolunteerAssignment;
+DROP INDEX idx_assignment_camp ON VolunteerAssignment;
+
+DROP INDEX idx_missing_camp ON MissingPersonReport;
+DROP INDEX idx_missing_name ON MissingPersonReport;
+DROP INDEX idx_missing_reported ON MissingPersonReport;
@@ -0,0 +1,25 @@
+-- Secondary indexes backing the keyset-paginated list endpoints and their filters.
+-- Each index ends with the table's primary key so that "filter = x AND pk > cursor
+-- ORDER BY pk" is a single range scan, whatever page is being read.
+CREATE INDEX idx_camp_name ON ReliefCamp (camp_name, camp_id);
+CREATE INDEX idx_camp_location ON ReliefCamp (location, camp_id);
+
+CREATE INDEX idx_victim_camp ON VictimSurvivor (camp_id, victim_id);
+CREATE INDEX idx_victim_first_name ON VictimSurvivor (first_name, victim_id);
+CREATE INDEX idx_victim_last_name ON VictimSurvivor (last_name, victim_id);
+CREATE INDEX idx_victim_dob ON VictimSurvivor (date_of_birth, victim_id);
+
+CREATE INDEX idx_inventory_camp ON Inventory (camp_id, item_id);
+CREATE INDEX idx_inventory_name ON Inventory (item_name, item_id);
+CREATE INDEX idx_inventory_received ON Inventory (date_received, item_id);
+
+CREATE INDEX idx_volunteer_first_name ON Volunteer (first_name, volunteer_id);
+CREATE INDEX idx_volunteer_last_name ON Volunteer (last_name, volunteer_id);
+
+-- get_volunteer's assignment lookup and the volunteers camp_id / active_on filters
+CREATE INDEX idx_assignment_volunteer ON VolunteerAssignment (volunteer_id, camp_id, start_date, end_date);
+CREATE INDEX idx_assignment_camp ON VolunteerAssignment (camp_id, volunteer_id);
+
+CREATE INDEX idx_missing_camp ON MissingPersonReport (camp_id, report_id);
+CREATE INDEX idx_missing_name ON MissingPersonReport (missing_person_name, report_id);
+CREATE INDEX idx_missing_reported ON MissingPersonReport (date_reported, report_id);
@@ -0,0 +1,6 @@
+DROP INDEX idx_missing_victim ON MissingPersonReport;
+DROP INDEX idx_donor_item ON Donor;
+DROP INDEX idx_donation_item ON Donation;
+DROP INDEX idx_donation_donor ON Donation;
+DROP INDEX idx_supply_item ON Supply;
+DROP INDEX idx_supply_camp ON Supply;
@@ -0,0 +1,7 @@
+-- Foreign key columns probed by the delete-time dependency checks
+CREATE INDEX idx_missing_victim ON MissingPersonReport (victim_id);
+CREATE INDEX idx_donor_item ON Donor (item_id);
+CREATE INDEX idx_donation_item ON Donation (item_id);
+CREATE INDEX idx_donation_donor ON Donation (donor_id);
+CREATE INDEX idx_supply_item ON Supply (item_id);
+CREATE INDEX idx_supply_camp ON Supply (camp_id);
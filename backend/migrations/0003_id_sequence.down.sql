@@ -0,0 +1 @@
+DROP TABLE IdSequence;
@@ -0,0 +1,12 @@
+-- Next free primary key per table, handed out in blocks by backend/id_allocator.py
+CREATE TABLE IdSequence (
+    name VARCHAR(64) PRIMARY KEY,
+    next_id INT NOT NULL
+);
+
+INSERT INTO IdSequence (name, next_id) SELECT 'ReliefCamp', COALESCE(MAX(camp_id) + 1, 1) FROM ReliefCamp;
+INSERT INTO IdSequence (name, next_id) SELECT 'VictimSurvivor', COALESCE(MAX(victim_id) + 1, 1) FROM VictimSurvivor;
+INSERT INTO IdSequence (name, next_id) SELECT 'MissingPersonReport', COALESCE(MAX(report_id) + 1, 1) FROM MissingPersonReport;
+INSERT INTO IdSequence (name, next_id) SELECT 'Inventory', COALESCE(MAX(item_id) + 1, 201) FROM Inventory;
+INSERT INTO IdSequence (name, next_id) SELECT 'Volunteer', COALESCE(MAX(volunteer_id) + 1, 401) FROM Volunteer;
+INSERT INTO IdSequence (name, next_id) SELECT 'VolunteerAssignment', COALESCE(MAX(assignment_id) + 1, 101) FROM VolunteerAssignment;
@@ -0,0 +1,3 @@
+DROP INDEX ft_victim_search ON VictimSurvivor;
+DROP INDEX ft_missing_search ON MissingPersonReport;
+DROP INDEX ft_volunteer_search ON Volunteer;
@@ -0,0 +1,6 @@
+-- Full-text indexes behind /api/search. The ngram parser indexes every
+-- two-character sequence, so partial names and fragments of phone numbers
+-- match anywhere in a value, not only at the start of a word.
+ALTER TABLE VictimSurvivor ADD FULLTEXT INDEX ft_victim_search (first_name, last_name, contact_no, address) WITH PARSER ngram;
+ALTER TABLE MissingPersonReport ADD FULLTEXT INDEX ft_missing_search (missing_person_name, reporter_name, contact, last_seen_location) WITH PARSER ngram;
+ALTER TABLE Volunteer ADD FULLTEXT INDEX ft_volunteer_search (first_name, last_name, contact_number, skills) WITH PARSER ngram;
@@ -0,0 +1,19 @@
+-- Per-camp counters kept up to date by the write handlers (backend/camp_stats.py),
+-- so GET /api/relief_camps/stats reads one row per camp instead of aggregating.
+-- active_volunteers counts the assignments covering the date in volunteers_on.
+CREATE TABLE CampStats (
+    camp_id INT PRIMARY KEY,
+    victims INT NOT NULL DEFAULT 0,
+    active_volunteers INT NOT NULL DEFAULT 0,
+    volunteers_on DATE,
+    open_missing_reports INT NOT NULL DEFAULT 0,
+    inventory_units INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (camp_id) REFERENCES ReliefCamp(camp_id)
+);
+
+INSERT INTO CampStats (camp_id, victims, open_missing_reports, inventory_units)
+SELECT c.camp_id,
+       (SELECT COUNT(*) FROM VictimSurvivor v WHERE v.camp_id = c.camp_id),
+       (SELECT COUNT(*) FROM MissingPersonReport m WHERE m.camp_id = c.camp_id AND m.victim_id IS NULL),
+       (SELECT COALESCE(SUM(i.quantity), 0) FROM Inventory i WHERE i.camp_id = c.camp_id)
+FROM ReliefCamp c;
@@ -0,0 +1,3 @@
+ALTER TABLE ReliefCamp DROP COLUMN longitude;
+ALTER TABLE ReliefCamp DROP COLUMN latitude;
+DROP TABLE Gazetteer;
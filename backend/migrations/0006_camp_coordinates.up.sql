@@ -0,0 +1,72 @@
+-- Coordinates for relief camps, so /api/relief_camps/nearest can search by
+-- distance. Gazetteer maps place names to coordinates; camps take theirs from
+-- it by location name (backend/geo.py does the same for new and updated camps).
+CREATE TABLE Gazetteer (
+    name VARCHAR(100) PRIMARY KEY,
+    latitude DECIMAL(9,6) NOT NULL,
+    longitude DECIMAL(9,6) NOT NULL
+);
+
+INSERT INTO Gazetteer (name, latitude, longitude) VALUES
+('New Delhi', 28.613900, 77.209000),
+('Delhi', 28.704100, 77.102500),
+('Mumbai', 19.076000, 72.877700),
+('Kolkata', 22.572600, 88.363900),
+('Chennai', 13.082700, 80.270700),
+('Guwahati', 26.144500, 91.736200),
+('Patna', 25.594100, 85.137600),
+('Dehradun', 30.316500, 78.032200),
+('Jaipur', 26.912400, 75.787300),
+('Bhubaneswar', 20.296100, 85.824500),
+('Thiruvananthapuram', 8.524100, 76.936600),
+('Hyderabad', 17.385000, 78.486700),
+('Bengaluru', 12.971600, 77.594600),
+('Bangalore', 12.971600, 77.594600),
+('Ahmedabad', 23.022500, 72.571400),
+('Pune', 18.520400, 73.856700),
+('Lucknow', 26.846700, 80.946200),
+('Bhopal', 23.259900, 77.412600),
+('Ranchi', 23.344100, 85.309600),
+('Raipur', 21.251400, 81.629600),
+('Shimla', 31.104800, 77.173400),
+('Srinagar', 34.083700, 74.797300),
+('Visakhapatnam', 17.686800, 83.218500),
+('Kochi', 9.931200, 76.267300),
+('Surat', 21.170200, 72.831100),
+('Nagpur', 21.145800, 79.088200),
+('Chandigarh', 30.733300, 76.779400),
+('Gandhinagar', 23.215600, 72.636900),
+('Panaji', 15.490900, 73.827800),
+('Imphal', 24.817000, 93.936800),
+('Shillong', 25.578800, 91.893300),
+('Agartala', 23.831500, 91.286800),
+('Aizawl', 23.727100, 92.717600),
+('Kohima', 25.675100, 94.108600),
+('Itanagar', 27.084400, 93.605300),
+('Gangtok', 27.338900, 88.606500),
+('Silchar', 24.833300, 92.778900),
+('Cuttack', 20.462500, 85.883000),
+('Puri', 19.813500, 85.831200),
+('Madurai', 9.925200, 78.119800),
+('Coimbatore', 11.016800, 76.955800),
+('Vijayawada', 16.506200, 80.648000),
+('Kozhikode', 11.258800, 75.780400),
+('Mangaluru', 12.914100, 74.856000),
+('Varanasi', 25.317600, 82.973900),
+('Kanpur', 26.449900, 80.331900),
+('Indore', 22.719600, 75.857700),
+('Nashik', 19.997500, 73.789800),
+('Jammu', 32.726600, 74.857000),
+('Leh', 34.152600, 77.577100),
+('Darjeeling', 27.036000, 88.262700),
+('Siliguri', 26.727100, 88.395300),
+('Gaya', 24.791400, 85.000200),
+('Muzaffarpur', 26.120900, 85.364700),
+('Port Blair', 11.623400, 92.726500);
+
+ALTER TABLE ReliefCamp ADD COLUMN latitude DECIMAL(9,6);
+ALTER TABLE ReliefCamp ADD COLUMN longitude DECIMAL(9,6);
+
+UPDATE ReliefCamp
+SET latitude = (SELECT g.latitude FROM Gazetteer g WHERE g.name = ReliefCamp.location),
+    longitude = (SELECT g.longitude FROM Gazetteer g WHERE g.name = ReliefCamp.location);
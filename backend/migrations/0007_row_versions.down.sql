@@ -0,0 +1,5 @@
+ALTER TABLE Volunteer DROP COLUMN version;
+ALTER TABLE Inventory DROP COLUMN version;
+ALTER TABLE MissingPersonReport DROP COLUMN version;
+ALTER TABLE VictimSurvivor DROP COLUMN version;
+ALTER TABLE ReliefCamp DROP COLUMN version;
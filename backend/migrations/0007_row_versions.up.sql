@@ -0,0 +1,7 @@
+-- Row versions for optimistic concurrency: every PUT bumps the version, and a
+-- client that sends the version it read (If-Match) only updates an unchanged row.
+ALTER TABLE ReliefCamp ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE VictimSurvivor ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE MissingPersonReport ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE Inventory ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE Volunteer ADD COLUMN version INT NOT NULL DEFAULT 1;
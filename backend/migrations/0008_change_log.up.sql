@@ -0,0 +1,12 @@
+-- Outbox for the change feed (backend/changes.py): one row per record created,
+-- updated or deleted through the API, written in the same transaction as the
+-- change itself. seq orders the feed; clients sync with /api/changes?since=seq.
+CREATE TABLE ChangeLog (
+    seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+    resource VARCHAR(32) NOT NULL,
+    record_id INT NOT NULL,
+    action VARCHAR(8) NOT NULL,
+    changed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_changelog_changed_at ON ChangeLog (changed_at);
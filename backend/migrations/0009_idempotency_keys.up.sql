@@ -0,0 +1,15 @@
+-- Idempotency keys for write requests (backend/idempotency.py). The first request
+-- with a key claims it (status NULL while it runs) and stores its response, which
+-- retries with the same key get back instead of running the write again.
+CREATE TABLE IdempotencyKey (
+    idem_key VARCHAR(100) PRIMARY KEY,
+    owner CHAR(32) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status SMALLINT,
+    content_type VARCHAR(100),
+    body MEDIUMBLOB,
+    created_at DATETIME NOT NULL,
+    expires_at DATETIME NOT NULL
+);
+
+CREATE INDEX idx_idempotency_expires ON IdempotencyKey (expires_at);
@@ -0,0 +1,173 @@
+import contextvars
+
+from flask import request
+from werkzeug.test import EnvironBuilder
+
+from admission import ADMITTED_BY_PARENT
+from idempotency import CLAIMED, IN_PROGRESS, METHODS, REPLAY, IdempotencyError, fingerprint, validate_key
+from serializer import encode, loads
+
+# Replay of writes queued by offline clients (POST /api/sync).
+#
+# Each queued operation carries the idempotency key it was first sent with,
+# so a batch can be resent after a lost response: operations that already
+# ran get their stored result back instead of running again. Creates are
+# applied through the /bulk routes, one transaction per collection, so 10k
+# queued registrations take a handful of transactions rather than 10k.
+
+# Collections whose creates can be applied together through their /bulk route
+BULK_COLLECTIONS = ('/api/relief_camps', '/api/victims', '/api/missing_persons', '/api/inventory', '/api/volunteers')
+# Headers of the sync request that each operation is sent with (the client
+# address is passed on too)
+FORWARDED_HEADERS = ('X-Coordinator-Token',)
+
+
+class SyncError(ValueError):
+    pass
+
+
+# {"operations": [{"key", "method", "path", "body"}, ...]} -> list of operations
+def parse_operations(payload, max_operations):
+    operations = payload.get('operations') if isinstance(payload, dict) else None
+    if not isinstance(operations, list) or not operations:
+        raise SyncError("Expected {\"operations\": [...]} with at least one operation")
+    if len(operations) > max_operations:
+        raise SyncError(f"Too many operations: {len(operations)} (maximum is {max_operations} per request)")
+
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise SyncError(f"Operation {index}: expected an object")
+        method = str(operation.get('method', '')).upper()
+        path = operation.get('path')
+        body = operation.get('body')
+        try:
+            key = validate_key(operation.get('key'))
+        except IdempotencyError as e:
+            raise SyncError(f"Operation {index}: {e}")
+        if method not in METHODS:
+            raise SyncError(f"Operation {index}: method must be one of {', '.join(METHODS)}")
+        if not isinstance(path, str) or not path.startswith('/api/') or path.rstrip('/') == '/api/sync':
+            raise SyncError(f"Operation {index}: invalid path {path!r}")
+        if body is not None and not isinstance(body, dict):
+            raise SyncError(f"Operation {index}: body must be an object")
+        parsed.append({"key": key, "method": method, "path": path.rstrip('/'), "body": body})
+    return parsed
+
+
+# Split operations into batches that keep their order. A run of consecutive
+# creates becomes one batch per collection: offline clients do not know the
+# ids of records they created, so those creates cannot refer to each other.
+# Every other operation is a batch of its own.
+# Returns [(path, [operation index], bulk)].
+def plan(operations, max_rows):
+    batches = []
+    run = {}
+
+    def flush():
+        for path, indexes in run.items():
+            for start in range(0, len(indexes), max_rows):
+                batches.append((path, indexes[start:start + max_rows], True))
+        run.clear()
+
+    for index, operation in enumerate(operations):
+        if operation['method'] == 'POST' and operation['path'] in BULK_COLLECTIONS:
+            run.setdefault(operation['path'], []).append(index)
+        else:
+            flush()
+            batches.append((operation['path'], [index], False))
+    flush()
+    return batches
+
+
+# Run one operation through the app as a request of its own, without an HTTP
+# round trip: fresh request and app contexts (its own g), every before, after
+# and teardown request hook, and the app's error handling. It runs in a copy
+# of the context variables, so it cannot disturb the sync request's. The sync
+# request was admitted as a whole, so its operations are not rate limited or
+# shed one by one.
+# Must be called while handling the sync request. Returns (status, JSON body).
+def _dispatch(app, method, path, body):
+    headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+    environ = EnvironBuilder(path=path, method=method, json=body, headers=headers,
+                             environ_base={'REMOTE_ADDR': request.remote_addr,
+                                           ADMITTED_BY_PARENT: True}).get_environ()
+    return contextvars.copy_context().run(_run, app, environ)
+
+
+def _run(app, environ):
+    with app.app_context(), app.request_context(environ):
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:
+            response = app.handle_exception(e)
+        return response.status_code, response.get_json(silent=True)
+
+
+# Whether an operation should be sent again later rather than keep its result:
+# server errors, and requests refused by the rate limit or load shedding
+def _retryable(status):
+    return status >= 500 or status == 429
+
+
+# One bulk result row as the response of a single create
+def _row_result(row):
+    row = {name: value for name, value in row.items() if name != 'row'}
+    return (200 if row.get('success') else 400), row
+
+
+def _stored_result(outcome, stored):
+    if outcome == REPLAY:
+        status, content_type, body = stored
+        return status, loads(body) if content_type == 'application/json' else body.decode()
+    if outcome == IN_PROGRESS:
+        return 409, {"success": False, "message": "This operation is still being processed"}
+    return 422, {"success": False, "message": "This key was already used for a different operation"}
+
+
+# Apply operations in order. Returns one {"key", "status", "body", "retry"} per
+# operation; retry marks operations to send again later (server errors, rate
+# limited or shed operations, or the same key still running in another request).
+def replay(app, store, operations, max_rows):
+    # Repeats of a key within the batch share the first operation's result
+    first = {}
+    for operation in operations:
+        first.setdefault(operation['key'], operation)
+    owner, claims = store.claim({key: fingerprint(op['method'], op['path'], op['body'])
+                                 for key, op in first.items()})
+
+    results = {}
+    todo = []
+    retry = set()
+    for key, operation in first.items():
+        outcome, stored = claims[key]
+        if outcome == CLAIMED:
+            todo.append(operation)
+        else:
+            results[key] = _stored_result(outcome, stored)
+            if outcome == IN_PROGRESS:
+                retry.add(key)
+
+    finished = []
+    try:
+        for path, indexes, bulk in plan(todo, max_rows):
+            if bulk:
+                status, body = _dispatch(app, 'POST', f"{path}/bulk", [todo[i]['body'] for i in indexes])
+                rows = body.get('results') if isinstance(body, dict) else None
+                for position, i in enumerate(indexes):
+                    results[todo[i]['key']] = _row_result(rows[position]) if rows else (status, body)
+            else:
+                operation = todo[indexes[0]]
+                results[operation['key']] = _dispatch(app, operation['method'], path, operation['body'])
+            finished.extend(todo[i]['key'] for i in indexes)
+    finally:
+        # Keep results of finished operations; retryable failures and
+        # operations that never ran can be retried with the same key
+        done = {key for key in finished if not _retryable(results[key][0])}
+        store.complete(owner, [(key, results[key][0], 'application/json', encode(results[key][1]))
+                               for key in done])
+        store.release(owner, [op['key'] for op in todo if op['key'] not in done])
+        retry.update(op['key'] for op in todo if op['key'] not in done)
+
+    return [{"key": op['key'], "status": results[op['key']][0], "body": results[op['key']][1],
+             "retry": op['key'] in retry} for op in operations]
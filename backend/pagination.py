@@ -0,0 +1,147 @@
+from datetime import date
+from itertools import product
+
+# Page size used when the client does not pass ?limit=
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+
+class PaginationError(ValueError):
+    pass
+
+
+# Escape LIKE wildcards so a name prefix only ever matches literally
+def like_prefix(value):
+    escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '%'
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise PaginationError(f"Invalid date: {value} (expected YYYY-MM-DD)")
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise PaginationError(f"Invalid integer: {value}")
+
+
+def parse_limit(args, default=DEFAULT_PAGE_LIMIT):
+    raw = args.get('limit')
+    if raw is None or raw == '':
+        return default
+    limit = parse_int(raw)
+    if limit < 1:
+        raise PaginationError("limit must be a positive integer")
+    return min(limit, MAX_PAGE_LIMIT)
+
+
+# The cursor is the primary key of the last row of the previous page
+def parse_cursor(args):
+    raw = args.get('cursor')
+    if raw is None or raw == '':
+        return None
+    return parse_int(raw)
+
+
+# The filter arguments present in the request, as [(condition, value)].
+#   filters: {query_arg: (sql_condition, converter)}; the condition may contain
+#            several %s placeholders, all bound to the converted value. A tuple
+#            of conditions matches rows meeting any of them.
+def _present_filters(filters, args):
+    present = []
+    for arg, (condition, converter) in filters.items():
+        raw = args.get(arg)
+        if raw is None or raw == '':
+            continue
+        present.append((condition, converter(raw)))
+    return present
+
+
+# [(condition, value)] -> (conditions, params), each value bound to every
+# placeholder of its condition
+def _bind(present):
+    conditions = []
+    params = []
+    for condition, value in present:
+        conditions.append(condition)
+        params.extend([value] * condition.count('%s'))
+    return conditions, params
+
+
+# Turn the filter arguments present in the request into SQL conditions
+# (see _present_filters); alternatives are joined with OR
+def parse_filters(filters, args):
+    return _bind([("(" + " OR ".join(condition) + ")" if isinstance(condition, tuple) else condition, value)
+                  for condition, value in _present_filters(filters, args)])
+
+
+# Build a full-table query ordered by primary key, honouring the same filters
+# as the paginated list (used by the streaming exports)
+def build_filtered_query(base_query, pk, filters, args):
+    conditions, params = parse_filters(filters, args)
+    query = base_query
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {pk}"
+    return query, tuple(params)
+
+
+def _keyset_branch(base_query, pk, present, cursor, limit):
+    conditions, params = _bind(present)
+    if cursor is not None:
+        conditions.append(f"{pk} > %s")
+        params.append(cursor)
+
+    query = base_query
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {pk} LIMIT %s"
+    params.append(limit + 1)
+    return query, params
+
+
+# Build a keyset-paginated query.
+#   base_query: SELECT ... FROM ... [JOIN ...] without WHERE/ORDER BY
+#   pk: qualified primary key column the pages are ordered by, e.g. "v.victim_id"
+#   filters: see _present_filters()
+# Returns (query, params, limit). The query fetches limit + 1 rows so the
+# caller can tell whether another page exists.
+#
+# A filter with alternatives (first or last name) becomes a UNION with one
+# branch per alternative, each with the cursor and limit pushed into it: an OR
+# of two ranges ordered by the primary key cannot be read as one index range,
+# and would merge and sort every match on each page.
+def build_keyset_query(base_query, pk, filters, args):
+    limit = parse_limit(args)
+    cursor = parse_cursor(args)
+    present = _present_filters(filters, args)
+    fixed = [(condition, value) for condition, value in present if not isinstance(condition, tuple)]
+    choices = [[(alternative, value) for alternative in condition]
+               for condition, value in present if isinstance(condition, tuple)]
+
+    branches = []
+    for choice in product(*choices):
+        branches.append(_keyset_branch(base_query, pk, fixed + list(choice), cursor, limit))
+    if len(branches) == 1:
+        query, params = branches[0]
+        return query, tuple(params), limit
+
+    # UNION (not UNION ALL): a row matching several branches is returned once
+    query = " UNION ".join(f"({branch})" for branch, _ in branches)
+    query += f" ORDER BY {pk.split('.')[-1]} LIMIT %s"
+    params = [param for _, branch_params in branches for param in branch_params] + [limit + 1]
+    return query, tuple(params), limit
+
+
+# Trim the look-ahead row and work out the cursor for the next page.
+# pk_index is the primary key's position in a tuple row, or its key in a dict row.
+def split_page(rows, limit, pk_index):
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, str(rows[-1][pk_index])
+    return rows, None
@@ -0,0 +1,150 @@
+import itertools
+import threading
+import time
+
+from flask import request
+
+# Read/write splitting across the primary and read replicas (DB_REPLICA_HOSTS).
+#
+# GET requests read from a replica; everything else, and every read that has
+# to see the latest writes, uses the primary. A client that has just written
+# reads from the primary for `sticky_window` seconds, so it sees its own
+# change even if replication is behind: write responses set a `last_write`
+# cookie, and clients that do not keep cookies (the cross-origin frontend)
+# send "X-Read-Primary: 1" instead. Replication lag is checked every
+# `check_interval` seconds; a replica more than `max_lag` seconds behind, or
+# one that cannot be reached, gets no reads until it has caught up.
+
+STICKY_COOKIE = 'last_write'
+PRIMARY_HEADER = 'X-Read-Primary'
+READ_METHODS = ('GET', 'HEAD')
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+# "db1,db2:3307" -> [("db1", None), ("db2", 3307)]
+def parse_hosts(value):
+    hosts = []
+    for entry in (value or '').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(':')
+        hosts.append((host, int(port) if port else None))
+    return hosts
+
+
+class Replica:
+    # pool: a db_pool.ConnectionPool for this server
+    def __init__(self, host, port, pool):
+        self.host = host
+        self.port = port
+        self.name = f"{host}:{port}" if port else host
+        self.pool = pool
+        self.lag = None
+        self.healthy = False  # until the first check
+        self.error = None
+
+
+class ReplicaRouter:
+    def __init__(self, replicas, max_lag=5.0, check_interval=2.0, sticky_window=5.0, logger=None):
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_window = sticky_window
+        self.logger = logger
+        self._checked_at = 0.0
+        self._check_lock = threading.Lock()
+        self._turn = itertools.count()
+
+    # Replica to read from (round robin over the healthy ones), or None to
+    # read from the primary
+    def pick(self, check=True):
+        if check and self.check_due():
+            self.check()
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def check_due(self):
+        return bool(self.replicas) and time.monotonic() - self._checked_at > self.check_interval
+
+    # Measure every replica's lag. Only one caller checks at a time; the
+    # others keep using the last results meanwhile.
+    def check(self):
+        if not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            for replica in self.replicas:
+                try:
+                    replica.lag = self._measure(replica)
+                    replica.error = None
+                except Exception as e:
+                    replica.lag, replica.error = None, str(e)
+                healthy = replica.lag is not None and replica.lag <= self.max_lag
+                if healthy != replica.healthy and self.logger is not None:
+                    log = self.logger.info if healthy else self.logger.warning
+                    log("Replica %s %s (lag %s, %s)", replica.name,
+                        "in rotation" if healthy else "taken out of rotation",
+                        replica.lag, replica.error or "ok")
+                replica.healthy = healthy
+            self._checked_at = time.monotonic()
+        finally:
+            self._check_lock.release()
+
+    # Seconds the replica is behind its source; None when replication is
+    # stopped. A server with no replica status (e.g. a second standalone
+    # server standing in for a replica in tests) counts as up to date.
+    @staticmethod
+    def _measure(replica):
+        conn = replica.pool.connect()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except Exception:
+                cursor.execute("SHOW SLAVE STATUS")  # MySQL before 8.0.22, MariaDB
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+        if not rows:
+            return 0
+        status = rows[0]
+        lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        return None if lag is None else int(lag)
+
+    # A connection to the replica failed: no reads until the next check says otherwise
+    def mark_down(self, replica, error):
+        replica.healthy = False
+        replica.error = str(error)
+        if self.logger is not None:
+            self.logger.warning("Replica %s taken out of rotation: %s", replica.name, error)
+
+    # Whether a request must read from the primary because its client wrote recently
+    def sticky(self, cookies, headers):
+        if headers.get(PRIMARY_HEADER) in ('1', 'true'):
+            return True
+        try:
+            last_write = float(cookies.get(STICKY_COOKIE, 0))
+        except ValueError:
+            return False
+        return time.time() - last_write < self.sticky_window
+
+    # Set the last_write cookie on successful writes
+    def install(self, app):
+        if self.replicas:
+            app.after_request(self._after_request)
+
+    def _after_request(self, response):
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            response.set_cookie(STICKY_COOKIE, str(int(time.time())), max_age=int(self.sticky_window) + 1,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def stats(self):
+        return {
+            replica.name: {"healthy": replica.healthy, "lag": replica.lag, "error": replica.error,
+                           **replica.pool.stats()}
+            for replica in self.replicas
+        }
@@ -0,0 +1,206 @@
+import math
+import time
+
+import numpy as np
+
+# Volunteer-to-camp scheduling as a min-cost flow.
+#
+# Volunteers with the same skill are interchangeable, so the flow network has
+# one supply node per skill group rather than one per volunteer:
+#
+#   source -> skill group (capacity: volunteers in the group)
+#          -> camp        (value: how much the camp gains from that skill)
+#          -> sink        (capacity: volunteers the camp still needs)
+#
+# A 50k volunteer x 2k camp problem with a dozen skills is then a dozen x 2k
+# transportation problem. It is solved exactly by successive shortest paths.
+# Every augmenting path alternates between skill groups and camps, so
+# shortest paths are found with Bellman-Ford over the skill groups only,
+# vectorised over the camps with NumPy.
+
+GENERAL_SKILL = 'general'
+
+
+# Assignments overlapping the window [start_date, end_date]; end_date None is open-ended
+def _overlap(alias, end_date):
+    condition = f"({alias}.end_date IS NULL OR {alias}.end_date >= %s)"
+    if end_date is not None:
+        condition += f" AND {alias}.start_date <= %s"
+    return condition
+
+
+def _window(start_date, end_date):
+    return (start_date,) if end_date is None else (start_date, end_date)
+
+
+# Volunteers are grouped by their first listed skill, so "Medical Assistance,
+# Logistics" counts as a medic; without skills they are general helpers
+def skill_key(skills):
+    return (skills or '').split(',')[0].strip().lower() or GENERAL_SKILL
+
+
+# Volunteers a camp needs: one per `victims_per_volunteer` victims, minus
+# those already assigned for the window
+def camp_need(victims, assigned, victims_per_volunteer):
+    return max(0, math.ceil(victims / victims_per_volunteer) - assigned)
+
+
+# How urgent a camp is: its occupancy, with full or overfull camps capped at 1.5
+def camp_priority(victims, capacity):
+    if not capacity:
+        return 1.0
+    return min(victims / capacity, 1.5)
+
+
+# Value of one volunteer from each skill group at each camp: the camp's
+# priority, raised by `gap_bonus` when the camp has nobody with that skill yet.
+#   covered: {(camp_id, skill): volunteers already assigned}
+def assignment_values(skills, camp_ids, priorities, covered, gap_bonus):
+    values = np.repeat(np.asarray(priorities, dtype=np.float64)[None, :], len(skills), axis=0)
+    for i, skill in enumerate(skills):
+        for j, camp_id in enumerate(camp_ids):
+            if not covered.get((camp_id, skill)):
+                values[i, j] *= 1 + gap_bonus
+    return values
+
+
+# Read the scheduling problem for a date window:
+#   volunteers: {skill: [volunteer_id]} for volunteers with no assignment in the window
+#   camps: [(camp_id, capacity, victims)] from CampStats
+#   covered: {(camp_id, skill): volunteers already assigned in the window}
+def load_problem(cursor, start_date, end_date):
+    window = _window(start_date, end_date)
+    cursor.execute(f"""
+        SELECT v.volunteer_id, v.skills FROM Volunteer v
+        WHERE NOT EXISTS (
+            SELECT 1 FROM VolunteerAssignment va
+            WHERE va.volunteer_id = v.volunteer_id AND {_overlap('va', end_date)}
+        )
+        ORDER BY v.volunteer_id
+    """, window)
+    volunteers = {}
+    for volunteer_id, skills in cursor.fetchall():
+        volunteers.setdefault(skill_key(skills), []).append(volunteer_id)
+
+    cursor.execute("""
+        SELECT c.camp_id, c.capacity, s.victims
+        FROM ReliefCamp c JOIN CampStats s ON s.camp_id = c.camp_id
+        ORDER BY c.camp_id
+    """)
+    camps = cursor.fetchall()
+
+    cursor.execute(f"""
+        SELECT va.camp_id, v.skills, COUNT(*)
+        FROM VolunteerAssignment va JOIN Volunteer v ON v.volunteer_id = va.volunteer_id
+        WHERE {_overlap('va', end_date)}
+        GROUP BY va.camp_id, v.skills
+    """, window)
+    covered = {}
+    for camp_id, skills, count in cursor.fetchall():
+        key = (camp_id, skill_key(skills))
+        covered[key] = covered.get(key, 0) + count
+    return volunteers, camps, covered
+
+
+# Solve a loaded problem. Returns ([(volunteer_id, camp_id)], summary).
+def plan(volunteers, camps, covered, victims_per_volunteer, gap_bonus):
+    assigned = {}
+    for (camp_id, _), count in covered.items():
+        assigned[camp_id] = assigned.get(camp_id, 0) + count
+    needs = [(camp_id, camp_need(victims or 0, assigned.get(camp_id, 0), victims_per_volunteer),
+              camp_priority(victims or 0, capacity)) for camp_id, capacity, victims in camps]
+    needs = [camp for camp in needs if camp[1] > 0]
+
+    skills = sorted(volunteers)
+    camp_ids = [camp_id for camp_id, _, _ in needs]
+    value = assignment_values(skills, camp_ids, [priority for _, _, priority in needs], covered, gap_bonus)
+    flow, solve_time = timed_solve([len(volunteers[skill]) for skill in skills],
+                                   [need for _, need, _ in needs], value)
+
+    assignments = []
+    for i, skill in enumerate(skills):
+        pool = iter(volunteers[skill])
+        for j in np.nonzero(flow[i])[0]:
+            assignments.extend((next(pool), camp_ids[j]) for _ in range(flow[i, j]))
+
+    summary = {
+        "volunteers_available": sum(len(pool) for pool in volunteers.values()),
+        "camps_in_need": len(needs),
+        "volunteers_needed": sum(need for _, need, _ in needs),
+        "assigned": len(assignments),
+        "objective": round(float((flow * value).sum()), 3),
+        "solve_time_ms": round(solve_time * 1000, 1)
+    }
+    return assignments, summary
+
+
+# Maximise the total value of assignments.
+#   supply[i]: volunteers in skill group i
+#   need[j]: volunteers camp j can take
+#   value[i, j]: value of one volunteer of group i at camp j (> 0)
+# Returns flow[i, j], the number of group i volunteers sent to camp j.
+def solve(supply, need, value):
+    supply = np.asarray(supply, dtype=np.int64).copy()
+    need = np.asarray(need, dtype=np.int64).copy()
+    cost = -np.asarray(value, dtype=np.float64)
+    groups, camps = cost.shape
+    flow = np.zeros((groups, camps), dtype=np.int64)
+    if not groups or not camps:
+        return flow
+
+    while supply.any() and need.any():
+        # Cheapest way to move one unit from group i to group j: send it to a
+        # camp c where j currently has flow and push one of j's units back
+        transfer = np.full((groups, groups), np.inf)
+        via = np.zeros((groups, groups), dtype=np.int64)
+        for j in range(groups):
+            camps_with_flow = np.nonzero(flow[j])[0]
+            if camps_with_flow.size:
+                deltas = cost[:, camps_with_flow] - cost[j, camps_with_flow]
+                best = deltas.argmin(axis=1)
+                transfer[:, j] = deltas[np.arange(groups), best]
+                via[:, j] = camps_with_flow[best]
+        np.fill_diagonal(transfer, np.inf)
+
+        # Bellman-Ford over the skill groups, starting from those with spare volunteers
+        distance = np.where(supply > 0, 0.0, np.inf)
+        previous = np.full(groups, -1)
+        for _ in range(groups):
+            candidates = distance[:, None] + transfer
+            best = candidates.argmin(axis=0)
+            improved = candidates[best, np.arange(groups)] < distance - 1e-12
+            if not improved.any():
+                break
+            distance[improved] = candidates[best, np.arange(groups)][improved]
+            previous[improved] = best[improved]
+
+        # Finish at the cheapest camp that still needs volunteers
+        total = distance[:, None] + np.where(need > 0, cost, np.inf)
+        i, c = np.unravel_index(total.argmin(), total.shape)
+        if not np.isfinite(total[i, c]):
+            break
+
+        # Walk back to the source, collecting the path and its bottleneck
+        path = [(i, c, 1)]
+        bottleneck = need[c]
+        while previous[i] >= 0:
+            origin = previous[i]
+            camp = via[origin, i]
+            bottleneck = min(bottleneck, flow[i, camp])
+            path.append((i, camp, -1))
+            path.append((origin, camp, 1))
+            i = origin
+        bottleneck = min(bottleneck, supply[i])
+
+        supply[i] -= bottleneck
+        need[c] -= bottleneck
+        for group, camp, direction in path:
+            flow[group, camp] += direction * bottleneck
+    return flow
+
+
+# Solve and report how long it took
+def timed_solve(supply, need, value):
+    started = time.perf_counter()
+    flow = solve(supply, need, value)
+    return flow, time.perf_counter() - started
@@ -0,0 +1,65 @@
+import re
+
+from pagination import PaginationError
+
+# Result type -> (table, primary key, full-text columns, title, contact, detail).
+# The full-text columns must match the FULLTEXT index in migration 0004.
+SEARCH_SOURCES = {
+    'victims': ('VictimSurvivor', 'victim_id', ('first_name', 'last_name', 'contact_no', 'address'),
+                "CONCAT_WS(' ', first_name, last_name)", 'contact_no', 'address'),
+    'missing_persons': ('MissingPersonReport', 'report_id',
+                        ('missing_person_name', 'reporter_name', 'contact', 'last_seen_location'),
+                        'missing_person_name', 'contact', 'last_seen_location'),
+    'volunteers': ('Volunteer', 'volunteer_id', ('first_name', 'last_name', 'contact_number', 'skills'),
+                   "CONCAT_WS(' ', first_name, last_name)", 'contact_number', 'skills'),
+}
+
+# Shorter terms are not in the ngram index (ngram_token_size defaults to 2)
+MIN_TERM_LENGTH = 2
+# Deepest page a client can ask for; each table sorts offset + limit hits
+MAX_SEARCH_OFFSET = 10000
+
+
+# Every word of the query must occur in the row, as a substring of one of
+# the indexed columns: "sharma 9876" -> +"sharma" +"9876"
+def boolean_query(q):
+    terms = [term for term in re.findall(r'\w+', q or '') if len(term) >= MIN_TERM_LENGTH]
+    if not terms:
+        raise PaginationError(f"q must contain a word of at least {MIN_TERM_LENGTH} characters")
+    return ' '.join(f'+"{term}"' for term in terms)
+
+
+def parse_types(raw):
+    if not raw:
+        return list(SEARCH_SOURCES)
+    types = [name.strip() for name in raw.split(',') if name.strip()]
+    for name in types:
+        if name not in SEARCH_SOURCES:
+            raise PaginationError(f"Unknown type: {name} (expected {', '.join(SEARCH_SOURCES)})")
+    return types
+
+
+# Build the ranked search over the selected tables. Each table returns only
+# its best offset + limit + 1 hits, so the final sort never sees more rows
+# than the page needs. Returns (query, params).
+def build_search_query(q, types, limit, offset):
+    if not 0 <= offset <= MAX_SEARCH_OFFSET:
+        raise PaginationError(f"cursor must be between 0 and {MAX_SEARCH_OFFSET}")
+    against = boolean_query(q)
+    window = offset + limit + 1
+
+    parts = []
+    params = []
+    for name in types:
+        table, pk, columns, title, contact, detail = SEARCH_SOURCES[name]
+        match = f"MATCH ({', '.join(columns)}) AGAINST (%s IN BOOLEAN MODE)"
+        parts.append(
+            f"(SELECT '{name}' AS type, {pk} AS id, {title} AS title, {contact} AS contact, "
+            f"{detail} AS detail, {match} AS score FROM {table} WHERE {match} "
+            f"ORDER BY score DESC, id LIMIT %s)"
+        )
+        params.extend([against, against, window])
+
+    query = " UNION ALL ".join(parts) + " ORDER BY score DESC, type, id LIMIT %s OFFSET %s"
+    params.extend([limit + 1, offset])
+    return query, tuple(params)
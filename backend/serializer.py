@@ -0,0 +1,120 @@
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+# orjson is optional; without it responses are encoded with the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Encoder used for responses: 'orjson' (when installed) or 'json'
+ENCODER = 'orjson' if orjson is not None else 'json'
+
+
+# Values neither encoder handles natively. Decimals keep their exact digits
+# as strings, as Flask's encoder did; TIME columns come back as timedelta.
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, timedelta):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, 'item'):  # NumPy scalars
+        return obj.item()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+
+def use_encoder(name):
+    global ENCODER
+    if name not in ('orjson', 'json'):
+        raise ValueError(f"Unknown JSON encoder: {name}")
+    if name == 'orjson' and orjson is None:
+        raise ValueError("orjson is not installed")
+    ENCODER = name
+
+
+# obj -> UTF-8 JSON bytes. Dates and datetimes are ISO 8601.
+def encode(obj):
+    if ENCODER == 'orjson':
+        return orjson.dumps(obj, default=_default,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def dumps(obj):
+    return encode(obj).decode()
+
+
+def loads(data):
+    if ENCODER == 'orjson':
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Plain dicts from cursor rows: dictionary cursor rows pass through, named
+# tuples use _asdict(), plain tuples are zipped with the column names
+def rows_to_dicts(rows, columns):
+    if not rows:
+        return []
+    first = rows[0]
+    if isinstance(first, dict):
+        return rows if isinstance(rows, list) else list(rows)
+    if hasattr(first, '_asdict'):
+        return [row._asdict() for row in rows]
+    return [dict(zip(columns, row)) for row in rows]
+
+
+# Shapes of list responses (?shape=): objects (the default), rows, columns
+LIST_SHAPES = ('objects', 'rows', 'columns')
+
+# Encoded column headers, so the "rows" shape does not re-encode them per response
+_headers = {}
+
+
+# A list response in the "rows" shape: the column names once, then each row
+# as an array, encoded straight from the cursor's tuples without building dicts
+#   {"success": true, "columns": [...], "rows": [[...], ...], "next_cursor": ...}
+def encode_rows(columns, rows, next_cursor=None):
+    columns = tuple(columns)
+    header = _headers.get(columns)
+    if header is None:
+        header = b'{"success":true,"columns":' + encode(list(columns)) + b',"rows":'
+        if len(_headers) < 1024:
+            _headers[columns] = header
+    return header + encode(rows) + b',"next_cursor":' + encode(next_cursor) + b'}'
+
+
+# A list response in the "columns" shape: one array of values per column, so
+# each array holds values of one kind (ids, names, dates), which compresses
+# better than rows do
+#   {"success": true, "columns": [...], "data": {"<column>": [...], ...}, "next_cursor": ...}
+def encode_columns(columns, rows, next_cursor=None):
+    columns = list(columns)
+    values = zip(*rows) if rows else [()] * len(columns)
+    return encode({"success": True, "columns": columns, "data": dict(zip(columns, values)),
+                   "next_cursor": next_cursor})
+
+
+# Flask JSON provider that encodes with encode() and hands the bytes to the
+# response without a str round trip
+class FastJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return self.encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if ENCODER == 'orjson':
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def encode(self, obj):
+        return encode(obj)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj), mimetype=self.mimetype)
@@ -0,0 +1,221 @@
+from datetime import date
+
+import versioning
+from bulk import to_date, to_int, validate_rows
+from geo import parse_coordinate
+
+# Table metadata for the write routes, and the statements generated from it.
+#
+# Each table is declared once: its columns, which are required, how payload
+# values are converted and defaulted, which parent rows they reference, and
+# the columns its PUT and DELETE handlers read under lock to move camp
+# counters. The INSERT, UPDATE, lock and DELETE statements are built from
+# that at import, one fixed text per table, and run through prepared cursors
+# kept per pooled connection (db_pool), so the server parses each of them
+# once per connection. A PUT uses the same UPDATE for any combination of
+# fields: every column is assigned IF(<set?>, <new value>, <column>).
+
+
+class TableError(ValueError):
+    pass
+
+
+# stored: False for payload fields that are not columns of the table
+# (e.g. a volunteer's first assignment)
+# references: (parent table, key) a non-empty value must exist in
+class Column:
+    def __init__(self, name, required=False, convert=None, default=None, references=None, stored=True):
+        self.name = name
+        self.required = required
+        self.convert = convert
+        self.default = default
+        self.references = references
+        self.stored = stored
+
+
+def _today():
+    return date.today().isoformat()
+
+
+def _blank(value):
+    return value is None or value == ''
+
+
+class Table:
+    # resource: change feed name of the table's records
+    # counted: columns whose old values PUT and DELETE read under lock
+    # versioned: the table has a version column (migration 0007)
+    def __init__(self, name, pk, columns, resource=None, counted=(), versioned=True):
+        self.name = name
+        self.pk = pk
+        self.columns = columns
+        self.resource = resource
+        self.counted = tuple(counted)
+
+        self.names = [column.name for column in columns]
+        self.stored = [column.name for column in columns if column.stored]
+        self.required = [column.name for column in columns if column.required]
+        self.converters = {column.name: column.convert for column in columns if column.convert}
+        self.defaults = {column.name: column.default for column in columns if column.default}
+        self.references = {column.name: column.references for column in columns if column.references}
+        self._stored_positions = [self.names.index(name) for name in self.stored]
+
+        placeholders = ', '.join(['%s'] * (len(self.stored) + 1))
+        self.insert_sql = f"INSERT INTO {name} ({pk}, {', '.join(self.stored)}) VALUES ({placeholders})"
+        self.delete_sql = f"DELETE FROM {name} WHERE {pk} = %s"
+        if versioned:
+            assignments = [f"{column} = IF(%s, %s, {column})" for column in self.stored]
+            self.update_sql = versioning.update_statement(name, pk, assignments)
+            self.conditional_update_sql = versioning.update_statement(name, pk, assignments, conditional=True)
+            self.version_sql = versioning.version_statement(name, pk)
+            self.lock_sql = versioning.lock_statement(name, pk, self.counted)
+        else:
+            self.update_sql = self.conditional_update_sql = self.version_sql = self.lock_sql = None
+
+    # Validate rows as bulk.validate_rows does, with this table's rules
+    def validate(self, rows):
+        return validate_rows(rows, self.names, self.required, self.converters, self.defaults)
+
+    # One payload -> {column: value}; TableError with the message bulk
+    # validation gives for the row
+    def row(self, data):
+        valid, errors = self.validate([data])
+        if errors:
+            raise TableError(errors[0])
+        return dict(zip(self.names, valid[0][1]))
+
+    # INSERT parameters for a validated values tuple (see validate)
+    def insert_params(self, new_id, values):
+        return (new_id,) + tuple(values[i] for i in self._stored_positions)
+
+    # The stored columns a PUT payload sets: {column: value}. A blank
+    # required or defaulted column is left unchanged; a blank optional
+    # column is cleared.
+    def changes(self, data):
+        fields = {}
+        for column in self.columns:
+            if not column.stored or column.name not in data:
+                continue
+            value = data[column.name]
+            if _blank(value):
+                if column.required or column.default:
+                    continue
+                value = None
+            elif column.convert:
+                try:
+                    value = column.convert(value)
+                except (TypeError, ValueError):
+                    raise TableError(f"Invalid value for {column.name}: {value}")
+            fields[column.name] = value
+        return fields
+
+    # Insert one row ({column: value}, e.g. from row())
+    def insert(self, conn, new_id, row):
+        params = (new_id,) + tuple(row[name] for name in self.stored)
+        conn.prepared_cursor(self.insert_sql).execute(self.insert_sql, params)
+
+    # Many rows through a regular cursor: the connector sends an executemany
+    # INSERT as one multi-row statement, which beats executing a prepared
+    # one per row
+    def insert_many(self, cursor, rows):
+        cursor.executemany(self.insert_sql, rows)
+
+    # Set `fields` ({column: value}) and bump the version, in one UPDATE
+    # matching the expected version when one is given.
+    # Returns (UPDATED, new version), (NOT_FOUND, None) or (CONFLICT, current version).
+    def update(self, conn, pk_value, fields, expected=None):
+        params = []
+        for column in self.stored:
+            params.extend((int(column in fields), fields.get(column)))
+        params.append(pk_value)
+        statement = self.update_sql
+        if expected is not None:
+            statement = self.conditional_update_sql
+            params.append(expected)
+
+        cursor = conn.prepared_cursor(statement)
+        cursor.execute(statement, tuple(params))
+        if cursor.rowcount == 0:
+            cursor = conn.prepared_cursor(self.version_sql)
+            cursor.execute(self.version_sql, (pk_value,))
+            return versioning.mismatch(_one(cursor))
+        return versioning.UPDATED, cursor.lastrowid
+
+    # Lock a row and read its `counted` columns, checking the version when
+    # one is expected. Returns (UPDATED, {column: value}), (NOT_FOUND, None)
+    # or (CONFLICT, current version).
+    def lock(self, conn, pk_value, expected=None):
+        cursor = conn.prepared_cursor(self.lock_sql)
+        cursor.execute(self.lock_sql, (pk_value,))
+        outcome, row = versioning.check_lock(_one(cursor), expected)
+        if outcome == versioning.UPDATED:
+            row = dict(zip(self.counted, row))
+        return outcome, row
+
+    def delete(self, conn, pk_value):
+        conn.prepared_cursor(self.delete_sql).execute(self.delete_sql, (pk_value,))
+
+
+# First row of a result, reading the rest so the prepared cursor can run again
+def _one(cursor):
+    rows = cursor.fetchall()
+    return rows[0] if rows else None
+
+
+CAMP = ('ReliefCamp', 'camp_id')
+VICTIM = ('VictimSurvivor', 'victim_id')
+
+RELIEF_CAMPS = Table('ReliefCamp', 'camp_id', [
+    Column('camp_name', required=True),
+    Column('location', required=True),
+    Column('capacity', required=True, convert=to_int),
+    Column('contact_person', required=True),
+    Column('latitude', convert=lambda value: parse_coordinate(value, 'latitude', 90)),
+    Column('longitude', convert=lambda value: parse_coordinate(value, 'longitude', 180)),
+], resource='relief_camps')
+
+VICTIMS = Table('VictimSurvivor', 'victim_id', [
+    Column('first_name', required=True),
+    Column('last_name', required=True),
+    Column('date_of_birth', convert=to_date),
+    Column('contact_no'),
+    Column('address'),
+    Column('camp_id', convert=to_int, references=CAMP),
+], resource='victims', counted=['camp_id'])
+
+MISSING_PERSONS = Table('MissingPersonReport', 'report_id', [
+    Column('reporter_name', required=True),
+    Column('missing_person_name', required=True),
+    Column('last_seen_location', required=True),
+    Column('date_reported', convert=to_date, default=_today),
+    Column('contact', required=True),
+    Column('camp_id', convert=to_int, references=CAMP),
+    Column('victim_id', convert=to_int, references=VICTIM),
+], resource='missing_persons', counted=['camp_id', 'victim_id'])
+
+INVENTORY = Table('Inventory', 'item_id', [
+    Column('item_name', required=True),
+    Column('quantity', required=True, convert=to_int),
+    Column('date_received', convert=to_date, default=_today),
+    Column('camp_id', convert=to_int, references=CAMP),
+], resource='inventory', counted=['camp_id', 'quantity'])
+
+VOLUNTEERS = Table('Volunteer', 'volunteer_id', [
+    Column('first_name', required=True),
+    Column('last_name', required=True),
+    Column('contact_number', required=True),
+    Column('skills'),
+    # A camp_id also creates the volunteer's first assignment
+    Column('camp_id', convert=to_int, references=CAMP, stored=False),
+    Column('start_date', convert=to_date, default=_today, stored=False),
+    Column('end_date', convert=to_date, stored=False),
+], resource='volunteers')
+
+VOLUNTEER_ASSIGNMENTS = Table('VolunteerAssignment', 'assignment_id', [
+    Column('volunteer_id', required=True, convert=to_int),
+    Column('camp_id', required=True, convert=to_int, references=CAMP),
+    Column('start_date', convert=to_date, default=_today),
+    Column('end_date', convert=to_date),
+], versioned=False)
+
+TABLES = [RELIEF_CAMPS, VICTIMS, MISSING_PERSONS, INVENTORY, VOLUNTEERS, VOLUNTEER_ASSIGNMENTS]
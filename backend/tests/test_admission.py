@@ -0,0 +1,133 @@
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+from admission import AdmissionControl, CRITICAL, MemoryBuckets, NORMAL, PUBLIC
+
+
+def make_app(admission):
+    app = Flask(__name__)
+    admission.install(app)
+
+    @app.route('/api/stream')
+    def stream():
+        def events():
+            while True:
+                yield ': keepalive\n\n'
+        return Response(stream_with_context(events()), mimetype='text/event-stream')
+
+    @app.route('/api/missing_persons')
+    def missing_persons():
+        return jsonify({"success": True, "data": []})
+
+    return app
+
+
+def test_open_streams_do_not_count_as_in_flight():
+    admission = AdmissionControl(MemoryBuckets(), limits={}, max_in_flight=64)
+    client = make_app(admission).test_client()
+
+    streams = [client.get('/api/stream', buffered=False) for _ in range(70)]
+    assert all(response.status_code == 200 for response in streams)
+    assert admission.in_flight == 0
+
+    response = client.get('/api/missing_persons')
+    assert response.status_code == 200
+
+    for response in reversed(streams):  # request contexts unwind last in, first out
+        response.close()
+    assert admission.in_flight == 0
+
+
+def test_ordinary_requests_still_count_while_running():
+    admission = AdmissionControl(MemoryBuckets(), limits={}, max_in_flight=1)
+    app = make_app(admission)
+    seen = []
+
+    @app.route('/api/victims')
+    def victims():
+        seen.append(admission.in_flight)
+        return jsonify({"success": True})
+
+    client = app.test_client()
+    assert client.get('/api/victims').status_code == 200
+    assert seen == [1]
+    assert admission.in_flight == 0
+
+
+def test_writes_without_the_token_are_limited_and_shed():
+    admission = AdmissionControl(MemoryBuckets(), limits={NORMAL: (0.001, 2), CRITICAL: (0.001, 2)},
+                                 max_in_flight=10, coordinator_token='secret')
+    app = make_app(admission)
+
+    @app.route('/api/inventory', methods=['POST'])
+    def add_inventory():
+        return jsonify({"success": True}), 201
+
+    client = app.test_client()
+    statuses = [client.post('/api/inventory').status_code for _ in range(3)]
+    assert statuses == [201, 201, 429]
+    assert admission.classify('POST', '/api/inventory', {}) == NORMAL
+
+    admission.in_flight = 20  # twice the threshold: normal requests are shed
+    assert client.post('/api/inventory', headers={'X-Coordinator-Token': 'wrong'}).status_code == 503
+    admission.in_flight = 0
+
+
+def test_coordinator_token_is_never_limited_or_shed():
+    admission = AdmissionControl(MemoryBuckets(), limits={NORMAL: (0.001, 1), CRITICAL: (0.001, 1)},
+                                 max_in_flight=10, coordinator_token='secret')
+    app = make_app(admission)
+
+    @app.route('/api/inventory', methods=['POST'])
+    def add_inventory():
+        return jsonify({"success": True}), 201
+
+    client = app.test_client()
+    admission.in_flight = 20
+    headers = {'X-Coordinator-Token': 'secret'}
+    assert [client.post('/api/inventory', headers=headers).status_code for _ in range(3)] == [201] * 3
+    admission.in_flight = 0
+
+
+def test_full_buckets_evict_the_least_recently_used():
+    buckets = MemoryBuckets(max_keys=3)
+    assert buckets.take('busy', 0.001, 1) == (True, 0.0)
+    buckets.take('a', 0.001, 1)
+    buckets.take('b', 0.001, 1)
+    buckets.take('busy', 0.001, 1)  # refused, but now the most recently used
+    buckets.take('c', 0.001, 1)     # evicts 'a'
+
+    allowed, _ = buckets.take('busy', 0.001, 1)
+    assert not allowed
+    assert 'a' not in buckets._buckets
+    assert len(buckets._buckets) == 3
+
+
+def test_paged_list_read_is_charged_once():
+    admission = AdmissionControl(MemoryBuckets(), limits={PUBLIC: (0.001, 2)}, max_in_flight=64)
+    app = make_app(admission)
+
+    @app.route('/api/missing_persons/list')
+    def missing_persons_page():
+        cursor = int(request.args.get('cursor') or 0)
+        return jsonify({"success": True, "data": [], "next_cursor": cursor + 100 if cursor < 5000 else None})
+
+    client = app.test_client()
+    for _ in range(2):  # two full loads fit the burst of 2
+        cursor, pages = None, 0
+        while True:
+            response = client.get('/api/missing_persons/list', query_string={'cursor': cursor} if cursor else {})
+            assert response.status_code == 200
+            pages += 1
+            cursor = response.json['next_cursor']
+            if cursor is None:
+                break
+        assert pages == 51
+
+    assert client.get('/api/missing_persons/list').status_code == 429
+
+
+def test_preflights_are_not_limited():
+    admission = AdmissionControl(MemoryBuckets(), limits={PUBLIC: (0.001, 1)}, max_in_flight=64)
+    client = make_app(admission).test_client()
+    assert [client.options('/api/missing_persons').status_code for _ in range(5)] == [200] * 5
+    assert client.get('/api/missing_persons').status_code == 200
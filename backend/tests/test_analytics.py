@@ -0,0 +1,30 @@
+import pandas as pd
+
+import analytics
+from analytics import DONATION_COLUMNS, INVENTORY_COLUMNS, SUPPLY_COLUMNS, StockFlowCache
+
+
+class FakeConnection:
+    def close(self):
+        pass
+
+
+def test_stock_flow_is_loaded_once_per_refresh(monkeypatch):
+    loads = []
+    frames = (
+        pd.DataFrame([(1, 'Rice', 1, 100), (2, 'Water', 2, 50)], columns=INVENTORY_COLUMNS),
+        pd.DataFrame([(1, 10, '2030-01-01')], columns=DONATION_COLUMNS),
+        pd.DataFrame([(2, 5, '2030-01-01')], columns=SUPPLY_COLUMNS),
+    )
+    monkeypatch.setattr(analytics, 'load_frames', lambda conn: loads.append(conn) or frames)
+    cache = StockFlowCache(FakeConnection, refresh=60)
+
+    first = cache.get(30)
+    assert cache.get(30) is first
+    assert len(cache.get(7)) == 2
+    assert len(loads) == 1
+
+    cache.refresh = 0
+    cache._loaded_at -= 1
+    assert cache.get(30) is not first
+    assert len(loads) == 2
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('quart')
+pytest.importorskip('hypercorn')
+pytest.importorskip('aiomysql')
+
+import asgi  # noqa: E402
+
+
+# Run one request through the ASGI app; returns (status, headers)
+def call(method, path, headers):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        'client': ('127.0.0.1', 1234), 'server': ('localhost', 5000),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.application(scope, receive, send))
+    start = next(message for message in messages if message['type'] == 'http.response.start')
+    return start['status'], {name.decode().lower(): value.decode() for name, value in start['headers']}
+
+
+@pytest.mark.parametrize('path', ['/api/victims', '/api/missing_persons'])
+def test_preflight_of_async_routes_allows_the_frontend_headers(path):
+    requested = 'content-type,x-coordinator-token,x-read-primary,idempotency-key'
+    status, headers = call('OPTIONS', path, {
+        'Origin': 'http://localhost:8000',
+        'Access-Control-Request-Method': 'GET',
+        'Access-Control-Request-Headers': requested,
+    })
+    assert status == 200
+    assert headers['access-control-allow-origin'] in ('*', 'http://localhost:8000')
+    assert set(headers['access-control-allow-headers'].lower().split(', ')) >= set(requested.split(','))
+    assert 'GET' in headers['access-control-allow-methods']
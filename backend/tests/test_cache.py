@@ -0,0 +1,44 @@
+from flask import Flask, jsonify
+
+from cache import MemoryBackend, ResponseCache
+
+
+def test_write_during_computation_is_not_cached_stale():
+    app = Flask(__name__)
+    cache = ResponseCache(MemoryBackend())
+    stock = {'quantity': 1}
+    computed = []
+
+    @app.route('/api/inventory')
+    @cache.cached('inventory')
+    def inventory():
+        value = stock['quantity']
+        if not computed:
+            # A write commits and invalidates after this view read the old value
+            stock['quantity'] = 2
+            cache.invalidate('inventory')
+        computed.append(value)
+        return jsonify({"quantity": value})
+
+    client = app.test_client()
+    assert client.get('/api/inventory').json == {"quantity": 1}
+    assert client.get('/api/inventory').json == {"quantity": 2}
+    assert client.get('/api/inventory').json == {"quantity": 2}
+    assert computed == [1, 2]
+
+
+def test_untouched_tags_are_still_stored():
+    backend = MemoryBackend()
+    since = backend.epoch()
+    backend.invalidate('volunteers')
+    assert backend.set('/api/inventory?', object(), ['inventory'], since)
+    assert not backend.set('/api/volunteers?', object(), ['volunteers'], since)
+
+
+def test_forgotten_stamps_are_treated_as_invalidated():
+    backend = MemoryBackend(max_entries=2)
+    since = backend.epoch()
+    for tag in ('a', 'b', 'c'):
+        backend.invalidate(tag)
+    assert not backend.set('/x', object(), ['d'], since)
+    assert backend.set('/x', object(), ['d'], backend.epoch())
@@ -0,0 +1,53 @@
+from flask import Flask, Response, jsonify, stream_with_context
+
+from instrumentation import Instrumentation, RequestStats
+
+
+def make_app():
+    app = Flask(__name__)
+    Instrumentation(profiling=True).install(app)
+
+    @app.route('/api/stream')
+    def stream():
+        def events():
+            while True:
+                yield ': keepalive\n\n'
+        return Response(stream_with_context(events()), mimetype='text/event-stream')
+
+    @app.route('/api/victims')
+    def victims():
+        return jsonify({"success": True, "data": []})
+
+    return app
+
+
+def test_streamed_responses_are_not_profiled():
+    client = make_app().test_client()
+    response = client.get('/api/stream?profile=1', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['X-Profile-Skipped'] == 'streamed response'
+    assert next(response.response) == b': keepalive\n\n'
+    response.close()
+
+
+def test_other_responses_are_replaced_by_the_profile():
+    client = make_app().test_client()
+    response = client.get('/api/victims?profile=1')
+    assert response.mimetype == 'text/plain'
+    assert response.headers['X-Profiled-Status'] == '200'
+
+
+def test_same_key_lookups_are_grouped_by_table_and_column():
+    stats = RequestStats()
+    stats.queries = [
+        ("SELECT * FROM Volunteer WHERE volunteer_id = %s", (7,), 0.001),
+        ("SELECT va.*, rc.camp_name FROM VolunteerAssignment va JOIN ReliefCamp rc "
+         "ON va.camp_id = rc.camp_id WHERE va.volunteer_id = %s", (7,), 0.001),
+        ("SELECT * FROM Inventory WHERE camp_id = %s", (7,), 0.001),
+        ("SELECT first_name FROM VictimSurvivor WHERE victim_id = %s", (7,), 0.001),
+        ("SELECT v.last_name FROM VictimSurvivor v WHERE v.victim_id = %s", (7,), 0.001),
+    ]
+    assert stats.n_plus_one(threshold=3) == [
+        ('same_key', "SELECT first_name FROM VictimSurvivor WHERE victim_id = %s"),
+        ('same_key', "SELECT v.last_name FROM VictimSurvivor v WHERE v.victim_id = %s"),
+    ]
@@ -0,0 +1,123 @@
+from flask import Flask, g, jsonify, request
+
+import offline_sync
+from admission import AdmissionControl, MemoryBuckets, NORMAL
+from idempotency import CLAIMED, REPLAY, IdempotencyStore
+
+
+# IdempotencyStore's claim/complete/release kept in memory
+class MemoryStore:
+    def __init__(self):
+        self.keys = {}  # key -> (owner, fingerprint, stored response or None)
+        self.owners = 0
+
+    def claim(self, entries):
+        self.owners += 1
+        owner = self.owners
+        results = {}
+        for key, fingerprint in entries.items():
+            claimed = self.keys.setdefault(key, (owner, fingerprint, None))
+            results[key] = (CLAIMED, None) if claimed[0] == owner else (REPLAY, claimed[2])
+        return owner, results
+
+    def complete(self, owner, responses):
+        for key, status, content_type, body in responses:
+            self.keys[key] = (owner, self.keys[key][1], (status, content_type, body))
+
+    def release(self, owner, keys):
+        for key in keys:
+            del self.keys[key]
+
+
+def make_app(store):
+    app = Flask(__name__)
+    stock = {'quantity': 0}
+    seen = []
+
+    @app.before_request
+    def mark():
+        seen.append(('before', request.path, g.get('mark')))
+        g.mark = request.path
+
+    @app.route('/api/inventory/<int:item_id>', methods=['PUT'])
+    def update_inventory(item_id):
+        stock['quantity'] += request.json['add']
+        return jsonify({"success": True, "quantity": stock['quantity']})
+
+    @app.route('/api/sync', methods=['POST'])
+    def sync_operations():
+        results = offline_sync.replay(app, store, request.json['operations'], 100)
+        seen.append(('sync g', g.mark))
+        return jsonify({"results": results})
+
+    return app, stock, seen
+
+
+def test_replaying_a_key_twice_applies_the_write_once():
+    app, stock, seen = make_app(MemoryStore())
+    client = app.test_client()
+    operations = [{"key": "k1", "method": "PUT", "path": "/api/inventory/1", "body": {"add": 5}}]
+
+    first = client.post('/api/sync', json={"operations": operations}).json['results']
+    second = client.post('/api/sync', json={"operations": operations}).json['results']
+
+    assert stock['quantity'] == 5
+    assert first[0]['status'] == second[0]['status'] == 200
+    assert second[0]['body'] == {"success": True, "quantity": 5}
+    # The operation ran its own before_request hooks, with a g of its own
+    assert ('before', '/api/inventory/1', None) in seen
+    assert ('sync g', '/api/sync') in seen
+
+
+def test_rate_limited_operations_are_retried():
+    store = MemoryStore()
+    app, stock, _ = make_app(store)
+
+    @app.route('/api/victims/<int:victim_id>', methods=['DELETE'])
+    def delete_victim(victim_id):
+        return jsonify({"success": False, "message": "Too many requests"}), 429
+
+    client = app.test_client()
+    operations = [{"key": "k2", "method": "DELETE", "path": "/api/victims/1", "body": None}]
+    results = client.post('/api/sync', json={"operations": operations}).json['results']
+    assert results[0]['status'] == 429 and results[0]['retry']
+    assert 'k2' not in store.keys
+
+
+def test_replayed_operations_are_not_rate_limited_one_by_one():
+    app, stock, _ = make_app(MemoryStore())
+    admission = AdmissionControl(MemoryBuckets(), limits={NORMAL: (0.001, 2)}, max_in_flight=64)
+    admission.install(app)
+    client = app.test_client()
+    operations = [{"key": f"u{i}", "method": "PUT", "path": "/api/inventory/1", "body": {"add": 1}}
+                  for i in range(50)]
+
+    results = client.post('/api/sync', json={"operations": operations}).json['results']
+    assert [result['status'] for result in results] == [200] * 50
+    assert stock['quantity'] == 50
+    assert admission.in_flight == 0
+
+
+# IdempotencyStore whose complete() fails, recording what is released
+class FailingStore(IdempotencyStore):
+    def __init__(self):
+        super().__init__(connect=None)
+        self.released = []
+
+    def claim(self, entries):
+        return 'owner', {key: (CLAIMED, None) for key in entries}
+
+    def complete(self, owner, responses):
+        raise RuntimeError("database went away")
+
+    def release(self, owner, keys):
+        self.released.extend(keys)
+
+
+def test_key_is_released_when_its_response_cannot_be_stored():
+    store = FailingStore()
+    app, stock, _ = make_app(store)
+    store.install(app)
+    response = app.test_client().put('/api/inventory/1', json={"add": 3}, headers={'Idempotency-Key': 'k3'})
+    assert response.status_code == 200
+    assert store.released == ['k3']
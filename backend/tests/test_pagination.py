@@ -0,0 +1,44 @@
+import pytest
+
+from pagination import MAX_PAGE_LIMIT, PaginationError, build_filtered_query, build_keyset_query, parse_limit
+
+
+def test_limit_defaults_and_is_capped():
+    assert parse_limit({}, default=10) == 10
+    assert parse_limit({'limit': ''}, default=10) == 10
+    assert parse_limit({'limit': '25'}, default=10) == 25
+    assert parse_limit({'limit': str(MAX_PAGE_LIMIT + 1)}) == MAX_PAGE_LIMIT
+
+
+@pytest.mark.parametrize('raw', ['0', '-5', 'ten'])
+def test_limit_must_be_a_positive_integer(raw):
+    with pytest.raises(PaginationError):
+        parse_limit({'limit': raw}, default=10)
+
+
+FILTERS = {
+    'camp_id': ("v.camp_id = %s", int),
+    'name_prefix': (("v.first_name LIKE %s", "v.last_name LIKE %s"), lambda value: value + '%'),
+}
+
+
+def test_alternative_filters_page_through_a_union():
+    query, params, limit = build_keyset_query("SELECT v.* FROM VictimSurvivor v", "v.victim_id", FILTERS,
+                                              {'camp_id': '3', 'name_prefix': 'Sh', 'cursor': '500', 'limit': '10'})
+    assert query == (
+        "(SELECT v.* FROM VictimSurvivor v WHERE v.camp_id = %s AND v.first_name LIKE %s"
+        " AND v.victim_id > %s ORDER BY v.victim_id LIMIT %s)"
+        " UNION "
+        "(SELECT v.* FROM VictimSurvivor v WHERE v.camp_id = %s AND v.last_name LIKE %s"
+        " AND v.victim_id > %s ORDER BY v.victim_id LIMIT %s)"
+        " ORDER BY victim_id LIMIT %s"
+    )
+    assert params == (3, 'Sh%', 500, 11, 3, 'Sh%', 500, 11, 11)
+    assert limit == 10
+
+
+def test_exports_join_alternatives_with_or():
+    query, params = build_filtered_query("SELECT v.* FROM VictimSurvivor v", "v.victim_id", FILTERS,
+                                         {'name_prefix': 'Sh'})
+    assert query.endswith("WHERE (v.first_name LIKE %s OR v.last_name LIKE %s) ORDER BY v.victim_id")
+    assert params == ('Sh%', 'Sh%')
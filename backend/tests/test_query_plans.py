@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from migrate import PlanExpectation, api_queries, explain_problems, plan_problems
+
+
+def step(table, type_, key, extra=None):
+    return {'table': table, 'type': type_, 'key': key, 'Extra': extra}
+
+
+def test_expected_index_plan_passes():
+    expectation = PlanExpectation({'v': ('idx_victim_dob',)}, sorts=True)
+    steps = [step('v', 'range', 'idx_victim_dob', 'Using index condition; Using filesort')]
+    assert explain_problems("GET /api/victims?born_from=", steps, expectation) == []
+
+
+def test_scans_sorts_and_wrong_indexes_are_flagged():
+    expectation = PlanExpectation({'v': ('idx_victim_camp',)})
+    steps = [
+        step('v', 'index', 'PRIMARY', 'Using where'),
+        step('c', 'ALL', None, 'Using temporary; Using filesort'),
+        step('<union2,3>', 'ALL', None, 'Using temporary'),
+        step(None, None, None, 'No tables used'),
+    ]
+    assert explain_problems("GET /api/victims?camp_id=", steps, expectation) == [
+        "GET /api/victims?camp_id=: full index scan of v (PRIMARY)",
+        "GET /api/victims?camp_id=: reads v through PRIMARY, expected idx_victim_camp",
+        "GET /api/victims?camp_id=: full scan of c",
+        "GET /api/victims?camp_id=: temporary table for c",
+        "GET /api/victims?camp_id=: filesort of c",
+    ]
+
+
+def test_every_list_filter_has_an_expected_plan():
+    missing = [label for label, _, _, expectation in api_queries() if '?' in label and not expectation.indexes]
+    assert missing == []
+
+
+@pytest.mark.skipif(not os.environ.get('DB_HOST'), reason="needs a migrated MySQL database (DB_HOST)")
+def test_api_query_plans():
+    from app import create_mysql_connection
+
+    conn = create_mysql_connection()
+    try:
+        assert plan_problems(conn) == []
+    finally:
+        conn.close()
@@ -0,0 +1,68 @@
+# Optimistic concurrency for PUT routes (migration 0007). Every update bumps
+# the row's version. A client that sends the version it read, in an If-Match
+# header or a "version" field, only changes the row if nobody changed it in
+# between; otherwise it gets 409 and the current version.
+
+UPDATED = 'updated'
+NOT_FOUND = 'not_found'
+CONFLICT = 'conflict'
+
+
+class VersionError(ValueError):
+    pass
+
+
+# The version a request expects to replace, or None for an unconditional
+# update. If-Match takes an ETag ("3", W/"3") or "*" (any version).
+def expected_version(headers, data):
+    raw = headers.get('If-Match')
+    if raw is None:
+        raw = data.get('version')
+    if raw is None or str(raw).strip() in ('', '*'):
+        return None
+    text = str(raw).strip()
+    if text.startswith('W/'):
+        text = text[2:]
+    try:
+        return int(text.strip('"'))
+    except ValueError:
+        raise VersionError(f"Invalid version: {raw}")
+
+
+# UPDATE setting `assignments` (["column = ...", ...]) and bumping the
+# version, matching only an expected version when `conditional`. The new
+# version comes back through LAST_INSERT_ID(expr), as in id_allocator, so a
+# successful update is one round trip; only a row that did not match is read
+# again (version_statement), to tell a missing row (404) from a stale version (409).
+def update_statement(table, pk, assignments, conditional=False):
+    statement = (f"UPDATE {table} SET {', '.join(assignments)}, version = LAST_INSERT_ID(version + 1) "
+                 f"WHERE {pk} = %s")
+    if conditional:
+        statement += " AND version = %s"
+    return statement
+
+
+def version_statement(table, pk):
+    return f"SELECT version FROM {table} WHERE {pk} = %s"
+
+
+# Locks a row whose current values an update needs (e.g. to move camp
+# counters) and reads its version with them
+def lock_statement(table, pk, columns):
+    return f"SELECT {', '.join(list(columns) + ['version'])} FROM {table} WHERE {pk} = %s FOR UPDATE"
+
+
+# Outcome of an update that matched no row, from version_statement's row:
+# (NOT_FOUND, None) or (CONFLICT, current version)
+def mismatch(row):
+    return (NOT_FOUND, None) if row is None else (CONFLICT, row[0])
+
+
+# Outcome of a lock_statement row: (UPDATED, columns), (NOT_FOUND, None) or
+# (CONFLICT, current version)
+def check_lock(row, expected=None):
+    if row is None:
+        return NOT_FOUND, None
+    if expected is not None and row[-1] != expected:
+        return CONFLICT, row[-1]
+    return UPDATED, tuple(row[:-1])
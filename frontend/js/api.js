@@ -1,7 +1,35 @@
 // API URL configuration
 const API_BASE_URL = 'http://localhost:5000/api';
 
-// Generic fetch function for API calls
+// A new key for each write, so a retry of it is not applied twice
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+}
+
+// Time of this tab's last successful write. For a few seconds after it,
+// reads ask for the primary database ("X-Read-Primary: 1") so they see the
+// write even if the read replicas have not caught up yet.
+const readYourWrites = {
+    storageKey: 'lastWriteAt',
+    windowMs: 5000,
+
+    mark() {
+        sessionStorage.setItem(this.storageKey, String(Date.now()));
+    },
+
+    active() {
+        const lastWrite = Number(sessionStorage.getItem(this.storageKey) || 0);
+        return Date.now() - lastWrite < this.windowMs;
+    }
+};
+
+// Generic fetch function for API calls.
+// Writes carry an Idempotency-Key. A write that cannot reach the server is
+// kept in offlineQueue and sent later; the call then resolves with
+// { success: true, queued: true }.
 async function fetchAPI(endpoint, method = 'GET', data = null) {
     const url = `${API_BASE_URL}/${endpoint}`;
     const options = {
@@ -10,18 +38,59 @@ async function fetchAPI(endpoint, method = 'GET', data = null) {
             'Content-Type': 'application/json'
         }
     };
+    const isWrite = method === 'POST' || method === 'PUT' || method === 'DELETE';
+    const key = isWrite ? newIdempotencyKey() : null;
+
+    // Coordinators' requests are never rate limited or shed under load
+    const coordinatorToken = localStorage.getItem('coordinatorToken');
+    if (coordinatorToken) {
+        options.headers['X-Coordinator-Token'] = coordinatorToken;
+    }
 
+    if (isWrite) {
+        options.headers['Idempotency-Key'] = key;
+    } else if (readYourWrites.active()) {
+        options.headers['X-Read-Primary'] = '1';
+    }
     if (data && (method === 'POST' || method === 'PUT')) {
         options.body = JSON.stringify(data);
     }
 
+    // Writes made while older ones are still queued go behind them, so
+    // they reach the server in the order they were made
+    if (isWrite && offlineQueue.size() > 0) {
+        return offlineQueue.add({ key, method, path: `/api/${endpoint}`, body: data });
+    }
+
+    let response;
+    try {
+        response = await fetch(url, options);
+    } catch (error) {
+        // Network failure: the request may or may not have arrived. Resending
+        // it with the same key later is safe either way.
+        if (isWrite) {
+            return offlineQueue.add({ key, method, path: `/api/${endpoint}`, body: data });
+        }
+        console.error('API Error:', error);
+        throw error;
+    }
+
+    // Refused before it ran (server busy or rate limited): queue the write
+    // and send it again later
+    if (isWrite && (response.status === 503 || response.status === 429)) {
+        return offlineQueue.add({ key, method, path: `/api/${endpoint}`, body: data },
+            'The server is busy. The change was saved and will be sent shortly.');
+    }
+
     try {
-        const response = await fetch(url, options);
         const result = await response.json();
         
         if (!response.ok) {
             throw new Error(result.message || 'An error occurred');
         }
+        if (isWrite) {
+            readYourWrites.mark();
+        }
         
         return result;
     } catch (error) {
@@ -30,10 +99,47 @@ async function fetchAPI(endpoint, method = 'GET', data = null) {
     }
 }
 
+// Build a query string from an object, skipping empty values
+function toQueryString(params = {}) {
+    const query = new URLSearchParams();
+    for (const [key, value] of Object.entries(params)) {
+        if (value !== null && value !== undefined && value !== '') {
+            query.append(key, value);
+        }
+    }
+    const text = query.toString();
+    return text ? `?${text}` : '';
+}
+
+// Fetch a single page of a list endpoint.
+// params: { limit, cursor, ...filters }; the response carries next_cursor
+function fetchPage(endpoint, params = {}) {
+    return fetchAPI(`${endpoint}${toQueryString(params)}`);
+}
+
+// Follow next_cursor until every page of a list endpoint has been read.
+// Pages are as large as the server allows (1000 rows); only the first one
+// counts against the rate limit.
+async function fetchAllPages(endpoint, params = {}) {
+    const data = [];
+    let cursor = null;
+
+    do {
+        const result = await fetchPage(endpoint, { limit: 1000, ...params, cursor });
+        data.push(...result.data);
+        cursor = result.next_cursor;
+    } while (cursor);
+
+    return { success: true, data };
+}
+
 // Relief Camp API functions
 const reliefCampAPI = {
     // Get all relief camps
-    getAll: () => fetchAPI('relief_camps'),
+    getAll: (filters = {}) => fetchAllPages('relief_camps', filters),
+    
+    // Get one page of relief camps (params: limit, cursor and filters)
+    getPage: (params = {}) => fetchPage('relief_camps', params),
     
     // Get a single relief camp by ID
     getById: (id) => fetchAPI(`relief_camps/${id}`),
@@ -41,6 +147,9 @@ const reliefCampAPI = {
     // Create a new relief camp
     create: (campData) => fetchAPI('relief_camps', 'POST', campData),
     
+    // Create many relief camps in one request (array of objects)
+    bulkCreate: (camps) => fetchAPI('relief_camps/bulk', 'POST', camps),
+    
     // Update an existing relief camp
     update: (id, campData) => fetchAPI(`relief_camps/${id}`, 'PUT', campData),
     
@@ -51,7 +160,10 @@ const reliefCampAPI = {
 // Victim Management API functions
 const victimAPI = {
     // Get all victims
-    getAll: () => fetchAPI('victims'),
+    getAll: (filters = {}) => fetchAllPages('victims', filters),
+    
+    // Get one page of victims (params: limit, cursor and filters)
+    getPage: (params = {}) => fetchPage('victims', params),
     
     // Get a single victim by ID
     getById: (id) => fetchAPI(`victims/${id}`),
@@ -59,6 +171,9 @@ const victimAPI = {
     // Create a new victim
     create: (victimData) => fetchAPI('victims', 'POST', victimData),
     
+    // Create many victims in one request (array of objects)
+    bulkCreate: (victims) => fetchAPI('victims/bulk', 'POST', victims),
+    
     // Update an existing victim
     update: (id, victimData) => fetchAPI(`victims/${id}`, 'PUT', victimData),
     
@@ -69,7 +184,10 @@ const victimAPI = {
 // Missing Person API functions
 const missingPersonAPI = {
     // Get all missing person reports
-    getAll: () => fetchAPI('missing_persons'),
+    getAll: (filters = {}) => fetchAllPages('missing_persons', filters),
+    
+    // Get one page of missing person reports (params: limit, cursor and filters)
+    getPage: (params = {}) => fetchPage('missing_persons', params),
     
     // Get a single missing person report by ID
     getById: (id) => fetchAPI(`missing_persons/${id}`),
@@ -77,6 +195,9 @@ const missingPersonAPI = {
     // Create a new missing person report
     create: (reportData) => fetchAPI('missing_persons', 'POST', reportData),
     
+    // Create many missing person reports in one request (array of objects)
+    bulkCreate: (reports) => fetchAPI('missing_persons/bulk', 'POST', reports),
+    
     // Update an existing missing person report
     update: (id, reportData) => fetchAPI(`missing_persons/${id}`, 'PUT', reportData),
     
@@ -87,7 +208,10 @@ const missingPersonAPI = {
 // Inventory API functions
 const inventoryAPI = {
     // Get all inventory items
-    getAll: () => fetchAPI('inventory'),
+    getAll: (filters = {}) => fetchAllPages('inventory', filters),
+    
+    // Get one page of inventory items (params: limit, cursor and filters)
+    getPage: (params = {}) => fetchPage('inventory', params),
     
     // Get a single inventory item by ID
     getById: (id) => fetchAPI(`inventory/${id}`),
@@ -95,9 +219,15 @@ const inventoryAPI = {
     // Create a new inventory item
     create: (itemData) => fetchAPI('inventory', 'POST', itemData),
     
-    // Update an existing inventory item
+    // Create many inventory items in one request (array of objects)
+    bulkCreate: (items) => fetchAPI('inventory/bulk', 'POST', items),
+    
+    // Update an existing inventory item (pass the version read to refuse stale edits)
     update: (id, itemData) => fetchAPI(`inventory/${id}`, 'PUT', itemData),
     
+    // Change stock by a relative amount, e.g. adjust(id, -20)
+    adjust: (id, delta) => fetchAPI(`inventory/${id}/adjust`, 'POST', { delta }),
+    
     // Delete an inventory item
     delete: (id) => fetchAPI(`inventory/${id}`, 'DELETE')
 };
@@ -105,7 +235,10 @@ const inventoryAPI = {
 // Volunteer API functions
 const volunteerAPI = {
     // Get all volunteers
-    getAll: () => fetchAPI('volunteers'),
+    getAll: (filters = {}) => fetchAllPages('volunteers', filters),
+    
+    // Get one page of volunteers (params: limit, cursor and filters)
+    getPage: (params = {}) => fetchPage('volunteers', params),
     
     // Get a single volunteer by ID
     getById: (id) => fetchAPI(`volunteers/${id}`),
@@ -113,6 +246,12 @@ const volunteerAPI = {
     // Create a new volunteer
     create: (volunteerData) => fetchAPI('volunteers', 'POST', volunteerData),
     
+    // Create many volunteers in one request (array of objects)
+    bulkCreate: (volunteers) => fetchAPI('volunteers/bulk', 'POST', volunteers),
+    
+    // Assign free volunteers to camps ({ start_date, end_date, dry_run })
+    schedule: (options = {}) => fetchAPI('volunteers/schedule', 'POST', options),
+
     // Update an existing volunteer
     update: (id, volunteerData) => fetchAPI(`volunteers/${id}`, 'PUT', volunteerData),
     
@@ -120,6 +259,142 @@ const volunteerAPI = {
     delete: (id) => fetchAPI(`volunteers/${id}`, 'DELETE')
 };
 
+// Search API function
+const searchAPI = {
+    // Ranked search over victims, missing person reports and volunteers.
+    // params: { limit, cursor, type: 'victims,missing_persons,volunteers' }
+    search: (q, params = {}) => fetchPage('search', { ...params, q })
+};
+
+// Change feed API functions
+const changesAPI = {
+    // Changes after a seq, oldest first (params: limit, resources); continue from next_since
+    since: (seq, params = {}) => fetchPage('changes', { ...params, since: seq }),
+    
+    // Live changes: onChange(change) for each change to the given resources
+    // (e.g. ['inventory']). Returns the EventSource; call close() to stop.
+    // The browser reconnects by itself and resumes after the last change seen.
+    subscribe: (resources, onChange) => {
+        const source = new EventSource(`${API_BASE_URL}/stream?resources=${resources.join(',')}`);
+        resources.forEach(resource => {
+            source.addEventListener(resource, event => onChange(JSON.parse(event.data)));
+        });
+        return source;
+    }
+};
+
+// Run reload() once changes to the given resources stop arriving for `delay` ms
+function liveReload(resources, reload, delay = 1000) {
+    let timer = null;
+    return changesAPI.subscribe(resources, () => {
+        clearTimeout(timer);
+        timer = setTimeout(reload, delay);
+    });
+}
+
+// Writes made while offline, kept in localStorage until /api/sync accepts them
+const offlineQueue = {
+    storageKey: 'offlineWriteQueue',
+    batchSize: 5000,
+    flushing: null,
+
+    load() {
+        try {
+            return JSON.parse(localStorage.getItem(this.storageKey)) || [];
+        } catch (error) {
+            return [];
+        }
+    },
+
+    save(operations) {
+        localStorage.setItem(this.storageKey, JSON.stringify(operations));
+    },
+
+    size() {
+        return this.load().length;
+    },
+
+    // operation: { key, method, path, body }
+    add(operation, message = 'You are offline. The change was saved and will be sent when the connection is back.') {
+        const operations = this.load();
+        operations.push(operation);
+        this.save(operations);
+        return { success: true, queued: true, message };
+    },
+
+    // Send queued writes in order, in batches. Resolves to
+    // { synced, failed: [result, ...] }; failed holds writes the server refused.
+    flush() {
+        if (!this.flushing) {
+            this.flushing = this.sendAll().finally(() => { this.flushing = null; });
+        }
+        return this.flushing;
+    },
+
+    async sendAll() {
+        let synced = 0;
+        const failed = [];
+
+        while (this.size() > 0) {
+            const batch = this.load().slice(0, this.batchSize);
+            let result;
+            try {
+                const response = await fetch(`${API_BASE_URL}/sync`, {
+                    method: 'POST',
+                    headers: Object.assign({ 'Content-Type': 'application/json' },
+                        localStorage.getItem('coordinatorToken')
+                            ? { 'X-Coordinator-Token': localStorage.getItem('coordinatorToken') } : {}),
+                    body: JSON.stringify({ operations: batch })
+                });
+                if (!response.ok) {
+                    break;  // try again later
+                }
+                result = await response.json();
+                readYourWrites.mark();
+            } catch (error) {
+                break;  // still offline
+            }
+
+            // Drop every write with a final result; the ones marked retry stay
+            // queued (with their keys) for the next flush
+            const retry = new Set();
+            result.results.forEach(item => {
+                if (item.retry) {
+                    retry.add(item.key);
+                } else if (item.status >= 400) {
+                    failed.push(item);
+                } else {
+                    synced++;
+                }
+            });
+            const sent = new Set(batch.map(operation => operation.key));
+            this.save(this.load().filter(operation => retry.has(operation.key) || !sent.has(operation.key)));
+            if (retry.size > 0) {
+                break;
+            }
+        }
+
+        if (synced > 0) {
+            showAlert(`${synced} change(s) made offline were saved.`);
+        }
+        if (failed.length > 0) {
+            console.error('Offline changes refused by the server:', failed);
+            showAlert(`${failed.length} change(s) made offline could not be saved: ${failed[0].body && failed[0].body.message}`, 'danger');
+        }
+        return { synced, failed };
+    }
+};
+
+// Send queued writes when the connection comes back, on page load and
+// every 30 seconds while any are left
+window.addEventListener('online', () => offlineQueue.flush());
+document.addEventListener('DOMContentLoaded', () => offlineQueue.flush());
+setInterval(() => {
+    if (offlineQueue.size() > 0) {
+        offlineQueue.flush();
+    }
+}, 30000);
+
 // Contact form API function
 const contactAPI = {
     // Submit contact form
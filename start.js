@@ -9,13 +9,28 @@ const isWindows = os.platform() === 'win32';
 const command = isWindows ? 'python' : 'python3';
 
 // Path to the backend app
-const backendPath = path.join(__dirname, 'backend', 'app.py');
+const backendDir = path.join(__dirname, 'backend');
+const backendPath = path.join(backendDir, 'app.py');
+
+// Worker count for the ASGI server: node start.js --workers 4 (or WORKERS=4).
+// Without it the Flask development server is started.
+const workersFlag = process.argv.indexOf('--workers');
+const workers = workersFlag !== -1 ? process.argv[workersFlag + 1] : process.env.WORKERS;
 
 console.log('Starting Disaster Relief Management System...');
-console.log('Starting Flask backend server...');
 
-// Spawn the Python Flask process
-const flaskProcess = spawn(command, [backendPath], {
+let args;
+if (workers) {
+  console.log(`Starting ASGI backend server with ${workers} workers...`);
+  args = ['-m', 'hypercorn', 'asgi:application', '--workers', String(workers), '--bind', '0.0.0.0:5000'];
+} else {
+  console.log('Starting Flask backend server...');
+  args = [backendPath];
+}
+
+// Spawn the Python backend process
+const flaskProcess = spawn(command, args, {
+  cwd: backendDir,
   stdio: 'inherit'
 });
 
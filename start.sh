@@ -1,4 +1,11 @@
 #!/bin/bash
+# Usage: ./start.sh [--workers N]
+# With --workers (or WORKERS=N) the API is served by hypercorn in ASGI mode.
+
+WORKERS=${WORKERS:-}
+if [ "$1" == "--workers" ]; then
+    WORKERS=$2
+fi
 
 echo "Starting Disaster Relief Management System..."
 echo ""
@@ -7,11 +14,20 @@ echo ""
 if ! command -v node &> /dev/null; then
     echo "Node.js is not installed or not in your PATH."
     echo ""
-    echo "Starting Flask server directly..."
     cd backend
-    python3 app.py
+    if [ -n "$WORKERS" ]; then
+        echo "Starting ASGI server with $WORKERS workers..."
+        python3 -m hypercorn asgi:application --workers "$WORKERS" --bind 0.0.0.0:5000
+    else
+        echo "Starting Flask server directly..."
+        python3 app.py
+    fi
     exit
 fi
 
 echo "Starting with Node.js..."
-node start.js 
\ No newline at end of file
+if [ -n "$WORKERS" ]; then
+    node start.js --workers "$WORKERS"
+else
+    node start.js
+fi